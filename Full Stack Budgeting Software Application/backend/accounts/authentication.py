@@ -0,0 +1,52 @@
+import copy
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from euniceproj.ttl_cache import TTLCache
+
+User = get_user_model()
+
+# user id -> User, as loaded by the last request of this process that missed the cache
+user_cache = TTLCache(settings.AUTH_USER_CACHE_MAX_ENTRIES, settings.AUTH_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that keeps the users it loaded in a per-process TTL cache.
+
+    The token's signature and expiry are still checked on every request; only the
+    ``User`` lookup is cached, so a warm request runs no authentication query. Saving
+    or deleting a user evicts them here; other processes notice within
+    ``AUTH_USER_CACHE_TTL`` seconds.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is TTLCache._MISSING:
+            # Unknown, inactive and revoked users raise here and are never cached
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        elif api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        # A copy per request, so related objects cached on it (e.g. user.profile) do not outlive the request
+        return copy.copy(user)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    # Any change may matter: password, is_active, is_staff (the metrics endpoint checks it)
+    user_cache.discard(getattr(instance, api_settings.USER_ID_FIELD))
@@ -0,0 +1,62 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import CachedJWTAuthentication, user_cache
+from euniceproj.loadtest import percentile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare the per-request cost of authenticating a JWT with and without the user cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Requests authenticated per backend.")
+        parser.add_argument('--users', type=int, default=50, help="Distinct users the requests rotate over.")
+        parser.add_argument('--prefix', default='synthetic', help="Use the users with this username prefix.")
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__startswith=options['prefix']).order_by('id')[:options['users']])
+        if not users:
+            raise CommandError(f"No users named {options['prefix']}*. Run: python manage.py generate_synthetic_data")
+
+        factory = RequestFactory()
+        requests = [
+            factory.get('/transactions/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+            for user in users
+        ]
+        results = {}
+        for name, backend in (('database lookup', JWTAuthentication()), ('cached user', CachedJWTAuthentication())):
+            user_cache.clear()
+            for request in requests:  # Warm up: connection, token parsing, cache
+                backend.authenticate(request)
+            timings = []
+            with CaptureQueriesContext(connection) as queries:
+                for index in range(options['requests']):
+                    started = time.perf_counter()
+                    backend.authenticate(requests[index % len(requests)])
+                    timings.append((time.perf_counter() - started) * 1_000_000)
+            timings.sort()
+            results[name] = {
+                'mean': sum(timings) / len(timings),
+                'p50': percentile(timings, 0.50),
+                'p95': percentile(timings, 0.95),
+                'queries': len(queries) / options['requests'],
+            }
+            self.stdout.write(
+                f"{name:<16} mean {results[name]['mean']:8.1f}us  p50 {results[name]['p50']:8.1f}us  "
+                f"p95 {results[name]['p95']:8.1f}us  {results[name]['queries']:.2f} queries/request"
+            )
+
+        saving = results['database lookup']['mean'] - results['cached user']['mean']
+        self.stdout.write(self.style.SUCCESS(
+            f"The user cache saves {saving:.1f}us and "
+            f"{results['database lookup']['queries'] - results['cached user']['queries']:.2f} queries per request."
+        ))
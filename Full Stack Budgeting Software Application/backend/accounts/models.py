@@ -1,3 +1,24 @@
 from django.db import models
+from django.contrib.auth import get_user_model
 
-# Create your models here.
+User = get_user_model()
+
+DEFAULT_REPORTING_CURRENCY = 'USD'
+
+
+class Profile(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
+    # Currency that exports and reports are shown in; amounts are still stored in USD
+    reporting_currency = models.CharField(max_length=3, default=DEFAULT_REPORTING_CURRENCY)
+
+    class Meta:
+        db_table = 'app_profiles'
+
+    def __str__(self):
+        return f"{self.user} ({self.reporting_currency})"
+
+
+def get_reporting_currency(user):
+    """The user's reporting currency, without creating a profile for users who never set one."""
+    currency = Profile.objects.filter(user=user).values_list('reporting_currency', flat=True).first()
+    return currency or DEFAULT_REPORTING_CURRENCY
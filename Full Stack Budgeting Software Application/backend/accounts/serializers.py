@@ -1,5 +1,7 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from currencies_app.registry import currency_registry
+from .models import Profile
 
 class SignupSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -15,3 +17,15 @@ class SignupSerializer(serializers.ModelSerializer):
             email=validated_data.get('email', '')
         )
         return user
+
+
+class ProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Profile
+        fields = ['reporting_currency']
+
+    def validate_reporting_currency(self, value):
+        value = value.upper()
+        if value not in currency_registry:
+            raise serializers.ValidationError(f"Currency '{value}' is not supported.")
+        return value
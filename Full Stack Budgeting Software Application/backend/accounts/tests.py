@@ -3,6 +3,14 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from unittest.mock import patch
+from io import StringIO
+from .authentication import user_cache
+from .models import Profile, get_reporting_currency
 
 class AuthTests(TestCase):
     def setUp(self):
@@ -34,3 +42,66 @@ class AuthTests(TestCase):
         response = self.client.post(self.login_url, invalid_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("error", response.data)
+
+
+class ProfileTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="profile_user", password="test_password")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_reporting_currency_defaults_to_usd_and_can_be_changed(self):
+        self.assertEqual(self.client.get(reverse("profile")).data, {"reporting_currency": "USD"})
+        self.assertFalse(Profile.objects.filter(user=self.user).exists())
+
+        response = self.client.put(reverse("profile"), {"reporting_currency": "eur"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_reporting_currency(self.user), "EUR")
+
+        response = self.client.put(reverse("profile"), {"reporting_currency": "XYZ"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(username="jwt_user", password="test_password")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_warm_requests_run_no_authentication_query(self):
+        with self.assertNumQueries(2):  # The user, then the categories
+            self.assertEqual(self.client.get('/categories/').status_code, status.HTTP_200_OK)
+        # The response is cached too, so the repeat request runs no query at all
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/categories/').status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/categories/')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/categories/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tokens_issued_before_a_password_change_are_rejected(self):
+        # simplejwt reads its settings once; patch them instead of overriding SIMPLE_JWT
+        with patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+            self.assertEqual(self.client.get('/categories/').status_code, status.HTTP_200_OK)
+
+            self.user.set_password("new_password")
+            self.user.save()
+            self.assertEqual(self.client.get('/categories/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_not_shared_between_requests(self):
+        self.client.get('/accounts/profile/')
+        Profile.objects.create(user=self.user, reporting_currency="EUR")
+
+        response = self.client.get('/accounts/profile/')
+        self.assertEqual(response.data, {"reporting_currency": "EUR"})
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_authentication', requests=20, prefix="jwt_", stdout=out)
+        self.assertIn("0.00 queries/request", out.getvalue())
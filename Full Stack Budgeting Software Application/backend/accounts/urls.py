@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import SignupView, PublicObtainAuthToken, LoginView
+from .views import SignupView, PublicObtainAuthToken, LoginView, ProfileView
 
 urlpatterns = [
     # path('get-token', PublicObtainAuthToken.as_view()),
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', LoginView.as_view(), name='login'),
+    path('profile/', ProfileView.as_view(), name='profile'),
 ]
\ No newline at end of file
@@ -1,5 +1,8 @@
 from rest_framework.generics import CreateAPIView
-from .serializers import SignupSerializer
+from .serializers import SignupSerializer, ProfileSerializer
+from .models import Profile
+from rest_framework.permissions import IsAuthenticated
+from accounts.authentication import CachedJWTAuthentication
 from django.contrib.auth import authenticate
 from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -61,3 +64,20 @@ class SignupView(CreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save()
+
+
+class ProfileView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        profile = Profile.objects.filter(user=request.user).first() or Profile(user=request.user)
+        return Response(ProfileSerializer(profile).data)
+
+    def put(self, request):
+        profile, created = Profile.objects.get_or_create(user=request.user)
+        serializer = ProfileSerializer(profile, data=request.data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
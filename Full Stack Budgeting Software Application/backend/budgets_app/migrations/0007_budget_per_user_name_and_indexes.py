@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+def rename_duplicate_names(apps, schema_editor):
+    """Give a user's repeated budget names a suffix, so the per-user unique constraint can be added."""
+    Budget = apps.get_model('budgets_app', 'Budget')
+    taken = set(Budget.objects.values_list('user_id', 'name'))
+    seen = set()
+    renamed = []
+    for budget in Budget.objects.order_by('user_id', 'id').only('id', 'user_id', 'name'):
+        if (budget.user_id, budget.name) not in seen:
+            seen.add((budget.user_id, budget.name))
+            continue
+        suffix = 2
+        while True:
+            label = f' ({suffix})'
+            name = budget.name[:100 - len(label)] + label
+            if (budget.user_id, name) not in taken:
+                break
+            suffix += 1
+        budget.name = name
+        taken.add((budget.user_id, name))
+        seen.add((budget.user_id, name))
+        renamed.append(budget)
+    Budget.objects.bulk_update(renamed, ['name'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets_app', '0006_budget_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_names, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='budget',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_budget_name_per_user'),
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['user', 'start_date'], name='budget_user_start_date_idx'),
+        ),
+    ]
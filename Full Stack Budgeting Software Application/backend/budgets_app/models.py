@@ -19,6 +19,17 @@ def get_default_user():
 def default_end_date():
     return timezone.now() + timedelta(days=30)
 
+class BudgetManager(models.Manager):
+
+    """Budgets are per user; every lookup starts from the user, the leading column of their indexes."""
+
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def get_by_name(self, user, name):
+        return self.for_user(user).get(name=name)
+
+
 class Budget(models.Model):
     name = models.CharField(max_length=100, default="No Budget Assigned")
     total_limit = models.DecimalField(max_digits=10, decimal_places=2, default=5000)
@@ -26,8 +37,17 @@ class Budget(models.Model):
     end_date = models.DateField(default=default_end_date) 
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=get_default_user) 
 
+    objects = BudgetManager()
+
     class Meta:
         db_table = 'app_budgets'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_budget_name_per_user'),
+        ]
+        indexes = [
+            # Listings by start date and "active on" lookups (budget utilization, overview)
+            models.Index(fields=['user', 'start_date'], name='budget_user_start_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name}"
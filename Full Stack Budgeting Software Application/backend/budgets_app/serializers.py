@@ -10,6 +10,17 @@ class BudgetSerializer(serializers.ModelSerializer):
         model = Budget
         fields = ['id', 'name', 'total_limit', 'start_date', 'end_date']
 
+    def validate_name(self, value):
+        # Names are unique per user; without a request (e.g. nested in a transaction) the database checks it
+        request = self.context.get('request')
+        if request is not None:
+            budgets = Budget.objects.filter(user=request.user, name=value)
+            if self.instance is not None:
+                budgets = budgets.exclude(pk=self.instance.pk)
+            if budgets.exists():
+                raise serializers.ValidationError("You already have a budget with this name.")
+        return value
+
     def validate_start_date(self, value):
         end_date_str = self.initial_data.get('end_date')
         if end_date_str:
@@ -34,4 +45,21 @@ class BudgetSerializer(serializers.ModelSerializer):
             if value < start_date:
                 raise serializers.ValidationError("End date cannot be before start date.")
         
-        return value
\ No newline at end of file
+        return value
+
+class BudgetUtilizationSerializer(serializers.Serializer):
+    """Read-only budget-versus-actual figures from ``services.utilization``; amounts are USD."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    total_limit = serializers.DecimalField(max_digits=12, decimal_places=2)
+    spent = serializers.DecimalField(max_digits=12, decimal_places=2)
+    remaining = serializers.DecimalField(max_digits=12, decimal_places=2)
+    utilization = serializers.DecimalField(max_digits=10, decimal_places=4, allow_null=True)
+    transaction_count = serializers.IntegerField()
+    elapsed_days = serializers.IntegerField()
+    total_days = serializers.IntegerField()
+    burn_rate = serializers.DecimalField(max_digits=12, decimal_places=2)
+    projected_spend = serializers.DecimalField(max_digits=14, decimal_places=2)
+    projected_overspend_date = serializers.DateField(allow_null=True)
@@ -0,0 +1,68 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Count, DecimalField, F, FilteredRelation, Q, Sum, Value
+from django.db.models.functions import Coalesce, Least
+from .models import Budget
+
+TWO_PLACES = Decimal('0.01')
+
+
+def budgets_with_spending(user, as_of):
+    """The user's budgets active on ``as_of``, each annotated with its USD spending so far.
+
+    A single range join: every budget is LEFT JOINed to the user's transactions dated
+    between its start date and ``as_of`` (or its end date, if earlier) and aggregated,
+    so overlapping and multi-month budgets each count every transaction in their range.
+    """
+    return (
+        Budget.objects.filter(user=user, start_date__lte=as_of, end_date__gte=as_of)
+        .alias(spending=FilteredRelation('user__transaction', condition=Q(
+            user__transaction__date__gte=F('start_date'),
+            user__transaction__date__lte=Least(F('end_date'), Value(as_of)),
+        )))
+        .annotate(
+            spent=Coalesce(Sum('spending__amount_usd'), Value(Decimal('0')), output_field=DecimalField()),
+            transaction_count=Count('spending__id'),
+        )
+        .order_by('start_date', 'id')
+    )
+
+
+def utilization(budget, as_of):
+    """Spent, remaining, daily burn rate and the projected overspend date of an annotated budget."""
+    spent = budget.spent.quantize(TWO_PLACES)
+    remaining = budget.total_limit - spent
+    elapsed_days = (as_of - budget.start_date).days + 1
+    total_days = (budget.end_date - budget.start_date).days + 1
+    burn_rate = spent / elapsed_days
+
+    # At the current burn rate, the first day on which spending exceeds the limit
+    projected_overspend_date = None
+    if remaining < 0:
+        projected_overspend_date = as_of
+    elif burn_rate > 0:
+        overspend_date = as_of + timedelta(days=math.floor(remaining / burn_rate) + 1)
+        if overspend_date <= budget.end_date:
+            projected_overspend_date = overspend_date
+
+    return {
+        'id': budget.id,
+        'name': budget.name,
+        'start_date': budget.start_date,
+        'end_date': budget.end_date,
+        'total_limit': budget.total_limit,
+        'spent': spent,
+        'remaining': remaining,
+        'utilization': (spent / budget.total_limit).quantize(Decimal('0.0001')) if budget.total_limit else None,
+        'transaction_count': budget.transaction_count,
+        'elapsed_days': elapsed_days,
+        'total_days': total_days,
+        'burn_rate': burn_rate.quantize(TWO_PLACES),
+        'projected_spend': (burn_rate * total_days).quantize(TWO_PLACES),
+        'projected_overspend_date': projected_overspend_date,
+    }
+
+
+def budget_utilization(user, as_of):
+    return [utilization(budget, as_of) for budget in budgets_with_spending(user, as_of)]
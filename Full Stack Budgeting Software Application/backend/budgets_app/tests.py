@@ -4,6 +4,11 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
 from .models import Budget
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from transactions_app.models import Transaction
+from django.core.cache import cache
+from euniceproj.testing import QueryPlanAssertions
 from decimal import Decimal
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
@@ -143,3 +148,153 @@ class BudgetTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data['detail'], 'Budget not found')
+
+
+class BudgetUtilizationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="utilization_user", password="testpassword")
+        self.other_user = User.objects.create_user(username="utilization_other", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+
+        self.march = self.create_budget("March", '1000.00', "2025-03-01", "2025-03-31")
+        # Overlaps March and runs into April
+        self.spring = self.create_budget("Spring", '500.00', "2025-03-15", "2025-04-30")
+        self.tight = self.create_budget("Tight March", '250.00', "2025-03-01", "2025-03-31")
+        self.create_budget("January", '100.00', "2025-01-01", "2025-01-31")
+        self.create_budget("Other", '100.00', "2025-03-01", "2025-03-31", user=self.other_user)
+
+        self.create_transaction('100.00', "2025-03-05")
+        self.create_transaction('200.00', "2025-03-16")
+        self.create_transaction('50.00', "2025-04-02")  # after as_of
+        self.create_transaction('999.00', "2025-03-10", user=self.other_user)
+
+    def create_budget(self, name, total_limit, start_date, end_date, user=None):
+        return Budget.objects.create(name=name, total_limit=Decimal(total_limit), start_date=start_date,
+                                     end_date=end_date, user=user or self.user)
+
+    def create_transaction(self, amount, transaction_date, user=None):
+        return Transaction.objects.create(user=user or self.user, category=self.food, subcategory=self.groceries,
+                                          amount_currency=Decimal(amount), currency="USD",
+                                          description="Groceries", date=transaction_date)
+
+    def test_utilization_of_overlapping_and_multi_month_budgets(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/budgets/utilization/', {'as_of': '2025-03-20'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['as_of'], '2025-03-20')
+        budgets = {budget['name']: budget for budget in response.json()['budgets']}
+        self.assertEqual(set(budgets), {"March", "Spring", "Tight March"})
+
+        march = budgets["March"]
+        self.assertEqual(march['spent'], '300.00')
+        self.assertEqual(march['remaining'], '700.00')
+        self.assertEqual(march['utilization'], '0.3000')
+        self.assertEqual(march['transaction_count'], 2)
+        self.assertEqual((march['elapsed_days'], march['total_days']), (20, 31))
+        self.assertEqual(march['burn_rate'], '15.00')
+        self.assertEqual(march['projected_spend'], '465.00')
+        self.assertIsNone(march['projected_overspend_date'])
+
+        # Only the 16 March transaction falls in its range so far; 200 over 6 days crosses 500 on day 10
+        spring = budgets["Spring"]
+        self.assertEqual(spring['spent'], '200.00')
+        self.assertEqual(spring['transaction_count'], 1)
+        self.assertEqual(spring['burn_rate'], '33.33')
+        self.assertEqual(spring['projected_overspend_date'], '2025-03-30')
+
+        tight = budgets["Tight March"]
+        self.assertEqual(tight['remaining'], '-50.00')
+        self.assertEqual(tight['projected_overspend_date'], '2025-03-20')
+
+    def test_budget_without_transactions(self):
+        response = self.client.get('/budgets/utilization/', {'as_of': '2025-04-20'})
+        spring, = response.json()['budgets']
+        self.assertEqual(spring['spent'], '250.00')
+        self.assertEqual(spring['transaction_count'], 2)
+
+        response = self.client.get('/budgets/utilization/', {'as_of': '2025-01-10'})
+        january, = response.json()['budgets']
+        self.assertEqual(january['spent'], '0.00')
+        self.assertEqual(january['burn_rate'], '0.00')
+        self.assertIsNone(january['projected_overspend_date'])
+
+    def test_hundreds_of_budgets_in_one_query(self):
+        Budget.objects.bulk_create(
+            Budget(name=f"Budget {index}", total_limit=Decimal('400.00'), start_date="2025-03-01",
+                   end_date="2025-03-31", user=self.user)
+            for index in range(300)
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get('/budgets/utilization/', {'as_of': '2025-03-20'})
+        budgets = response.json()['budgets']
+        self.assertEqual(len(budgets), 303)
+        self.assertEqual({budget['spent'] for budget in budgets if budget['name'].startswith("Budget ")}, {'300.00'})
+
+    def test_invalid_as_of(self):
+        response = self.client.get('/budgets/utilization/', {'as_of': '20-03-2025'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BudgetOwnershipTests(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="budget_owner", password="testpassword")
+        self.other_user = User.objects.create_user(username="budget_other", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.march = self.create_budget("March", "2025-03-01")
+        self.create_budget("January", "2025-01-01")
+        self.create_budget("March", "2025-03-01", user=self.other_user)
+        self.create_budget("Holiday", "2025-12-01", user=self.other_user)
+
+    def create_budget(self, name, start_date, user=None):
+        return Budget.objects.create(name=name, total_limit=Decimal('1000.00'), start_date=start_date,
+                                     end_date=start_date[:8] + "28", user=user or self.user)
+
+    def test_list_and_lookup_are_the_users_own(self):
+        response = self.client.get('/budgets/')
+        self.assertEqual([budget['name'] for budget in response.data], ["January", "March"])
+
+        response = self.client.get('/budgets/March/')
+        self.assertEqual(response.data['id'], self.march.id)
+        self.assertEqual(self.client.get('/budgets/Holiday/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_only_reach_the_users_own_budgets(self):
+        self.assertEqual(self.client.delete('/budgets/Holiday/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.put('/budgets/Holiday/', {'name': "Mine", 'total_limit': '1.00',
+                                                         'start_date': '2025-12-01', 'end_date': '2025-12-28'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(self.client.delete('/budgets/March/').status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(Budget.objects.filter(user=self.other_user, name="March").exists())
+
+    def test_names_are_unique_per_user(self):
+        data = {'name': "Holiday", 'total_limit': '500.00', 'start_date': '2025-12-01', 'end_date': '2025-12-28'}
+        response = self.client.post('/budgets/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Budget.objects.get(pk=response.data['id']).user, self.user)
+
+        response = self.client.post('/budgets/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+
+        response = self.client.put('/budgets/January/', dict(data, name="March"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lookups_use_the_per_user_indexes(self):
+        # Enough tenants that only an index keeps a lookup from reading everyone's budgets
+        users = User.objects.bulk_create(User(username=f"tenant_{index}") for index in range(200))
+        Budget.objects.bulk_create(
+            Budget(name=f"Budget {month}", start_date=f"2025-{month:02d}-01", end_date=f"2025-{month:02d}-28", user=user)
+            for user in users for month in range(1, 13)
+        )
+
+        self.assertUsesIndex(Budget.objects.for_user(self.user).filter(name="March"), 'unique_budget_name_per_user')
+        self.assertUsesIndex(Budget.objects.for_user(self.user).order_by('start_date', 'id'), 'budget_user_start_date_idx')
+
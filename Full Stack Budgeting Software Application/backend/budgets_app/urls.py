@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import BudgetView
+from .views import BudgetView, BudgetUtilizationView
 
 urlpatterns = [
     path('', BudgetView.as_view(), name='budget-list'),
+    path('utilization/', BudgetUtilizationView.as_view(), name='budget-utilization'),
     path('<str:category>/', BudgetView.as_view(), name='budget-by-category'),
 ]
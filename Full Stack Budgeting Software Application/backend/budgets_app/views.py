@@ -5,39 +5,43 @@ from rest_framework.exceptions import NotFound
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
 from .models import Budget
-from .serializers import BudgetSerializer
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .serializers import BudgetSerializer, BudgetUtilizationSerializer
+from .services import budget_utilization
+from accounts.authentication import CachedJWTAuthentication
+from euniceproj.response_cache import cached_response
+from datetime import date, datetime
 
 class BudgetView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_object(self, category):
         try:
-            return Budget.objects.get(name=category)
+            return Budget.objects.get_by_name(self.request.user, category)
         except Budget.DoesNotExist:
             raise NotFound(detail="Budget not found", code=404)
 
+    @cached_response
     def get(self, request, category=None):
         if category:
             budget = self.get_object(category)
             serializer = BudgetSerializer(budget)
             return Response(serializer.data)
         
-        budgets = Budget.objects.all()
+        budgets = Budget.objects.for_user(request.user).order_by('start_date', 'id')
         serializer = BudgetSerializer(budgets, many=True)
         return Response(serializer.data)
 
     def post(self, request):
-        serializer = BudgetSerializer(data=request.data)
+        serializer = BudgetSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def put(self, request, category):
         budget = self.get_object(category)
-        serializer = BudgetSerializer(budget, data=request.data)
+        serializer = BudgetSerializer(budget, data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -47,3 +51,24 @@ class BudgetView(APIView):
         budget = self.get_object(category)
         budget.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BudgetUtilizationView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @cached_response
+    def get(self, request):
+        # Budgets active on ?as_of=YYYY-MM-DD (default: today), with spending up to that day
+        as_of = date.today()
+        if request.query_params.get('as_of'):
+            try:
+                as_of = datetime.strptime(request.query_params['as_of'], '%Y-%m-%d').date()
+            except ValueError:
+                return Response({"as_of": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        budgets = budget_utilization(request.user, as_of)
+        return Response({
+            'as_of': as_of.isoformat(),
+            'budgets': BudgetUtilizationSerializer(budgets, many=True).data,
+        })
@@ -0,0 +1,27 @@
+import categories_app.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def clear_uncategorized_owner(apps, schema_editor):
+    # The shared fallback category must not go with whichever user happened to create it
+    Category = apps.get_model('categories_app', 'Category')
+    Category.objects.filter(category='Uncategorized').update(user=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories_app', '0005_alter_category_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='user',
+            field=models.ForeignKey(blank=True, default=categories_app.models.get_default_user, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(clear_uncategorized_owner, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User 
 from django.contrib.auth import get_user_model
 
@@ -16,10 +18,28 @@ def get_default_user():
 
 class Category(models.Model):
     category = models.CharField(max_length=100, unique=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, default=get_default_user)
+    # None for the shared "Uncategorized" category, so deleting a user never reaches it
+    user = models.ForeignKey(User, on_delete=models.CASCADE, default=get_default_user, null=True, blank=True)
 
     class Meta:
         db_table = 'app_categories'
 
     def __str__(self):
         return self.category
+
+
+@receiver(pre_delete, sender=Category)
+def handle_category_delete(sender, instance, origin=None, **kwargs):
+    """Keep deletes outside ``services.delete_category`` (admin, shell) from orphaning transactions."""
+    from .services import reassign_category
+
+    if getattr(instance, '_reassigned', False):
+        return
+    # Deleting its creator cascades here; the deleted users' own rows go with them
+    if isinstance(origin, User):
+        deleted_user_ids = [origin.pk]
+    elif isinstance(origin, models.QuerySet) and origin.model is User:
+        deleted_user_ids = list(origin.values_list('pk', flat=True))
+    else:
+        deleted_user_ids = []
+    reassign_category(instance, exclude_user_ids=deleted_user_ids)
@@ -0,0 +1,90 @@
+import logging
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from reports_app.models import MonthlyCategoryRollup
+from subcategories_app.models import Subcategory
+from transactions_app.models import Transaction
+from .models import Category
+
+logger = logging.getLogger(__name__)
+
+UNCATEGORIZED = "Uncategorized"
+
+
+class ProtectedCategoryError(ValueError):
+    """The category receives the transactions of deleted categories and cannot be deleted itself."""
+
+
+def uncategorized_category():
+    """The shared "Uncategorized" category, created without an owner the first time it is needed."""
+    return Category.objects.get_or_create(category=UNCATEGORIZED, defaults={'user': None})[0]
+
+
+def reassign_category(category, exclude_user_ids=()):
+    """Move the category's transactions and rollups to each user's "Uncategorized" subcategory.
+
+    Deletes the category's subcategories but not the category itself. Runs a fixed number
+    of set-based statements, however many transactions, users and rollup buckets are
+    affected, and returns a summary of what was moved. The rows of ``exclude_user_ids``, users
+    being deleted, are not moved; they go along with the subcategories.
+    """
+    if category.category == UNCATEGORIZED:
+        raise ProtectedCategoryError(f"The '{UNCATEGORIZED}' category cannot be deleted.")
+
+    with transaction.atomic():
+        uncategorized = uncategorized_category()
+        subcategory_ids = list(Subcategory.objects.filter(category=category).values_list('id', flat=True))
+        in_subcategories = Q(subcategory_id__in=subcategory_ids)
+        of_category = Q(category=category)
+        if exclude_user_ids:
+            in_subcategories &= ~Q(user_id__in=exclude_user_ids)
+            of_category &= ~Q(user_id__in=exclude_user_ids)
+        transactions = Transaction.objects.filter(in_subcategories)
+
+        user_ids = set(transactions.order_by().values_list('user_id', flat=True).distinct())
+        user_ids |= set(
+            MonthlyCategoryRollup.objects.filter(in_subcategories).order_by().values_list('user_id', flat=True).distinct()
+        )
+        existing = set(
+            Subcategory.objects.filter(category=uncategorized, subcategory_name=UNCATEGORIZED, user_id__in=user_ids)
+            .values_list('user_id', flat=True)
+        )
+        Subcategory.objects.bulk_create(
+            Subcategory(category=uncategorized, subcategory_name=UNCATEGORIZED, user_id=user_id)
+            for user_id in user_ids - existing
+        )
+
+        reassigned = transactions.update(
+            category=uncategorized,
+            subcategory=Subquery(
+                Subcategory.objects.filter(
+                    category=uncategorized, subcategory_name=UNCATEGORIZED, user_id=OuterRef('user_id')
+                ).order_by('id').values('id')[:1]
+            ),
+        )
+        # Transactions filed under another category's subcategory keep that subcategory
+        reassigned += Transaction.objects.filter(of_category).update(category=uncategorized)
+        # The queryset updates bypass post_save, so move the monthly rollups explicitly
+        MonthlyCategoryRollup.objects.move(in_subcategories, uncategorized, UNCATEGORIZED)
+        MonthlyCategoryRollup.objects.move(of_category, uncategorized)
+        Subcategory.objects.filter(id__in=subcategory_ids).delete()
+
+    logger.info(
+        "Reassigned %d transactions of category '%s' and its %d subcategories to '%s'",
+        reassigned, category.category, len(subcategory_ids), UNCATEGORIZED,
+    )
+    return {
+        'reassigned_transactions': reassigned,
+        'deleted_subcategories': len(subcategory_ids),
+        'uncategorized_category_id': uncategorized.id,
+    }
+
+
+def delete_category(category):
+    """Reassign the category's transactions to "Uncategorized", delete it and return the summary."""
+    with transaction.atomic():
+        summary = reassign_category(category)
+        # Tells the pre_delete receiver the transactions have already been moved
+        category._reassigned = True
+        category.delete()
+    return summary
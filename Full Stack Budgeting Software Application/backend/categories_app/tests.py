@@ -1,7 +1,11 @@
 from django.test import TestCase
+from django.db import connection
 from rest_framework.test import APIClient
+from euniceproj.testing import QueryPlanAssertions
 from rest_framework import status
 from .models import Category
+from .services import UNCATEGORIZED
+from reports_app.models import MonthlyCategoryRollup
 from transactions_app.models import Transaction
 from subcategories_app.models import Subcategory 
 from budgets_app.models import Budget
@@ -165,4 +169,62 @@ class CategoriesAPITests(TestCase):
         self.assertEqual(self.transaction4.category.category, "Uncategorized")
 
         with self.assertRaises(Category.DoesNotExist):
-            category_to_delete.refresh_from_db()
\ No newline at end of file
+            category_to_delete.refresh_from_db()
+
+
+class CategoryOwnershipTests(QueryPlanAssertions, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="category_owner", password="testpassword")
+        self.other_user = User.objects.create_user(username="category_other", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Category.objects.create(category="Travel", user=self.other_user)
+
+    def test_created_categories_belong_to_their_creator(self):
+        response = self.client.post('/categories/', {'category': "Pets"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Category.objects.get(category="Pets").user, self.user)
+
+        response = self.client.put('/categories/Pets/', {'category': "Animals"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_shared_categories_are_readable_but_only_their_creator_changes_them(self):
+        self.assertEqual(self.client.get('/categories/Travel/').status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.put('/categories/Travel/', {'category': "Trips"}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete('/categories/Travel/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Category.objects.filter(category="Travel").exists())
+
+    def test_name_lookup_uses_the_unique_index(self):
+        Category.objects.bulk_create(Category(category=f"Category {index}", user=self.user) for index in range(500))
+        self.assertUsesIndex(Category.objects.filter(category="Travel"))
+
+    def test_deleting_a_creator_moves_other_users_transactions_and_leaves_uncategorized_unowned(self):
+        travel = Category.objects.get(category="Travel")
+        flights = Subcategory.objects.create(subcategory_name="Flights", category=travel, user=self.user)
+        hotels = Subcategory.objects.create(subcategory_name="Hotels", category=travel, user=self.other_user)
+        kept = Transaction.objects.create(user=self.user, category=travel, subcategory=flights,
+                                          amount_currency=300, currency="USD", description="Flight", date='2025-01-05')
+        Transaction.objects.create(user=self.other_user, category=travel, subcategory=hotels,
+                                   amount_currency=120, currency="USD", description="Hotel", date='2025-01-06')
+
+        self.other_user.delete()
+        connection.check_constraints()
+
+        uncategorized = Category.objects.get(category=UNCATEGORIZED)
+        self.assertIsNone(uncategorized.user)
+        self.assertFalse(Category.objects.filter(category="Travel").exists())
+        kept.refresh_from_db()
+        self.assertEqual((kept.category, kept.subcategory.subcategory_name, kept.subcategory.user),
+                         (uncategorized, UNCATEGORIZED, self.user))
+        self.assertEqual(list(Transaction.objects.values_list('id', flat=True)), [kept.id])
+        self.assertEqual(list(MonthlyCategoryRollup.objects.values_list('user', 'category', 'transaction_count')),
+                         [(self.user.id, uncategorized.id, 1)])
+
+        # Nobody owns "Uncategorized", so the users holding its subcategories can still be deleted
+        self.user.delete()
+        connection.check_constraints()
+        self.assertTrue(Category.objects.filter(category=UNCATEGORIZED).exists())
+        self.assertFalse(Transaction.objects.exists())
@@ -5,13 +5,16 @@ from .models import Category
 from .serializers import CategorySerializer 
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
+from euniceproj.response_cache import cached_response
+from .services import ProtectedCategoryError, delete_category
 
 class Categories(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
 
+    @cached_response
     def get(self, request, category_name=None):
         if category_name:
             # Single category fetch by name
@@ -32,7 +35,7 @@ class Categories(APIView):
         serializer = CategorySerializer(data=request.data)
         
         if serializer.is_valid():
-            category = serializer.save()
+            category = serializer.save(user=request.user)
             return Response({
                 "message": "Category created",
                 "category_id": category.id,
@@ -42,9 +45,9 @@ class Categories(APIView):
         return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
     def put(self, request, category_name):
-        # Update a category
+        # Update a category; categories are shared, so only their creator may change them
         try:
-            category = Category.objects.get(category=category_name)
+            category = Category.objects.get(category=category_name, user=request.user)
         except Category.DoesNotExist:
             return Response({'error': 'Category not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -72,15 +75,20 @@ class Categories(APIView):
         return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, category_name):
-        # Delete a category
+        # Delete a category, if the user created it
         try:
-            category = Category.objects.get(category=category_name)
+            category = Category.objects.get(category=category_name, user=request.user)
         except Category.DoesNotExist:
             return Response({'error': 'Category not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        category.delete()
+        category_id = category.id
+        try:
+            summary = delete_category(category)
+        except ProtectedCategoryError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response({
             'message': 'Category deleted successfully',
-            'category_id': category.id,
-            'category_name': category.category
+            'category_id': category_id,
+            'category_name': category.category,
+            **summary,
         }, status=status.HTTP_200_OK)
@@ -0,0 +1,10 @@
+from datetime import date
+from jobs_app.services import job
+from .services import refresh_rates
+
+
+@job('currencies.refresh_rates')
+def refresh_exchange_rates(snapshot_date=None):
+    """Load a rate snapshot from the API; failures are retried with backoff by the worker."""
+    snapshot_date = date.fromisoformat(snapshot_date) if snapshot_date else None
+    return {'stored': refresh_rates(snapshot_date)}
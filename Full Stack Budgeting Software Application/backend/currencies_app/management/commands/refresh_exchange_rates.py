@@ -0,0 +1,32 @@
+from datetime import date, datetime
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from currencies_app.models import ExchangeRate
+from currencies_app.services import refresh_rates
+
+
+class Command(BaseCommand):
+    help = "Load today's exchange rate snapshot from exchangerate-api (one snapshot per day)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Snapshot date (YYYY-MM-DD), defaults to today.")
+        parser.add_argument('--force', action='store_true', help="Reload even if the snapshot already exists.")
+
+    def handle(self, *args, **options):
+        try:
+            snapshot_date = datetime.strptime(options['date'], '%Y-%m-%d').date() if options['date'] else date.today()
+        except ValueError:
+            raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+
+        if not options['force'] and ExchangeRate.objects.filter(date=snapshot_date).exists():
+            self.stdout.write(f"Exchange rates for {snapshot_date} already loaded.")
+            return
+
+        try:
+            count = refresh_rates(snapshot_date)
+        except requests.RequestException as e:
+            raise CommandError(f"Error fetching exchange rates: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} exchange rates for {snapshot_date}."))
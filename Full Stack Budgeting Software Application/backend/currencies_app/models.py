@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class ExchangeRate(models.Model):
+    # One row per currency per day; rate_to_usd is the USD value of one unit of currency
+    date = models.DateField()
+    currency = models.CharField(max_length=3)
+    rate_to_usd = models.DecimalField(max_digits=20, decimal_places=10)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'app_exchange_rates'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['currency', 'date'],
+                name='unique_exchange_rate_per_currency_and_date'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.currency} {self.rate_to_usd} USD ({self.date})"
@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CURRENCY_REGISTRY_TTL = 6 * 60 * 60  # seconds
+CURRENCY_REGISTRY_RETRY = 60  # seconds before retrying a failed refresh
+
+currency_codes = [  # Offline seed; extended from stored exchange rate snapshots
+    "AFN", "ALL", "DZD", "AOA", "ARS", "AMD", "AWG", "AUD", "AZN", "BAM", 
+    "BBD", "BDT", "BGN", "BHD", "BIF", "BMD", "BND", "BOB", "BRL", "BSD", 
+    "BTN", "BWP", "BYN", "BZD", "CAD", "CDF", "CHF", "CLP", "CNY", "COP", 
+    "CRC", "CUP", "CVE", "CZK", "DJF", "DKK", "DOP", "DZD", "EGP", "ERN", 
+    "ETB", "EUR", "FJD", "FKP", "FOK", "GBP", "GEL", "GHS", "GIP", "GMD", 
+    "GNF", "GTQ", "GYD", "HKD", "HNL", "HRK", "HTG", "HUF", "IDR", "ILS", 
+    "INR", "IQD", "IRR", "ISK", "JMD", "JOD", "JPY", "KES", "KGS", "KHR", 
+    "KMF", "KPW", "KRW", "KWD", "KYD", "KZT", "LAK", "LBP", "LKR", "LRD", 
+    "LSL", "LTL", "LVL", "LYD", "MAD", "MDL", "MGA", "MKD", "MMK", "MNT", 
+    "MOP", "MUR", "MVR", "MWK", "MXN", "MYR", "MZN", "NAD", "NGN", "NIO", 
+    "NOK", "NPR", "NZD", "OMR", "PAB", "PEN", "PGK", "PHP", "PKR", "PLN", 
+    "PYG", "QAR", "RON", "RSD", "RUB", "RWF", "SAR", "SBD", "SCR", "SDG", 
+    "SEK", "SGD", "SHP", "SLL", "SOS", "SPL", "SRD", "SSP", "STN", "SYP", 
+    "SZL", "THB", "TJS", "TMT", "TND", "TOP", "TRY", "TTD", "TWD", "TZS", 
+    "UAH", "UGX", "USD", "UYU", "UZS", "VEF", "VND", "VUV", "WST", "XAF", 
+    "XCD", "XOF", "XPF", "YER", "ZAR", "ZMW", "ZWL"
+]
+
+
+def stored_currency_codes():
+    """Every currency with at least one stored exchange rate snapshot."""
+    from .models import ExchangeRate
+
+    return ExchangeRate.objects.values_list('currency', flat=True).distinct()
+
+
+class CurrencyRegistry:
+    """Process-wide frozenset of supported currency codes.
+
+    Lookups never block on I/O: they read the current set, and once ``ttl`` seconds
+    have passed a background thread reloads it from ``loader``. Until the first
+    reload completes (or whenever it fails) the ``seed`` codes are used.
+    """
+
+    def __init__(self, seed, loader, ttl=CURRENCY_REGISTRY_TTL, retry=CURRENCY_REGISTRY_RETRY):
+        self.seed = frozenset(seed)
+        self.loader = loader
+        self.ttl = ttl
+        self.retry = retry
+        self._codes = self.seed
+        self._expires_at = 0.0  # Stale until the first refresh
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def codes(self):
+        if time.monotonic() >= self._expires_at:
+            self._refresh_in_background()
+        return self._codes
+
+    def __contains__(self, code):
+        return code in self.codes
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name='currency-registry-refresh', daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            connections.close_all()  # Connections opened by this thread
+            with self._lock:
+                self._refreshing = False
+
+    def refresh(self):
+        """Reload the codes now; on failure keep the current set and retry after ``retry`` seconds."""
+        try:
+            codes = self.seed | frozenset(code.upper() for code in self.loader())
+        except Exception as exc:
+            logger.warning("Could not refresh currency registry, keeping %d codes: %s", len(self._codes), exc)
+            self._expires_at = time.monotonic() + self.retry
+            return self._codes
+        self._codes = codes
+        self._expires_at = time.monotonic() + self.ttl
+        return codes
+
+    def add(self, codes):
+        """Make ``codes`` valid immediately, e.g. right after new rates were stored."""
+        self._codes = self._codes | frozenset(code.upper() for code in codes)
+
+
+currency_registry = CurrencyRegistry(currency_codes, stored_currency_codes)
@@ -0,0 +1,350 @@
+import logging
+import os
+from bisect import bisect_right
+from datetime import date, datetime
+from decimal import Decimal
+
+import requests
+from django.db.models import DateField, DecimalField, Func, Value
+from django.db.models.expressions import Col, Expression
+from django.db.models.functions import Coalesce, Least, NullIf, Round
+from django.db.models.sql.constants import LOUTER
+from dotenv import load_dotenv
+
+from euniceproj.instrumentation import timed
+from euniceproj.response_cache import bump_data_version
+from euniceproj.ttl_cache import TTLCache
+from .models import ExchangeRate
+from .registry import currency_registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_RATE_API_URL = "https://v6.exchangerate-api.com/v6/{api_key}/latest/USD"
+EXCHANGE_RATE_API_TIMEOUT = 10  # seconds
+
+RATE_CACHE_MAX_ENTRIES = 4096
+RATE_CACHE_TTL = 60 * 60  # seconds
+
+currency_to_usd = { # Used when no snapshot has been loaded for a currency yet
+    "USD": 1.00,  # US Dollar
+    "EUR": 1.03,  # Euro
+    "JPY": 0.0063,  # Japanese Yen
+    "GBP": 1.22,  # British Pound
+    "AUD": 0.61,  # Australian Dollar
+    "CAD": 0.71,  # Canadian Dollar
+    "CHF": 1.09,  # Swiss Franc
+    "CNY": 0.14,  # Chinese Yuan
+    "INR": 0.012,  # Indian Rupee
+    "MXN": 0.048,  # Mexican Peso
+    "MYR": 0.222292,  # Malaysian Ringgit
+}
+
+
+rate_cache = TTLCache(RATE_CACHE_MAX_ENTRIES, RATE_CACHE_TTL)
+
+
+class ExchangeRateUnavailable(ValueError):
+    """No stored snapshot or static rate converts ``currency`` on ``on_date``."""
+
+    def __init__(self, currency, on_date):
+        self.currency = currency
+        self.on_date = on_date
+        super().__init__(f"No exchange rate for {currency} on {on_date.isoformat()}.")
+
+
+def _as_date(value):
+    if value is None:
+        return date.today()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value
+
+
+def get_rate_to_usd(currency, on_date=None):
+    """Return the USD value of one unit of ``currency`` on ``on_date``, or None if unknown.
+
+    Uses the most recent stored snapshot on or before the date, falling back to the
+    static ``currency_to_usd`` table. Snapshot rates of past dates are memoized in
+    ``rate_cache``; misses, static rates and today's rate are not, since the worker or the
+    cron command may store a snapshot from another process at any time.
+    """
+    currency = currency.upper()
+    if currency == 'USD':
+        return Decimal('1')
+
+    on_date = _as_date(on_date)
+    key = (currency, on_date)
+    rate = rate_cache.get(key)
+    if rate is not TTLCache._MISSING:
+        return rate
+
+    rate = (
+        ExchangeRate.objects.filter(currency=currency, date__lte=on_date)
+        .order_by('-date')
+        .values_list('rate_to_usd', flat=True)
+        .first()
+    )
+    if rate is None:
+        return Decimal(str(currency_to_usd[currency])) if currency in currency_to_usd else None
+
+    if on_date < date.today():
+        rate_cache.set(key, rate)
+    return rate
+
+
+def convert_to_usd(amount, currency, on_date=None):
+    """Convert ``amount`` of ``currency`` to USD using locally stored rates only.
+
+    Raises ``ExchangeRateUnavailable`` when no rate is known for the currency on that date.
+    """
+    amount = Decimal(str(amount))
+    rate = get_rate_to_usd(currency, on_date)
+    if rate is None:
+        raise ExchangeRateUnavailable(currency.upper(), _as_date(on_date))
+    return (amount * rate).quantize(Decimal('0.01'))
+
+
+class RateTable:
+    """In-memory rate lookups for bulk work, e.g. imports.
+
+    ``load`` pulls every stored snapshot of the given currencies in one query; after that
+    ``convert`` gives the same result as ``convert_to_usd`` without touching the database.
+    """
+
+    def __init__(self):
+        self._dates = {}
+        self._rates = {}
+
+    def load(self, currencies):
+        missing = {currency.upper() for currency in currencies} - self._dates.keys() - {'USD'}
+        if not missing:
+            return
+        for currency in missing:
+            self._dates[currency], self._rates[currency] = [], []
+        snapshots = (
+            ExchangeRate.objects.filter(currency__in=missing)
+            .order_by('currency', 'date')
+            .values_list('currency', 'date', 'rate_to_usd')
+        )
+        for currency, snapshot_date, rate in snapshots:
+            self._dates[currency].append(snapshot_date)
+            self._rates[currency].append(rate)
+
+    def rate(self, currency, on_date):
+        currency = currency.upper()
+        if currency == 'USD':
+            return Decimal('1')
+        self.load([currency])
+        index = bisect_right(self._dates[currency], _as_date(on_date))
+        if index:
+            return self._rates[currency][index - 1]
+        if currency in currency_to_usd:
+            return Decimal(str(currency_to_usd[currency]))
+        return None
+
+    def convert(self, amount, currency, on_date):
+        rate = self.rate(currency, on_date)
+        if rate is None:
+            raise ExchangeRateUnavailable(currency.upper(), _as_date(on_date))
+        return (amount * rate).quantize(Decimal('0.01'))
+
+    def from_usd(self, amount_usd, currency, on_date):
+        """``amount_usd`` expressed in ``currency``, or None when no rate is known."""
+        rate = self.rate(currency, on_date)
+        if not rate:
+            return None
+        return (amount_usd / rate).quantize(Decimal('0.01'))
+
+
+class MonthEnd(Func):
+    """Last day of the month of a date expression."""
+    output_field = DateField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="date(%(expressions)s, 'start of month', '+1 month', '-1 day')",
+                           **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection,
+                           template="(date_trunc('month', %(expressions)s) + interval '1 month - 1 day')::date",
+                           **extra_context)
+
+
+class Divide(Func):
+    """``numerator / denominator`` as decimal division; SQLite would divide two whole numbers as integers."""
+    arg_joiner = ' / '
+    template = '(%(expressions)s)'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, arg_joiner=' * 1.0 / ', **extra_context)
+
+
+def month_end_rate_date(month):
+    """Rate date for a month's totals: its last day, or today while the month is still running."""
+    return Least(MonthEnd(month), Value(date.today()))
+
+
+class RateJoin:
+    """``LEFT JOIN`` of the ``currency`` snapshot in force on ``on_date``, an expression over the parent row.
+
+    An entry of ``Query.alias_map`` like Django's ``Join``. PostgreSQL joins LATERAL onto the
+    latest snapshot on or before the date, found through the (currency, date) unique index.
+    Elsewhere a window function turns the snapshots into (date, next_date) periods and each
+    row joins the period that contains its date. The join stays LEFT, so rows without a
+    snapshot can fall back to the static table.
+    """
+    join_type = LOUTER
+    nullable = True
+    filtered_relation = None
+
+    def __init__(self, currency, parent_alias, on_date, table_alias=None):
+        self.table_name = ExchangeRate._meta.db_table
+        self.currency = currency
+        self.parent_alias = parent_alias
+        self.on_date = on_date
+        self.table_alias = table_alias
+
+    def as_sql(self, compiler, connection):
+        qn = connection.ops.quote_name
+        on_date, params = compiler.compile(self.on_date)
+        alias = compiler.quote_name_unless_alias(self.table_alias)
+        return (
+            f"LEFT OUTER JOIN (SELECT {qn('date')}, {qn('rate_to_usd')}, "
+            f"LEAD({qn('date')}) OVER (ORDER BY {qn('date')}) AS {qn('next_date')} "
+            f"FROM {qn(self.table_name)} WHERE {qn('currency')} = %s) {alias} "
+            f"ON ({alias}.{qn('date')} <= {on_date} "
+            f"AND ({alias}.{qn('next_date')} IS NULL OR {on_date} < {alias}.{qn('next_date')}))",
+            [self.currency, *params, *params],
+        )
+
+    def as_postgresql(self, compiler, connection):
+        qn = connection.ops.quote_name
+        on_date, params = compiler.compile(self.on_date)
+        return (
+            f"LEFT OUTER JOIN LATERAL (SELECT {qn('rate_to_usd')} FROM {qn(self.table_name)} "
+            f"WHERE {qn('currency')} = %s AND {qn('date')} <= {on_date} "
+            f"ORDER BY {qn('date')} DESC LIMIT 1) {compiler.quote_name_unless_alias(self.table_alias)} ON TRUE",
+            [self.currency, *params],
+        )
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(
+            self.currency,
+            change_map.get(self.parent_alias, self.parent_alias),
+            self.on_date.relabeled_clone(change_map),
+            change_map.get(self.table_alias, self.table_alias),
+        )
+
+    @property
+    def identity(self):
+        return self.__class__, self.currency, self.parent_alias, self.on_date
+
+    def __eq__(self, other):
+        if not isinstance(other, RateJoin):
+            return NotImplemented
+        return self.identity == other.identity
+
+    def __hash__(self):
+        return hash(self.identity)
+
+    def promote(self):
+        return self
+
+    def demote(self):
+        return self
+
+
+class RateToUSD(Expression):
+    """The rate of a ``RateJoin`` that resolving the expression adds to the query (NULL without a snapshot)."""
+
+    def __init__(self, currency, on_date):
+        super().__init__(output_field=DecimalField(max_digits=20, decimal_places=10))
+        self.currency = currency
+        self.on_date = on_date
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        on_date = self.on_date.resolve_expression(query, allow_joins, reuse, summarize, for_save)
+        alias = query.join(RateJoin(self.currency, query.get_initial_alias(), on_date))
+        return Col(alias, ExchangeRate._meta.get_field('rate_to_usd'))
+
+
+def rate_to_usd_expression(currency, on_date):
+    """SQL counterpart of ``get_rate_to_usd``: the USD value of one ``currency`` unit on ``on_date``.
+
+    ``on_date`` is an expression over the query the result is used in, e.g. ``F('date')``.
+    The snapshots are joined once for the whole query (see ``RateJoin``) rather than looked
+    up by a subquery per row; the static table is the fallback, as in ``RateTable``.
+    """
+    currency = currency.upper()
+    output_field = DecimalField(max_digits=20, decimal_places=10)
+    if currency == 'USD':
+        return Value(Decimal('1'), output_field=output_field)
+    fallback = currency_to_usd.get(currency)
+    fallback = Decimal(str(fallback)) if fallback is not None else None
+    return Coalesce(RateToUSD(currency, on_date), Value(fallback, output_field=output_field), output_field=output_field)
+
+
+def from_usd_expression(amount_usd, currency, on_date):
+    """SQL counterpart of ``RateTable.from_usd``: ``amount_usd`` in ``currency`` rounded to cents, or NULL.
+
+    Converting a listing or report this way is part of its query: no rows are re-saved and
+    no exchange rate API is called, whatever the display currency.
+    """
+    output_field = DecimalField(max_digits=20, decimal_places=2)
+    if currency.upper() == 'USD':
+        return Round(amount_usd, 2, output_field=output_field)
+    rate = NullIf(rate_to_usd_expression(currency, on_date), Value(Decimal('0')))
+    return Round(Divide(amount_usd, rate, output_field=output_field), 2, output_field=output_field)
+
+
+def cents(amount):
+    """Quantize a converted amount read back from the database (SQLite returns it unrounded)."""
+    return amount.quantize(Decimal('0.01')) if amount is not None else None
+
+
+def fetch_latest_rates():
+    """Fetch today's rates from exchangerate-api as {currency: USD value of one unit}."""
+    api_key = os.getenv('EXCHANGE_RATE_API_KEY')
+    with timed('http'):
+        response = requests.get(
+            EXCHANGE_RATE_API_URL.format(api_key=api_key),
+            timeout=EXCHANGE_RATE_API_TIMEOUT,
+        )
+    response.raise_for_status()
+    data = response.json()
+
+    if data.get('result') == 'error':
+        raise requests.RequestException(f"Exchange rate API error: {data.get('error-type')}")
+
+    rates = {}
+    for currency, units_per_usd in data.get('conversion_rates', {}).items():
+        units_per_usd = Decimal(str(units_per_usd))
+        if units_per_usd:
+            rates[currency] = (Decimal('1') / units_per_usd).quantize(Decimal('1e-10'))
+    return rates
+
+
+def store_rates(rates, snapshot_date=None):
+    """Upsert one snapshot of ``rates`` for ``snapshot_date``, reset the rate cache and register the currencies."""
+    snapshot_date = _as_date(snapshot_date)
+    ExchangeRate.objects.bulk_create(
+        [
+            ExchangeRate(date=snapshot_date, currency=currency, rate_to_usd=rate)
+            for currency, rate in rates.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['currency', 'date'],
+        update_fields=['rate_to_usd'],
+    )
+    rate_cache.clear()
+    bump_data_version()  # Cached reports converted with the previous rates are stale
+    currency_registry.add(rates)
+    return len(rates)
+
+
+def refresh_rates(snapshot_date=None):
+    return store_rates(fetch_latest_rates(), snapshot_date)
@@ -0,0 +1,199 @@
+from django.test import TestCase
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from transactions_app.models import Transaction
+from .models import ExchangeRate
+from .services import (ExchangeRateUnavailable, RateTable, cents, convert_to_usd, from_usd_expression, get_rate_to_usd,
+                       rate_cache, store_rates)
+from .registry import CurrencyRegistry, currency_registry, stored_currency_codes
+from transactions_app.serializers import TransactionSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from django.db.models import F
+from decimal import Decimal
+from datetime import date
+from unittest.mock import patch, MagicMock
+from io import StringIO
+import threading
+import time
+
+
+class ExchangeRateTests(TestCase):
+    def setUp(self):
+        rate_cache.clear()
+        self.user = User.objects.create_user(username="rates_user", password="testpassword")
+        self.category = Category.objects.create(category="Food", user=self.user)
+        self.subcategory = Subcategory.objects.create(subcategory_name="Groceries", category=self.category, user=self.user)
+
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="EUR", rate_to_usd=Decimal("1.05"))
+        ExchangeRate.objects.create(date=date(2025, 2, 1), currency="EUR", rate_to_usd=Decimal("1.10"))
+
+    def tearDown(self):
+        rate_cache.clear()
+
+    def test_uses_latest_snapshot_on_or_before_date(self):
+        self.assertEqual(get_rate_to_usd("EUR", date(2025, 1, 15)), Decimal("1.05"))
+        self.assertEqual(get_rate_to_usd("EUR", date(2025, 3, 1)), Decimal("1.10"))
+
+    def test_falls_back_to_static_table_without_snapshot(self):
+        self.assertEqual(convert_to_usd(Decimal("100"), "GBP", date(2025, 1, 1)), Decimal("122.00"))
+
+    def test_sql_conversion_joins_the_snapshot_periods(self):
+        days = [date(2024, 12, 20), date(2025, 1, 1), date(2025, 1, 31), date(2025, 2, 1), date(2025, 3, 10)]
+        for day in days:
+            Transaction.objects.create(user=self.user, category=self.category, subcategory=self.subcategory,
+                                       amount_currency=Decimal("110.00"), currency="USD", description="Fruit", date=day)
+        rows = Transaction.objects.filter(user=self.user).annotate(
+            eur=from_usd_expression(F('amount_usd'), "EUR", F('date')),
+            gbp=from_usd_expression(F('amount_usd'), "GBP", F('date')),
+        ).order_by('date').values_list('date', 'eur', 'gbp')
+
+        # One join per currency instead of a subquery per row and currency
+        sql = str(rows.query)
+        self.assertEqual(sql.split(' FROM ')[0].count('SELECT'), 1, sql)
+        self.assertRegex(sql, r'LEFT OUTER JOIN (LATERAL )?\(SELECT')
+
+        rates = RateTable()
+        self.assertEqual(
+            [(day, cents(eur), cents(gbp)) for day, eur, gbp in rows],
+            [(day, rates.from_usd(Decimal("110.00"), "EUR", day), rates.from_usd(Decimal("110.00"), "GBP", day))
+             for day in days],
+        )
+        self.assertEqual([cents(eur) for _, eur, _ in rows],
+                         [Decimal("106.80"), Decimal("104.76"), Decimal("104.76"), Decimal("100.00"), Decimal("100.00")])
+
+    def test_unknown_rate_is_an_error(self):
+        with self.assertRaises(ExchangeRateUnavailable):
+            convert_to_usd(Decimal("100"), "XYZ", date(2025, 1, 1))
+        # Before the first EUR snapshot, with no static rate either
+        with self.assertRaises(ExchangeRateUnavailable):
+            convert_to_usd(Decimal("100"), "KWD", date(2025, 1, 1))
+
+    def test_transaction_without_a_rate_is_refused(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        data = {'category': self.category.id, 'subcategory': self.subcategory.id, 'amount_currency': '10.00',
+                'currency': 'KWD', 'description': "Souq", 'date': '2025-01-20'}
+
+        response = client.post('/transactions/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('currency', response.data)
+        self.assertFalse(Transaction.objects.exists())
+
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="KWD", rate_to_usd=Decimal("3.25"))
+        rate_cache.clear()
+        response = client.post('/transactions/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Transaction.objects.get().amount_usd, Decimal("32.50"))
+
+    def test_rate_lookup_is_cached(self):
+        get_rate_to_usd("EUR", date(2025, 1, 15))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_rate_to_usd("EUR", date(2025, 1, 15)), Decimal("1.05"))
+
+    def test_misses_and_static_rates_are_not_cached(self):
+        # Another process (the worker, the cron command) stores the rates, so this one's cache is not cleared
+        self.assertIsNone(get_rate_to_usd("KWD", date(2025, 1, 15)))
+        self.assertEqual(get_rate_to_usd("GBP", date(2025, 1, 15)), Decimal("1.22"))
+        self.assertEqual(get_rate_to_usd("EUR", date.today()), Decimal("1.10"))
+        ExchangeRate.objects.bulk_create([
+            ExchangeRate(date=date(2025, 1, 1), currency="KWD", rate_to_usd=Decimal("3.25")),
+            ExchangeRate(date=date(2025, 1, 1), currency="GBP", rate_to_usd=Decimal("1.25")),
+            ExchangeRate(date=date.today(), currency="EUR", rate_to_usd=Decimal("1.08")),
+        ])
+
+        self.assertEqual(get_rate_to_usd("KWD", date(2025, 1, 15)), Decimal("3.25"))
+        self.assertEqual(get_rate_to_usd("GBP", date(2025, 1, 15)), Decimal("1.25"))
+        self.assertEqual(get_rate_to_usd("EUR", date.today()), Decimal("1.08"))
+
+    @patch('currencies_app.services.requests.get')
+    def test_transaction_save_makes_no_http_call(self, mock_get):
+        transaction = Transaction.objects.create(
+            user=self.user,
+            amount_currency=Decimal('100.00'),
+            category=self.category,
+            subcategory=self.subcategory,
+            description="Dinner",
+            date="2025-01-20",
+            currency="EUR"
+        )
+
+        mock_get.assert_not_called()
+        self.assertEqual(transaction.amount_usd, Decimal("105.00"))
+
+    def test_store_rates_upserts_snapshot_and_resets_cache(self):
+        self.assertEqual(get_rate_to_usd("EUR", date(2025, 2, 1)), Decimal("1.10"))
+
+        store_rates({"EUR": Decimal("1.20")}, date(2025, 2, 1))
+
+        self.assertEqual(ExchangeRate.objects.filter(currency="EUR", date=date(2025, 2, 1)).count(), 1)
+        self.assertEqual(get_rate_to_usd("EUR", date(2025, 2, 1)), Decimal("1.20"))
+
+    @patch('currencies_app.services.requests.get')
+    def test_refresh_command_loads_one_snapshot_per_day(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            'result': 'success',
+            'conversion_rates': {'USD': 1, 'EUR': 0.8, 'JPY': 160},
+        }
+        mock_get.return_value = mock_response
+
+        call_command('refresh_exchange_rates', '--date', '2025-03-01', stdout=StringIO())
+        call_command('refresh_exchange_rates', '--date', '2025-03-01', stdout=StringIO())
+
+        mock_get.assert_called_once()
+        self.assertEqual(ExchangeRate.objects.filter(date=date(2025, 3, 1)).count(), 3)
+        self.assertEqual(get_rate_to_usd("EUR", date(2025, 3, 1)), Decimal("1.25"))
+
+
+class CurrencyRegistryTests(TestCase):
+    def test_seed_codes_are_valid_before_any_refresh(self):
+        loader = MagicMock(return_value=[])
+        registry = CurrencyRegistry(["EUR", "USD"], loader, ttl=60)
+        registry._refresh_in_background = MagicMock()
+
+        self.assertIn("EUR", registry)
+        self.assertNotIn("XYZ", registry)
+        self.assertIsInstance(registry.codes, frozenset)
+        loader.assert_not_called()
+
+    def test_stale_registry_refreshes_in_background(self):
+        release = threading.Event()
+
+        def loader():
+            release.wait(5)
+            return ["sle"]
+
+        registry = CurrencyRegistry(["EUR"], loader, ttl=60)
+        self.assertNotIn("SLE", registry)  # Served from the seed while the reload runs
+        release.set()
+        for _ in range(100):
+            if "SLE" in registry.codes:
+                break
+            time.sleep(0.01)
+        self.assertEqual(registry.codes, frozenset({"EUR", "SLE"}))
+
+    def test_failed_refresh_keeps_known_codes_and_retries_sooner(self):
+        registry = CurrencyRegistry(["EUR"], MagicMock(side_effect=OSError("offline")), ttl=3600, retry=60)
+        self.assertEqual(registry.refresh(), frozenset({"EUR"}))
+        self.assertLess(registry._expires_at, time.monotonic() + 120)
+
+    def test_refresh_reads_stored_snapshots(self):
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="SLE", rate_to_usd=Decimal("0.000044"))
+        registry = CurrencyRegistry(["EUR"], stored_currency_codes)
+        self.assertEqual(registry.refresh(), frozenset({"EUR", "SLE"}))
+
+    def test_stored_rates_are_registered(self):
+        store_rates({"VES": Decimal("0.027")}, date(2025, 1, 1))
+        self.assertIn("VES", currency_registry.codes)
+
+    @patch('currencies_app.registry.CurrencyRegistry._refresh_in_background')
+    @patch('currencies_app.services.requests.get')
+    def test_validate_currency_makes_no_http_call(self, mock_get, mock_refresh):
+        serializer = TransactionSerializer()
+        self.assertEqual(serializer.validate_currency("EUR"), "EUR")
+        with self.assertRaises(ValidationError):
+            serializer.validate_currency("XYZ")
+        mock_get.assert_not_called()
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+from categories_app.models import Category
+from subcategories_app.serializers import SubcategorySerializer
+
+
+class CategoryWithSubcategoriesSerializer(serializers.ModelSerializer):
+    # Reads the prefetched subcategories; the same fields as /subcategories/?category_id=<id>
+    subcategories = SubcategorySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Category
+        fields = ['id', 'category', 'subcategories']
@@ -0,0 +1,29 @@
+from django.db.models import Prefetch
+from budgets_app.models import Budget
+from budgets_app.serializers import BudgetSerializer
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from reports_app.services import build_overview
+from transactions_app.models import RecurringTransaction
+from transactions_app.serializers import RecurringTransactionSerializer
+from .serializers import CategoryWithSubcategoriesSerializer
+
+
+def build_bootstrap(user, currency='USD'):
+    """Everything the frontend loads on start, in a fixed number of queries.
+
+    Two for the categories and their subcategories, one each for the budgets and the
+    recurring series, and the constant set of ``build_overview``. The number of
+    categories, budgets, transactions or scheduled occurrences does not change the query count.
+    """
+    categories = Category.objects.order_by('category').prefetch_related(
+        Prefetch('subcategories', queryset=Subcategory.objects.for_user(user).order_by('subcategory_name'))
+    )
+    budgets = Budget.objects.for_user(user).order_by('start_date', 'id')
+    recurring_transactions = RecurringTransaction.objects.filter(user=user, is_active=True).order_by('id')
+    return {
+        'categories': CategoryWithSubcategoriesSerializer(categories, many=True).data,
+        'budgets': BudgetSerializer(budgets, many=True).data,
+        'recurring_transactions': RecurringTransactionSerializer(recurring_transactions, many=True).data,
+        'overview': build_overview(user, currency),
+    }
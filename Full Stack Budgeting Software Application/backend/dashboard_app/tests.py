@@ -0,0 +1,240 @@
+from unittest import skipUnless
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+from rest_framework import status
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from budgets_app.models import Budget
+from transactions_app.models import Transaction, RecurringTransaction
+from currencies_app.models import ExchangeRate
+from currencies_app.services import rate_cache
+from decimal import Decimal
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from euniceproj.pubsub import RESYNC, broker, events_backend
+
+
+class DashboardBootstrapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="dashboard_user", password="testpassword")
+        self.other_user = User.objects.create_user(username="dashboard_other", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        Subcategory.objects.create(subcategory_name="Restaurants", category=self.food, user=self.user)
+        self.recurring = Category.objects.create(category="Recurring", user=self.user)
+        self.rent = Subcategory.objects.create(subcategory_name="Rent", category=self.recurring, user=self.user)
+
+        Budget.objects.create(name="January Budget", total_limit=Decimal('5000.00'),
+                              start_date="2025-01-01", end_date="2025-01-31", user=self.user)
+        Budget.objects.create(name="Someone else's", start_date="2025-01-01", end_date="2025-01-31",
+                              user=self.other_user)
+        RecurringTransaction.objects.create(
+            user=self.user, category=self.recurring, subcategory=self.rent, amount_currency=Decimal('2000.00'),
+            currency="USD", description="Rent", start_date=date(2025, 1, 1), end_date=date(2025, 3, 31),
+            frequency='monthly', day_of_month=1, materialized_through=date(2025, 3, 31),
+        )
+        # 360 scheduled occurrences, all converted from the same loaded EUR snapshots
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="EUR", rate_to_usd=Decimal('1.10'))
+        start_date = (date.today() + relativedelta(months=1)).replace(day=1)
+        RecurringTransaction.objects.create(
+            user=self.user, category=self.recurring, subcategory=self.rent, amount_currency=Decimal('900.00'),
+            currency="EUR", description="Parking", start_date=start_date,
+            end_date=start_date + relativedelta(years=30, days=-1), frequency='monthly', day_of_month=1,
+        )
+        rate_cache.clear()
+        self.create_transaction('100.00', "2025-01-05")
+
+    def create_transaction(self, amount, on_date):
+        return Transaction.objects.create(user=self.user, category=self.food, subcategory=self.groceries,
+                                          amount_currency=Decimal(amount), currency="USD",
+                                          description="Groceries", date=on_date)
+
+    def test_bootstrap_combines_the_start_up_requests(self):
+        response = self.client.get('/dashboard/bootstrap/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        categories = {category['category']: category for category in response.data['categories']}
+        self.assertEqual(
+            [subcategory['subcategory_name'] for subcategory in categories['Food']['subcategories']],
+            ['Groceries', 'Restaurants'],
+        )
+        self.assertEqual(categories['Food']['subcategories'][0]['category'], self.food.id)
+        self.assertEqual([budget['name'] for budget in response.data['budgets']], ["January Budget"])
+        self.assertEqual([series['description'] for series in response.data['recurring_transactions']],
+                         ["Rent", "Parking"])
+        self.assertEqual(response.data['overview'], self.client.get('/reports/overview-data/').data)
+
+    def test_query_count_is_constant(self):
+        with self.assertNumQueries(9):
+            self.client.get('/dashboard/bootstrap/')
+
+        cache.clear()
+        rate_cache.clear()
+        for index in range(10):
+            category = Category.objects.create(category=f"Category {index}", user=self.user)
+            Subcategory.objects.create(subcategory_name="Other", category=category, user=self.user)
+            Budget.objects.create(name=f"Budget {index}", start_date="2025-02-01", end_date="2025-02-28",
+                                  user=self.user)
+            self.create_transaction('1.00', f"2025-02-{index + 1:02d}")
+        with self.assertNumQueries(9):
+            response = self.client.get('/dashboard/bootstrap/')
+        self.assertEqual(len(response.data['categories']), 12)
+
+    def test_cached_until_the_users_data_changes(self):
+        etag = self.client.get('/dashboard/bootstrap/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/dashboard/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.create_transaction('5.00', "2025-01-06")
+        response = self.client.get('/dashboard/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['overview']['monthly_data']['2025-01']['Food'], Decimal('105.00'))
+
+    def test_invalid_currency(self):
+        response = self.client.get('/dashboard/bootstrap/', {'currency': 'XXX'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def collect_events(user, action, timeout=0.2):
+    """Run ``action`` while subscribed to ``user``'s events; returns the events it caused."""
+    async def run():
+        subscription = broker.subscribe(user.id)
+        try:
+            await sync_to_async(action)()
+            events = []
+            while (message := await subscription.get(timeout)) is not None:
+                events.append(message)
+            return events
+        finally:
+            broker.unsubscribe(subscription)
+    return async_to_sync(run)()
+
+
+@override_settings(EVENTS_BACKEND='local')
+class DashboardEventsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="events_user", password="testpassword")
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+
+    def committed(self, action):
+        def run():
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        return collect_events(self.user, run)
+
+    def add(self, amount, user=None):
+        return Transaction.objects.create(user=user or self.user, category=self.food, subcategory=self.groceries,
+                                          amount_currency=Decimal(amount), currency="USD",
+                                          description="Groceries", date="2025-01-05")
+
+    def delta(self, amount, count):
+        return ('rollup', {'month': '2025-01', 'category_id': self.food.id, 'subcategory_id': self.groceries.id,
+                           'amount_usd': amount, 'count': count})
+
+    def test_transaction_changes_are_published_as_deltas(self):
+        self.assertEqual(self.committed(lambda: self.add('100.00')), [self.delta('100.00', 1)])
+
+        transaction_obj = Transaction.objects.get(user=self.user)
+        transaction_obj.amount_currency = Decimal('150.00')
+        self.assertEqual(self.committed(transaction_obj.save), [self.delta('-100.00', -1), self.delta('150.00', 1)])
+        self.assertEqual(self.committed(transaction_obj.delete), [self.delta('-150.00', -1)])
+
+    def test_rolled_back_and_other_users_changes_are_not_published(self):
+        other = User.objects.create_user(username="events_other", password="testpassword")
+
+        def rolled_back():
+            try:
+                with transaction.atomic():
+                    self.add('10.00')
+                    raise ValueError
+            except ValueError:
+                pass
+            self.add('5.00', user=other)
+
+        self.assertEqual(self.committed(rolled_back), [])
+
+    def test_budget_changes_are_published(self):
+        events = self.committed(lambda: Budget.objects.create(
+            name="January", total_limit=Decimal('800.00'), start_date="2025-01-01", end_date="2025-01-31",
+            user=self.user,
+        ))
+        self.assertEqual(events, [('budget', {'id': Budget.objects.get().id, 'month': '2025-01',
+                                              'total_limit': '800.00', 'deleted': False})])
+
+    def test_a_client_too_far_behind_gets_a_resync(self):
+        async def run():
+            subscription = broker.subscribe(self.user.id, max_pending=2)
+            try:
+                for index in range(3):
+                    broker.dispatch(self.user.id, 'rollup', {'index': index})
+                return await subscription.get(timeout=1), await subscription.get(timeout=0.1)
+            finally:
+                broker.unsubscribe(subscription)
+
+        self.assertEqual(async_to_sync(run)(), ((RESYNC, {}), None))
+
+    async def test_stream_sends_the_users_deltas(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/dashboard/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertIn(b"event: ready\n", await anext(stream))
+            broker.dispatch(self.user.id, 'rollup', {'month': '2025-01', 'amount_usd': '12.50'})
+            self.assertEqual(await anext(stream),
+                             b'event: rollup\ndata: {"month":"2025-01","amount_usd":"12.50"}\n\n')
+        finally:
+            await stream.aclose()
+
+    async def test_stream_in_another_currency_resyncs_instead_of_usd_deltas(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/dashboard/events/', {'currency': 'eur'})
+
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertIn(b"event: ready\n", await anext(stream))
+            broker.dispatch(self.user.id, 'rollup', {'month': '2025-01', 'amount_usd': '12.50'})
+            self.assertEqual(await anext(stream), b'event: resync\ndata: {}\n\n')
+            broker.dispatch(self.user.id, 'budget', {'id': 1, 'month': '2025-01'})
+            self.assertEqual(await anext(stream), b'event: budget\ndata: {"id":1,"month":"2025-01"}\n\n')
+        finally:
+            await stream.aclose()
+
+        response = await self.async_client.get('/dashboard/events/', {'currency': 'XYZ'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get('/dashboard/events/')
+        self.assertEqual(response.status_code, 401)
+
+
+@skipUnless(connection.vendor == 'postgresql', "LISTEN/NOTIFY needs PostgreSQL")
+@override_settings(EVENTS_BACKEND='postgres')
+class PostgresEventsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="notify_user", password="testpassword")
+        self.addCleanup(events_backend().stop)
+        events_backend().start()
+
+    def test_events_travel_through_notify(self):
+        food = Category.objects.create(category="Food", user=self.user)
+        groceries = Subcategory.objects.create(subcategory_name="Groceries", category=food, user=self.user)
+
+        events = collect_events(self.user, lambda: Transaction.objects.create(
+            user=self.user, category=food, subcategory=groceries, amount_currency=Decimal('20.00'),
+            currency="USD", description="Market", date="2025-02-10",
+        ), timeout=2)
+
+        self.assertEqual(events, [('rollup', {'month': '2025-02', 'category_id': food.id,
+                                              'subcategory_id': groceries.id, 'amount_usd': '20.00', 'count': 1})])
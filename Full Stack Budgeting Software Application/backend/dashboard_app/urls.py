@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import DashboardBootstrapView, DashboardEventsView
+
+urlpatterns = [
+    path('bootstrap/', DashboardBootstrapView.as_view(), name='dashboard-bootstrap'),
+    path('events/', DashboardEventsView.as_view(), name='dashboard-events'),
+]
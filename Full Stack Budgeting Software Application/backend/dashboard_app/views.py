@@ -0,0 +1,69 @@
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from accounts.authentication import CachedJWTAuthentication
+from euniceproj.response_cache import cached_response
+from euniceproj.pubsub import RESYNC, broker, events_backend
+from euniceproj.views import AsyncAPIView
+from reports_app.exports import parse_currency
+from .services import build_bootstrap
+
+
+class DashboardBootstrapView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @cached_response
+    def get(self, request):
+        # One round trip instead of /categories/, /subcategories/ per category, /budgets/,
+        # /transactions/recurring-transactions/ and /reports/overview-data/
+        # Cached until the user's or the shared data version changes
+        currency = parse_currency(request.query_params.get('currency', 'USD'))
+        return Response(build_bootstrap(request.user, currency))
+
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(subscription, currency='USD'):
+    try:
+        # Reload the overview on "ready" (also after a reconnect) and on "resync"; apply the deltas in between
+        yield "retry: 5000\n\n" + sse_message('ready', {})
+        while True:
+            message = await subscription.get(timeout=settings.EVENTS_HEARTBEAT)
+            if message is None:
+                # A comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            event, data = message
+            if event == 'rollup' and currency != 'USD':
+                # Deltas are in USD and other currencies convert each month at its month-end rate,
+                # which the client does not have: reload instead
+                event, data = RESYNC, {}
+            yield sse_message(event, data)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+class DashboardEventsView(AsyncAPIView):
+    async def get(self, request):
+        # text/event-stream of "rollup" deltas (month, category, subcategory, amount_usd, count) and
+        # "budget" changes for the signed-in user; needs the ASGI server (uvicorn).
+        # With ?currency= other than USD (as the overview was loaded), "rollup" deltas become "resync"
+        try:
+            currency = parse_currency(request.GET.get('currency', 'USD'))
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=400)
+        await sync_to_async(events_backend().start, thread_sensitive=False)()
+        subscription = broker.subscribe(request.user.id)
+        response = StreamingHttpResponse(event_stream(subscription, currency), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+        return response
@@ -0,0 +1,171 @@
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Latency buckets in milliseconds: 0.5ms growing by 25% per bucket, up to about 4 minutes
+BUCKETS = tuple(0.5 * 1.25 ** i for i in range(60))
+
+COMPONENTS = ('db', 'serialize', 'http')
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Time (seconds) and query count collected while one request is handled."""
+    __slots__ = ('queries', 'db', 'serialize', 'http')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.http = 0.0
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_timings():
+    return _current.get()
+
+
+@contextmanager
+def timed(component):
+    """Add the time spent in the block to ``component`` of the current request, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, component, getattr(timings, component) + time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook counting and timing every query of the request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db += time.perf_counter() - started
+
+
+def install_query_timer(connection, **kwargs):
+    """Attach ``record_query`` to ``connection`` once; also a ``connection_created`` receiver.
+
+    Connections are per thread, and under ASGI a request's queries run in a worker
+    thread, so the wrapper stays on the connection rather than being scoped to one request.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are reported as the upper bound of their bucket."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return round(min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max, 3)
+        return round(self.max, 3)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'max': round(self.max, 3),
+        }
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.latency = {'total': Histogram(), **{component: Histogram() for component in COMPONENTS}}
+
+
+class MetricsRegistry:
+    """In-process aggregate of request timings per endpoint, reported in milliseconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(EndpointMetrics)
+
+    def record(self, endpoint, status_code, timings, total):
+        with self._lock:
+            metrics = self._endpoints[endpoint]
+            metrics.requests += 1
+            metrics.errors += status_code >= 500
+            metrics.queries += timings.queries
+            metrics.max_queries = max(metrics.max_queries, timings.queries)
+            metrics.latency['total'].observe(total * 1000)
+            for component in COMPONENTS:
+                metrics.latency[component].observe(getattr(timings, component) * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': metrics.requests,
+                    'errors': metrics.errors,
+                    'queries': {
+                        'mean': round(metrics.queries / metrics.requests, 2),
+                        'max': metrics.max_queries,
+                    },
+                    'latency_ms': {name: histogram.summary() for name, histogram in metrics.latency.items()},
+                }
+                for endpoint, metrics in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+metrics = MetricsRegistry()
+
+
+def server_timing(timings, total):
+    """``Server-Timing`` header value for one request."""
+    return (
+        f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries", '
+        f'serialize;dur={timings.serialize * 1000:.1f}, '
+        f'http;dur={timings.http * 1000:.1f}, '
+        f'total;dur={total * 1000:.1f}'
+    )
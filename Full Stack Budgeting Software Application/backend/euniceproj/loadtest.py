@@ -0,0 +1,158 @@
+import math
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+# (name, path template); templates may use {category_id} and {as_of}
+ENDPOINTS = [
+    ('transactions', '/transactions/'),
+    ('transactions by category', '/transactions/?category={category_id}'),
+    ('recurring transactions', '/transactions/recurring-transactions/'),
+    ('overview', '/reports/overview-data/'),
+    ('dashboard bootstrap', '/dashboard/bootstrap/'),
+    ('budget utilization', '/budgets/utilization/?as_of={as_of}'),
+    ('categories', '/categories/'),
+    ('subcategories', '/subcategories/'),
+]
+
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+class InProcessTransport:
+    """Sends requests through Django's full handler and middleware stack, without a server."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, path, token):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        response = client.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+
+class HTTPTransport:
+    """Sends requests to a running server, e.g. uvicorn serving euniceproj.asgi."""
+
+    def __init__(self, base_url):
+        import httpx
+        self._httpx = httpx
+        self.base_url = base_url
+        self._local = threading.local()
+
+    def get(self, path, token):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._httpx.Client(base_url=self.base_url, timeout=60)
+        response = client.get(path, headers={'Authorization': f'Bearer {token}'})
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+
+class LoadTest:
+    """Replay a seeded request plan against the URL routes and report per-endpoint metrics.
+
+    Each endpoint gets ``requests`` GETs spread over ``users`` and sent by ``concurrency``
+    threads. The report has throughput, exact p50/p95/p99/max latency in milliseconds and
+    the query counts read from the ``Server-Timing`` header.
+    """
+
+    def __init__(self, users, categories, requests=100, concurrency=1, seed=0, as_of=None,
+                 endpoints=ENDPOINTS, transport=None, warmup=3):
+        self.users = list(users)
+        self.categories = list(categories)
+        self.requests = requests
+        self.concurrency = concurrency
+        self.seed = seed
+        self.as_of = as_of or date.today()
+        self.endpoints = endpoints
+        self.transport = transport or InProcessTransport()
+        self.warmup = warmup
+
+    def plan(self, template):
+        rng = random.Random(f"{self.seed}:{template}")
+        return [
+            (rng.choice(self.users), template.format(
+                category_id=rng.choice(self.categories) if self.categories else 0,
+                as_of=self.as_of.isoformat(),
+            ))
+            for _ in range(self.requests)
+        ]
+
+    def send(self, user, path):
+        token = str(AccessToken.for_user(user))
+        started = time.perf_counter()
+        status_code, timing = self.transport.get(path, token)
+        elapsed = (time.perf_counter() - started) * 1000
+        match = QUERY_COUNT.search(timing)
+        return status_code, elapsed, int(match.group(1)) if match else None
+
+    def run_endpoint(self, name, template):
+        plan = self.plan(template)
+        for user, path in plan[:self.warmup]:
+            self.send(user, path)
+
+        started = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = list(executor.map(lambda request: self.send(*request), plan))
+        else:
+            results = [self.send(user, path) for user, path in plan]
+        wall = time.perf_counter() - started
+
+        latencies = sorted(elapsed for _, elapsed, _ in results)
+        queries = [count for _, _, count in results if count is not None]
+        return {
+            'path': template,
+            'requests': len(results),
+            'errors': sum(status_code >= 400 for status_code, _, _ in results),
+            'throughput_rps': round(len(results) / wall, 1) if wall else None,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 0.50), 2),
+                'p95': round(percentile(latencies, 0.95), 2),
+                'p99': round(percentile(latencies, 0.99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries': {'min': min(queries), 'max': max(queries)} if queries else None,
+        }
+
+    def run(self):
+        return {name: self.run_endpoint(name, template) for name, template in self.endpoints}
+
+
+def compare(report, baseline, latency_tolerance=0.5):
+    """Regressions of ``report`` against a saved ``baseline`` report, as readable strings.
+
+    Any increase in the most queries an endpoint ran is a regression: on seeded data it
+    points at an N+1 pattern or a lost prefetch. Latency only counts once p95 grows by
+    more than ``latency_tolerance`` (50% by default), since timings are noisy.
+    """
+    regressions = []
+    for name, result in report.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['errors'] > previous['errors']:
+            regressions.append(f"{name}: {result['errors']} errors (baseline {previous['errors']})")
+        if result['queries'] and previous['queries'] and result['queries']['max'] > previous['queries']['max']:
+            regressions.append(
+                f"{name}: up to {result['queries']['max']} queries per request "
+                f"(baseline {previous['queries']['max']})"
+            )
+        p95, previous_p95 = result['latency_ms']['p95'], previous['latency_ms']['p95']
+        if p95 > previous_p95 * (1 + latency_tolerance):
+            regressions.append(f"{name}: p95 {p95}ms (baseline {previous_p95}ms)")
+    return regressions
@@ -1,13 +1,98 @@
-class CorsMiddleware:
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.deprecation import MiddlewareMixin
+from .instrumentation import (
+    metrics, install_query_timer, server_timing, start_request, end_request, current_timings,
+)
 
-    def __init__(self, get_response):
-        self.get_response = get_response
+request_logger = logging.getLogger('euniceproj.requests')
 
-    def __call__(self, request):
-        response = self.get_response(request)
+
+class CorsMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
         response['Access-Control-Allow-Origin'] = "*"
         response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
         response["Access-Control-Allow-Methods"] = "DELETE, POST, GET, OPTIONS"
         if request.method == "OPTIONS":
             response.status_code = 200
-        return response
\ No newline at end of file
+        return response
+
+
+class InstrumentationMiddleware:
+    """Per-request query count, DB/serializer/outbound HTTP time, Server-Timing header and log line.
+
+    Timings are aggregated into ``instrumentation.metrics`` and served at /metrics.
+    Disable with INSTRUMENTATION_ENABLED=False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(install_query_timer, dispatch_uid='euniceproj.install_query_timer')
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, total):
+        match = getattr(request, 'resolver_match', None)
+        endpoint = f"{request.method} /{match.route}" if match else f"{request.method} <unmatched>"
+        metrics.record(endpoint, response.status_code, timings, total)
+
+        response['Server-Timing'] = server_timing(timings, total)
+        request_logger.info(json.dumps({
+            'endpoint': endpoint,
+            'path': request.path,
+            'status': response.status_code,
+            'user': getattr(getattr(request, 'user', None), 'id', None),
+            'queries': timings.queries,
+            'db_ms': round(timings.db * 1000, 2),
+            'serialize_ms': round(timings.serialize * 1000, 2),
+            'http_ms': round(timings.http * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF renders the response body (serializer output -> bytes) right after this hook
+        timings = current_timings()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timings.serialize += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
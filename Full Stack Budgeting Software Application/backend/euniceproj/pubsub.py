@@ -0,0 +1,202 @@
+"""Per-user event fan-out to the streaming endpoints (``/dashboard/events/``).
+
+Writers call ``publish(user_id, event, data)``; the event is sent once the surrounding
+transaction commits, so subscribers never see a change that was rolled back. Each
+process keeps its subscribers in ``broker``; the backend decides how an event reaches
+the brokers of every process:
+
+- ``local``: straight to this process's broker (one server process, SQLite in tests).
+- ``postgres``: ``pg_notify`` on one channel, and a listener thread per process that
+  ``LISTEN``s on a dedicated connection and hands each notification to its broker.
+
+``EVENTS_BACKEND=auto`` (the default) picks ``postgres`` on PostgreSQL.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'user_events'
+RESYNC = 'resync'  # Sent when a subscriber may have missed events: reload the full data
+
+
+class Subscription:
+    """One connected client: a bounded queue on the event loop that serves it."""
+
+    def __init__(self, user_id, max_pending):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_pending)
+
+    def deliver(self, event, data):
+        # Called from any thread; the queue is only touched on its own loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, event, data)
+        except RuntimeError:
+            pass  # The loop is gone; the subscription is about to be dropped
+
+    def _put(self, event, data):
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            # A client this far behind gets one resync instead of an unbounded backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((RESYNC, {}))
+
+    async def get(self, timeout):
+        """The next ``(event, data)``, or ``None`` after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker:
+    """The subscriptions of this process, by user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id, max_pending=None):
+        subscription = Subscription(user_id, max_pending or settings.EVENTS_MAX_PENDING)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscriptions.get(user_id, ()))
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def dispatch(self, user_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event, data)
+
+    def broadcast(self, event, data):
+        with self._lock:
+            subscriptions = [subscription for group in self._subscriptions.values() for subscription in group]
+        for subscription in subscriptions:
+            subscription.deliver(event, data)
+
+
+broker = Broker()
+
+
+def encode(user_id, event, data):
+    return json.dumps({'user': user_id, 'event': event, 'data': data}, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+class LocalBackend:
+    """Events only reach subscribers connected to this process."""
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def send(self, user_id, event, data):
+        # The same JSON round trip as through PostgreSQL, so subscribers get identical payloads
+        message = json.loads(encode(user_id, event, data))
+        broker.dispatch(user_id, event, message['data'])
+
+
+class PostgresBackend:
+    """Events go through ``NOTIFY``, so subscribers connected to any server process get them."""
+
+    def __init__(self, poll_interval=1.0):
+        self.poll_interval = poll_interval
+        self.listening = threading.Event()
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, timeout=5.0):
+        """Start this process's listener thread, once; waits until it is listening."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self.stopping.clear()
+                self._thread = threading.Thread(target=self.listen, name='events-listener', daemon=True)
+                self._thread.start()
+        self.listening.wait(timeout)
+
+    def stop(self):
+        """Stop the listener thread and close its connection, e.g. before the database is dropped."""
+        self.stopping.set()
+        with self._lock:
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+        self.listening.clear()
+
+    def send(self, user_id, event, data):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, encode(user_id, event, data)])
+
+    def listen(self):
+        reconnecting = False
+        while not self.stopping.is_set():
+            # A connection of its own: LISTEN needs one that is never handed to a request
+            wrapper = connections.create_connection(DEFAULT_DB_ALIAS)
+            try:
+                wrapper.ensure_connection()
+                raw = wrapper.connection
+                raw.execute(f'LISTEN {CHANNEL}')
+                self.listening.set()
+                if reconnecting:
+                    # Notifications sent while disconnected are lost
+                    broker.broadcast(RESYNC, {})
+                while not self.stopping.is_set():
+                    for notification in raw.notifies(timeout=self.poll_interval):
+                        self.dispatch(notification.payload)
+            except (DatabaseError, wrapper.Database.Error):
+                logger.warning("Event listener lost its database connection; reconnecting", exc_info=True)
+                self.listening.clear()
+                reconnecting = True
+                self.stopping.wait(self.poll_interval)
+            finally:
+                wrapper.close()
+
+    def dispatch(self, payload):
+        try:
+            message = json.loads(payload)
+            broker.dispatch(message['user'], message['event'], message['data'])
+        except (ValueError, KeyError):
+            logger.warning("Ignoring malformed event %r", payload)
+
+
+_backends = {}
+
+
+def events_backend():
+    name = settings.EVENTS_BACKEND
+    if name == 'auto':
+        name = 'postgres' if connection.vendor == 'postgresql' else 'local'
+    if name not in _backends:
+        _backends[name] = PostgresBackend() if name == 'postgres' else LocalBackend()
+    return _backends[name]
+
+
+def publish(user_id, event, data):
+    """Send ``event`` to ``user_id``'s subscribers once the current transaction commits."""
+    backend = events_backend()
+    # robust: a failed notification is logged and never fails the write that caused it
+    transaction.on_commit(lambda: backend.send(user_id, event, data), robust=True)
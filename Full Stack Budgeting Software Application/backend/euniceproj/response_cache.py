@@ -0,0 +1,117 @@
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+SHARED = 'shared'  # Scope for data every user sees, e.g. the category list
+
+
+def version_key(user_id):
+    return f'data-version:{SHARED if user_id is None else user_id}'
+
+
+def data_version(user_id=None):
+    """Current version of ``user_id``'s data (or of the shared data)."""
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a counter lost to eviction never reuses an old version
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_data_version(user_id=None):
+    """Invalidate every cached response built from ``user_id``'s data (``None``: shared data).
+
+    Bumps now and again after the surrounding transaction commits, so a response
+    rendered from not-yet-committed state cannot outlive the write.
+    """
+    key = version_key(user_id)
+    _bump(key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(key))
+
+
+def response_etag(data, media_format):
+    payload = json.dumps(data, cls=JSONEncoder, separators=(',', ':')).encode()
+    return '"%s"' % hashlib.sha256(media_format.encode() + b':' + payload).hexdigest()
+
+
+def cached_response(get):
+    """Cache a read-only ``APIView.get`` per user and per data version, with a strong ETag.
+
+    A request whose ``If-None-Match`` matches the current ETag gets ``304 Not Modified``.
+    """
+    @functools.wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        media_format = request.accepted_renderer.format
+        user_id = request.user.id
+        path_hash = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+        key = (
+            f'response:{user_id}:{data_version(user_id)}:{data_version()}:'
+            f'{media_format}:{path_hash}'
+        )
+
+        cached = cache.get(key)
+        if cached is None:
+            response = get(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK or not isinstance(response, Response):
+                return response
+            etag = response_etag(response.data, media_format)
+            cache.set(key, (etag, response.data), timeout=settings.RESPONSE_CACHE_TIMEOUT)
+        else:
+            etag, data = cached
+            response = Response(data)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        # Always revalidate; the payload depends on who is asking
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    return wrapper
+
+
+def _owner_id(instance):
+    return getattr(instance, 'user_id', None)
+
+
+@receiver(post_save, sender='categories_app.Category')
+@receiver(post_delete, sender='categories_app.Category')
+def invalidate_shared_data(sender, instance, **kwargs):
+    # The category list is shared by all users
+    bump_data_version()
+    bump_data_version(_owner_id(instance))
+
+
+@receiver(post_save, sender='subcategories_app.Subcategory')
+@receiver(post_delete, sender='subcategories_app.Subcategory')
+@receiver(post_save, sender='budgets_app.Budget')
+@receiver(post_delete, sender='budgets_app.Budget')
+@receiver(post_save, sender='transactions_app.Transaction')
+@receiver(post_delete, sender='transactions_app.Transaction')
+@receiver(post_save, sender='transactions_app.RecurringTransaction')
+@receiver(post_delete, sender='transactions_app.RecurringTransaction')
+def invalidate_user_data(sender, instance, **kwargs):
+    bump_data_version(_owner_id(instance))
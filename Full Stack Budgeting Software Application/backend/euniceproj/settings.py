@@ -14,6 +14,7 @@ SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
 DEBUG = os.getenv("DEBUG", "False") == "True"
 
 WOLFRAM_APP_ID = os.getenv("WOLFRAM_APP_ID")
+WOLFRAM_CACHE_TTL = int(os.getenv("WOLFRAM_CACHE_TTL", 3600))  # seconds a Wolfram|Alpha result is reused
 
 ALLOWED_HOSTS = ['*', 'localhost', '127.0.0.1', 'db', 'backend_container', 'frontend_container', 'postgres_container', '0.0.0.0']
 
@@ -23,7 +24,7 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         # 'rest_framework.authentication.TokenAuthentication', 
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication', 
         
 
@@ -56,6 +57,10 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
+# Per-process cache of the users behind JWTs (accounts.authentication)
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", 60))  # seconds another process may serve a changed user
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", 10000))
+
 # Application definition
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -73,6 +78,9 @@ INSTALLED_APPS = [
     "subcategories_app",
     "wolfram",
     "reports_app",
+    "dashboard_app",
+    "currencies_app",
+    "jobs_app",
     "rest_framework",
     'rest_framework.authtoken',
     'rest_framework_simplejwt',
@@ -85,6 +93,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "euniceproj.middleware.InstrumentationMiddleware",
     'corsheaders.middleware.CorsMiddleware',
     "euniceproj.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
@@ -160,6 +169,41 @@ DATABASES = {
     }
 }
 
+# Per-user response cache (euniceproj.response_cache): in-process by default, Redis when REDIS_URL is set
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "euniceproj",
+        }
+    }
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))  # seconds
+
+# Request instrumentation (euniceproj.middleware.InstrumentationMiddleware) and the /metrics endpoint
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "True") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # Optional; staff users can always read /metrics
+
+# Background jobs (jobs_app), run by "python manage.py runworker"
+JOBS_WORKER_CONCURRENCY = int(os.getenv("JOBS_WORKER_CONCURRENCY", 4))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", 1.0))  # seconds
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", 5))
+JOBS_RETRY_BACKOFF = float(os.getenv("JOBS_RETRY_BACKOFF", 2.0))  # seconds before the first retry; doubles each time
+JOBS_RETRY_BACKOFF_MAX = float(os.getenv("JOBS_RETRY_BACKOFF_MAX", 600.0))  # seconds
+JOBS_LEASE_TIMEOUT = int(os.getenv("JOBS_LEASE_TIMEOUT", 600))  # seconds before a running job counts as abandoned
+
+# Live dashboard deltas (euniceproj.pubsub) streamed by /dashboard/events/
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "auto")  # auto, local or postgres (LISTEN/NOTIFY across processes)
+EVENTS_MAX_PENDING = int(os.getenv("EVENTS_MAX_PENDING", 1000))  # per client; a client further behind gets a resync
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", 15.0))  # seconds between keep-alive comments
+
 # For AWS
 # DATABASES = {
 #     "default": {
@@ -227,6 +271,18 @@ LOGGING = {
         'level': 'INFO',
     },
     'loggers': {
+        # httpx logs every request URL at INFO, and Wolfram|Alpha URLs carry the app id
+        'httpx': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        # One JSON line per request from InstrumentationMiddleware
+        'euniceproj.requests': {
+            'handlers': ['console'],
+            'level': os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+            'propagate': False,
+        },
         'reports_app': {
             'handlers': ['console'],
             'level': 'INFO',
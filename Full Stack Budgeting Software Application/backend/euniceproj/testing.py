@@ -0,0 +1,31 @@
+from django.db import connection, transaction
+
+
+class QueryPlanAssertions:
+    """``TestCase`` mixin asserting how the database plans a queryset.
+
+    Test tables hold a handful of rows, where a sequential scan is always cheapest, so
+    on PostgreSQL sequential scans are disabled for the EXPLAIN: the planner then uses
+    an index if one serves the query. SQLite picks indexes by rule, not by cost, and
+    names the indexes of unique constraints itself, so ``index_name`` is only checked
+    on PostgreSQL.
+    """
+
+    def query_plan(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = self.query_plan(queryset)
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            self.assertNotIn(f"Seq Scan on {table}", plan, plan)
+            self.assertRegex(plan, r'Index (Only )?Scan|Bitmap Index Scan', plan)
+            if index_name is not None:
+                self.assertIn(index_name, plan, plan)
+        else:
+            self.assertIn(f"SEARCH {table} USING", plan, plan)
+        return plan
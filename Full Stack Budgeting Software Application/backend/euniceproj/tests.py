@@ -0,0 +1,163 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework import status
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from transactions_app.models import Transaction
+from transactions_app.synthetic import SyntheticDataGenerator
+from reports_app.models import MonthlyCategoryRollup
+from .response_cache import data_version
+from .instrumentation import Histogram, metrics
+from .loadtest import LoadTest, compare
+from decimal import Decimal
+from datetime import date
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cache_user", password="testpassword")
+        self.other_user = User.objects.create_user(username="cache_other", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        self.create_transaction('10.00', self.user)
+
+    def create_transaction(self, amount, user):
+        return Transaction.objects.create(user=user, category=self.food, subcategory=self.groceries,
+                                          amount_currency=Decimal(amount), currency="USD",
+                                          description="Lunch", date="2025-01-05")
+
+    def test_repeat_request_is_served_from_cache_and_revalidates(self):
+        first = self.client.get('/reports/overview-data/')
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/reports/overview-data/')
+        self.assertEqual(second['ETag'], etag)
+        self.assertEqual(second.json(), first.json())
+
+        not_modified = self.client.get('/reports/overview-data/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b'')
+
+    def test_writes_invalidate_only_their_owner(self):
+        etag = self.client.get('/reports/overview-data/')['ETag']
+
+        self.create_transaction('5.00', self.other_user)
+        response = self.client.get('/reports/overview-data/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.create_transaction('5.00', self.user)
+        response = self.client.get('/reports/overview-data/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['monthly_data']['2025-01']['Food'], 15.0)
+
+    def test_shared_lists_are_invalidated_by_any_user(self):
+        etag = self.client.get('/categories/')['ETag']
+
+        Category.objects.create(category="Travel", user=self.other_user)
+        response = self.client.get('/categories/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Travel", [category['category'] for category in response.json()])
+
+    def test_bulk_writes_bump_the_version(self):
+        version = data_version(self.user.id)
+        MonthlyCategoryRollup.objects.add_transactions([
+            Transaction(user=self.user, category=self.food, subcategory=self.groceries,
+                        amount_usd=Decimal('1.00'), date=date(2025, 2, 1))
+        ])
+        self.assertNotEqual(data_version(self.user.id), version)
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.user = User.objects.create_user(username="metrics_user", password="testpassword")
+        self.admin = User.objects.create_user(username="metrics_admin", password="testpassword", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_response_carries_server_timing(self):
+        response = self.client.get('/reports/overview-data/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="[1-9]\d* queries", serialize;dur=[\d.]+, '
+                                 r'http;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_metrics_aggregate_per_route(self):
+        for _ in range(3):
+            self.client.get('/reports/overview-data/')
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        overview = response.json()['GET /reports/overview-data/']
+        self.assertEqual(overview['requests'], 3)
+        self.assertEqual(overview['errors'], 0)
+        self.assertGreater(overview['queries']['max'], 0)
+        self.assertEqual(set(overview['latency_ms']), {'total', 'db', 'serialize', 'http'})
+        self.assertEqual(overview['latency_ms']['total']['count'], 3)
+        for key in ('p50', 'p95', 'p99'):
+            self.assertIsNotNone(overview['latency_ms']['total'][key])
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_require_staff_or_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+
+        scraper = APIClient()
+        self.assertIn(scraper.get('/metrics', HTTP_X_METRICS_TOKEN='wrong').status_code,
+                      (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertEqual(scraper.get('/metrics', HTTP_X_METRICS_TOKEN='scrape-secret').status_code,
+                         status.HTTP_200_OK)
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.observe(float(value))
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max'], 100.0)
+        # Percentiles are bucket upper bounds: never below the true value, at most 25% above it
+        for key, exact in (('p50', 50), ('p95', 95), ('p99', 99)):
+            self.assertGreaterEqual(summary[key], exact)
+            self.assertLessEqual(summary[key], exact * 1.25)
+        self.assertIsNone(Histogram().percentile(0.5))
+
+
+class LoadTestHarnessTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SyntheticDataGenerator(users=2, years=1, transactions_per_month=10, seed=3, prefix='load',
+                               end=date(2025, 6, 30)).run()
+        self.users = User.objects.filter(username__startswith='load')
+
+    def test_reports_throughput_latency_and_queries_per_endpoint(self):
+        load_test = LoadTest(self.users, Category.objects.values_list('id', flat=True), requests=5,
+                             as_of=date(2025, 6, 15), warmup=1)
+        report = load_test.run()
+
+        self.assertEqual(set(report), {name for name, _ in load_test.endpoints})
+        for name, result in report.items():
+            self.assertEqual(result['requests'], 5, name)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertGreater(result['throughput_rps'], 0, name)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'], name)
+            self.assertGreater(result['queries']['max'], 0, name)
+        self.assertEqual(compare(report, report), [])
+
+    def test_compare_flags_more_queries_and_slower_p95(self):
+        baseline = {'transactions': {'errors': 0, 'queries': {'min': 3, 'max': 3}, 'latency_ms': {'p95': 10.0}}}
+        report = {'transactions': {'errors': 0, 'queries': {'min': 3, 'max': 53}, 'latency_ms': {'p95': 40.0}}}
+        regressions = compare(report, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("53 queries", regressions[0])
+        self.assertEqual(compare(report, baseline | {'transactions': report['transactions']}), [])
@@ -5,9 +5,11 @@ from dj_rest_auth.registration.views import SocialLoginView
 from rest_framework.authtoken.views import obtain_auth_token
 
 from django.http import HttpResponse
- 
- def health_check(request):
-     return HttpResponse("OK")
+from .views import MetricsView
+
+
+def health_check(request):
+    return HttpResponse("OK")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -17,6 +19,9 @@ urlpatterns = [
     path('budgets/', include('budgets_app.urls')),
     path('subcategories/', include('subcategories_app.urls')), 
     path('reports/', include('reports_app.urls')),
+    path('dashboard/', include('dashboard_app.urls')),
     path('wolfram/', include('wolfram.urls')),
+    path('jobs/', include('jobs_app.urls')),
     path('health/', health_check, name='health_check'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,59 @@
+import hmac
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from accounts.authentication import CachedJWTAuthentication
+from .instrumentation import metrics
+
+
+class HasMetricsToken(BasePermission):
+    """Lets scrapers in with ``X-Metrics-Token: <METRICS_TOKEN>`` when that setting is configured."""
+
+    def has_permission(self, request, view):
+        expected = getattr(settings, 'METRICS_TOKEN', None)
+        provided = request.headers.get('X-Metrics-Token', '')
+        return bool(expected) and hmac.compare_digest(provided.encode(), expected.encode())
+
+
+class MetricsView(APIView):
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser | HasMetricsToken]
+
+    def get(self, request):
+        # Aggregated since this worker process started; one entry per "METHOD /route"
+        return Response(metrics.snapshot())
+
+
+class AsyncAPIView(View):
+    """Base for ``async def`` views, which DRF's APIView cannot run.
+
+    Authenticates like the API views (JWT, then session) in a worker thread and
+    answers with plain ``JsonResponse`` objects.
+    """
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+
+    def authenticate(self, request):
+        drf_request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        return drf_request.user
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await sync_to_async(self.authenticate)(request)
+        except AuthenticationFailed as exc:
+            return self.unauthorized(exc.detail)
+        if not user.is_authenticated:
+            return self.unauthorized("Authentication credentials were not provided.")
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+    def unauthorized(self, detail):
+        response = JsonResponse({"detail": detail}, status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
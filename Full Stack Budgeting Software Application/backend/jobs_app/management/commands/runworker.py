@@ -0,0 +1,29 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs_app.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the jobs table. Start as many workers as needed; they never take the same job."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.JOBS_WORKER_CONCURRENCY,
+                            help="Jobs run at the same time by this worker.")
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help="Run jobs on threads (default, for I/O-bound jobs) or processes.")
+        parser.add_argument('--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help="Seconds between polls while the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once no due jobs are left.")
+
+    def handle(self, *args, **options):
+        worker = Worker(options['concurrency'], options['pool'], options['poll_interval'])
+        # Stop claiming on Ctrl+C / docker stop; jobs already running are finished first
+        signal.signal(signal.SIGINT, worker.stop)
+        signal.signal(signal.SIGTERM, worker.stop)
+
+        self.stdout.write(f"Worker {worker.name} running up to {worker.concurrency} jobs on a {worker.pool} pool.")
+        ran = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker.name} stopped after {ran} jobs."))
@@ -0,0 +1,16 @@
+"""Entry points of the process pool.
+
+Spawned pool processes import this module before Django is set up, so it must not
+import models at module level.
+"""
+import django
+
+
+def setup_process():
+    # Pool processes are spawned, not forked, so they never share the parent's database connections
+    django.setup()
+
+
+def run_job(job_id, worker):
+    from .services import execute_by_id
+    return execute_by_id(job_id, worker)
@@ -0,0 +1,15 @@
+from django.urls import reverse
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'result', 'error', 'attempts', 'max_attempts', 'run_at',
+                  'created_at', 'finished_at']
+
+
+def job_reference(job):
+    """What a view that enqueued ``job`` returns so the client can poll it."""
+    return {'id': job.pk, 'status': job.status, 'url': reverse('job-detail', args=[job.pk])}
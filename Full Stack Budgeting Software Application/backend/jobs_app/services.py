@@ -0,0 +1,118 @@
+import logging
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}  # job kind -> function
+
+
+def job(kind):
+    """Register the decorated function as the handler for jobs of ``kind``.
+
+    The handler is called with the job's payload as keyword arguments and must return
+    something JSON-serializable (or None). An exception fails the attempt.
+    """
+    def register(func):
+        handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=None, run_at=None):
+    """Store a job for the workers and return it; it is visible to them once the transaction commits."""
+    if kind not in handlers:
+        raise ValueError(f"No job handler registered for '{kind}'.")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        user=user,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: about base, 2 x base, 4 x base ... seconds, capped."""
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(worker, limit=1):
+    """Lock up to ``limit`` due jobs for ``worker`` and mark them running.
+
+    ``FOR UPDATE SKIP LOCKED`` lets any number of workers poll the table at once: each
+    skips the rows another has locked instead of waiting for them. Jobs whose worker
+    went away (running for longer than ``JOBS_LEASE_TIMEOUT``) are claimed again.
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=settings.JOBS_LEASE_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=lease_expired))
+            .order_by('run_at', 'id')[:limit]
+        )
+        Job.objects.filter(pk__in=[claimed.pk for claimed in jobs]).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+    for claimed in jobs:
+        claimed.status, claimed.locked_by, claimed.locked_at = Job.RUNNING, worker, now
+        claimed.attempts += 1
+    return jobs
+
+
+def finish(claimed, **fields):
+    # Only the worker holding the current lease may record the outcome
+    return Job.objects.filter(
+        pk=claimed.pk, status=Job.RUNNING, locked_by=claimed.locked_by, attempts=claimed.attempts,
+    ).update(**fields)
+
+
+def execute(claimed):
+    """Run one claimed job and record its result, or schedule a retry / mark it failed."""
+    handler = handlers.get(claimed.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No job handler registered for '{claimed.kind}'.")
+        if claimed.attempts > claimed.max_attempts:
+            raise RuntimeError("Attempts exhausted; the job's lease expired too many times.")
+        result = handler(**claimed.payload)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        if handler is not None and claimed.attempts < claimed.max_attempts:
+            logger.warning("Job %s (%s) attempt %d failed, retrying: %s", claimed.pk, claimed.kind, claimed.attempts, error)
+            finish(claimed, status=Job.QUEUED, error=error, locked_by='', locked_at=None,
+                   run_at=timezone.now() + retry_delay(claimed.attempts))
+        else:
+            logger.exception("Job %s (%s) failed", claimed.pk, claimed.kind)
+            finish(claimed, status=Job.FAILED, error=error, finished_at=timezone.now())
+        return False
+    finish(claimed, status=Job.SUCCEEDED, result=result, error='', finished_at=timezone.now())
+    return True
+
+
+def execute_by_id(job_id, worker):
+    """Worker pool entry point: re-read the claimed job, run it and release the thread's connection."""
+    try:
+        claimed = Job.objects.filter(pk=job_id, status=Job.RUNNING, locked_by=worker).first()
+        return execute(claimed) if claimed else False
+    finally:
+        close_old_connections()
+
+
+def run_pending(worker='inline', limit=None):
+    """Run due jobs one by one in the calling thread until none are left; returns how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        claimed = claim(worker)
+        if not claimed:
+            break
+        execute(claimed[0])
+        ran += 1
+    return ran
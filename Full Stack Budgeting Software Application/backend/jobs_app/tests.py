@@ -0,0 +1,151 @@
+import threading
+from datetime import timedelta
+from unittest import skipIf, skipUnless
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import Job
+from .services import job, enqueue, claim, execute, run_pending
+from .worker import Worker
+
+calls = []
+
+
+@job('tests.echo')
+def echo(value=None):
+    calls.append((value, threading.current_thread().name))
+    return {'value': value}
+
+
+@job('tests.broken')
+def broken():
+    raise ConnectionError("upstream unavailable")
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.user = User.objects.create_user(username="jobs_user", password="testpassword")
+
+    def test_enqueue_and_run(self):
+        queued = enqueue('tests.echo', {'value': 3}, user=self.user)
+        self.assertEqual(queued.status, Job.QUEUED)
+
+        self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.result, queued.attempts), (Job.SUCCEEDED, {'value': 3}, 1))
+        self.assertIsNotNone(queued.finished_at)
+        self.assertEqual(run_pending(), 0)
+
+    def test_enqueue_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            enqueue('tests.missing')
+
+    def test_jobs_scheduled_later_wait(self):
+        enqueue('tests.echo', run_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(claim('worker'), [])
+
+    def test_failures_are_retried_with_backoff_then_failed(self):
+        queued = enqueue('tests.broken', max_attempts=3)
+
+        with self.assertLogs('jobs_app.services', 'WARNING'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.QUEUED, 1))
+        self.assertIn("upstream unavailable", queued.error)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertEqual(claim('worker'), [])  # Not due until the backoff has passed
+
+        with self.assertLogs('jobs_app.services', 'WARNING'):
+            for _ in range(2):
+                Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+                run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.FAILED, 3))
+        self.assertIsNotNone(queued.finished_at)
+
+    @override_settings(JOBS_LEASE_TIMEOUT=60)
+    def test_abandoned_job_is_reclaimed_and_stale_worker_is_fenced_off(self):
+        queued = enqueue('tests.echo', {'value': 'x'})
+        [stale] = claim('worker-a')
+        self.assertEqual(claim('worker-b'), [])  # Still leased to worker-a
+
+        Job.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(seconds=61))
+        [current] = claim('worker-b')
+        self.assertEqual(current.attempts, 2)
+
+        # worker-a comes back after its lease expired: the handler runs, but its outcome is discarded
+        execute(stale)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.locked_by), (Job.RUNNING, 'worker-b'))
+
+        execute(current)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.SUCCEEDED)
+
+    def test_status_endpoint_is_owner_only(self):
+        queued = enqueue('tests.echo', {'value': 1}, user=self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get(f'/jobs/{queued.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+        self.assertEqual(response['Retry-After'], '1')
+
+        run_pending()
+        response = client.get(f'/jobs/{queued.pk}/')
+        self.assertEqual((response.data['status'], response.data['result']), (Job.SUCCEEDED, {'value': 1}))
+        self.assertFalse(response.has_header('Retry-After'))
+
+        other = User.objects.create_user(username="other_jobs_user", password="testpassword")
+        client.force_authenticate(user=other)
+        self.assertEqual(client.get(f'/jobs/{queued.pk}/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class WorkerTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    @skipIf(connection.vendor == 'sqlite', "Concurrent writers hit table locks in SQLite's shared in-memory test database")
+    def test_thread_pool_runs_every_job(self):
+        jobs = [enqueue('tests.echo', {'value': value}) for value in range(6)]
+
+        ran = Worker(concurrency=3, poll_interval=0.01, name='test-worker').run(once=True)
+
+        self.assertEqual(ran, 6)
+        self.assertEqual(sorted(value for value, _ in calls), list(range(6)))
+        self.assertTrue(all(thread.startswith('job') for _, thread in calls))
+        self.assertEqual(Job.objects.filter(pk__in=[queued.pk for queued in jobs], status=Job.SUCCEEDED).count(), 6)
+
+    @skipUnless(connection.vendor == 'postgresql', "SKIP LOCKED needs PostgreSQL")
+    def test_concurrent_claims_skip_locked_jobs(self):
+        for value in range(4):
+            enqueue('tests.echo', {'value': value})
+        claimed_first = threading.Event()
+        release = threading.Event()
+        first = []
+
+        def hold_claim():
+            try:
+                with transaction.atomic():
+                    first.extend(claim('worker-a', limit=2))
+                    claimed_first.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_claim)
+        thread.start()
+        claimed_first.wait(5)
+        # worker-a's rows are still locked: worker-b skips them instead of waiting
+        second = claim('worker-b', limit=4)
+        release.set()
+        thread.join()
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import JobView
+
+urlpatterns = [
+    path('<int:pk>/', JobView.as_view(), name='job-detail'),
+]
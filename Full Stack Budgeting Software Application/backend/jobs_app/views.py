@@ -0,0 +1,22 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound
+from accounts.authentication import CachedJWTAuthentication
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        # Polled by the frontend until status is "succeeded" or "failed"
+        job = Job.objects.filter(pk=pk, user=request.user).first()
+        if job is None:
+            raise NotFound("Job not found.")
+        response = Response(JobSerializer(job).data)
+        if job.status in (Job.QUEUED, Job.RUNNING):
+            response['Retry-After'] = '1'
+        return response
@@ -0,0 +1,63 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from django.db import close_old_connections
+from .process import run_job, setup_process
+from .services import claim, execute_by_id
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Poll the jobs table and run due jobs on a pool of ``concurrency`` threads or processes.
+
+    Threads suit the I/O-bound jobs this app has (HTTP calls, database writes); processes
+    keep CPU-heavy handlers off the GIL. Claims never exceed the free pool slots, so a
+    busy worker leaves queued jobs to the other workers.
+    """
+
+    def __init__(self, concurrency=4, pool='thread', poll_interval=1.0, name=None):
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+
+    def executor(self):
+        if self.pool == 'process':
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency, mp_context=multiprocessing.get_context('spawn'), initializer=setup_process,
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self, once=False):
+        """Process jobs until ``stop`` is called; with ``once``, until the queue is empty. Returns the number run."""
+        ran = 0
+        running = set()
+        with self.executor() as executor:
+            while not self.stopping.is_set():
+                free = self.concurrency - len(running)
+                claimed = claim(self.name, free) if free else []
+                task = run_job if self.pool == 'process' else execute_by_id
+                for job in claimed:
+                    running.add(executor.submit(task, job.pk, self.name))
+                ran += len(claimed)
+                close_old_connections()
+
+                if once and not claimed and not running:
+                    break
+                if running and (not free or not claimed):
+                    done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception():
+                            logger.error("Job runner error: %s", future.exception())
+                elif not claimed:
+                    self.stopping.wait(self.poll_interval)
+            # Jobs already handed to the pool finish before the worker exits
+        return ran
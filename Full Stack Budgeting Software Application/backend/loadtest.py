@@ -0,0 +1,80 @@
+"""Reproducible load test of the API's read endpoints.
+
+Seed data first, e.g. ``python manage.py generate_synthetic_data --users 50 --years 2``,
+then run ``python loadtest.py``. Requests go through Django's handler in-process
+unless --base-url points at a running server. Save a report with --save-baseline and
+check later runs against it with --baseline; the script exits with status 1 when an
+endpoint runs more queries than in the baseline (e.g. an N+1) or its p95 grows too much.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "euniceproj.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model
+from categories_app.models import Category
+from euniceproj.loadtest import HTTPTransport, InProcessTransport, LoadTest, compare
+
+User = get_user_model()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--prefix', default='synthetic', help="Drive requests as the users with this username prefix.")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint.")
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent client threads.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the request plan.")
+    parser.add_argument('--as-of', help="Date for /budgets/utilization/ (YYYY-MM-DD), defaults to today.")
+    parser.add_argument('--base-url', help="Load test a running server instead, e.g. http://localhost:8000.")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    parser.add_argument('--save-baseline', help="Write the JSON report here for later --baseline runs.")
+    parser.add_argument('--baseline', help="Compare with a saved report; exit 1 on regressions.")
+    parser.add_argument('--latency-tolerance', type=float, default=0.5,
+                        help="Allowed relative p95 growth over the baseline (default 0.5 = 50%%).")
+    args = parser.parse_args()
+
+    users = list(User.objects.filter(username__startswith=args.prefix).order_by('username'))
+    if not users:
+        sys.exit(f"No users named {args.prefix}*. Run: python manage.py generate_synthetic_data")
+
+    load_test = LoadTest(
+        users,
+        Category.objects.values_list('id', flat=True),
+        requests=args.requests,
+        concurrency=args.concurrency,
+        seed=args.seed,
+        as_of=datetime.strptime(args.as_of, '%Y-%m-%d').date() if args.as_of else None,
+        transport=HTTPTransport(args.base_url) if args.base_url else InProcessTransport(),
+    )
+    report = load_test.run()
+
+    print(f"{'endpoint':<26}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'queries':>9}{'errors':>8}")
+    for name, result in report.items():
+        latency = result['latency_ms']
+        queries = result['queries']['max'] if result['queries'] else '-'
+        print(f"{name:<26}{result['throughput_rps']:>8}{latency['p50']:>9}{latency['p95']:>9}"
+              f"{latency['p99']:>9}{latency['max']:>9}{queries:>9}{result['errors']:>8}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.latency_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
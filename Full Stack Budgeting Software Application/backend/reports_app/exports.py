@@ -0,0 +1,281 @@
+import csv
+import json
+import re
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BaseRenderer
+
+from accounts.models import get_reporting_currency
+from currencies_app.registry import currency_registry
+from currencies_app.services import cents, from_usd_expression, month_end_rate_date
+from transactions_app.models import Transaction
+from .models import MonthlyCategoryRollup
+
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per database round trip
+STREAM_ROWS_PER_CHUNK = 500  # rows written per chunk of the HTTP response
+
+# Text starting with these becomes a live formula when a CSV is opened in a spreadsheet
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Characters XML 1.0 does not allow, even escaped
+ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ExportRenderer(BaseRenderer):
+    """Lets ``?format=`` / ``Accept`` select the export format through DRF content negotiation.
+
+    Successful exports return a ``StreamingHttpResponse`` and never reach ``render``;
+    error payloads are rendered as JSON.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return json.dumps(data).encode()
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class XLSXExportRenderer(ExportRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+
+
+class Echo:
+    """File-like object that hands back whatever is written, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+class StreamBuffer:
+    """Write-only, non-seekable file object drained by the response generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def csv_cell(value):
+    """Text a spreadsheet would read as a formula gets a leading ``'``; other values are written as-is."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_stream(header, rows):
+    writer = csv.writer(Echo())
+    lines = [writer.writerow(header)]
+    for row in rows:
+        lines.append(writer.writerow([csv_cell(value) for value in row]))
+        if len(lines) >= STREAM_ROWS_PER_CHUNK:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+
+def xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_stream(header, rows, sheet_name):
+    """Stream a single-sheet workbook; rows are written into a deflated zip entry as they arrive."""
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(name=escape(sheet_name)))
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(('<row>' + ''.join(xlsx_cell(value) for value in header) + '</row>').encode())
+            for index, row in enumerate(rows, start=1):
+                sheet.write(('<row>' + ''.join(xlsx_cell(value) for value in row) + '</row>').encode())
+                if index % STREAM_ROWS_PER_CHUNK == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+class ExportStreamingResponse(StreamingHttpResponse):
+    """Streams a sync chunk generator under WSGI and ASGI alike.
+
+    Under ASGI, Django reads a sync iterator with one ``sync_to_async(list)``, building the
+    whole file before the first byte is sent. Here each chunk is pulled on its own, in the
+    thread that owns the database connection, so memory stays at one chunk.
+    """
+
+    async def __aiter__(self):
+        chunks = iter(self.streaming_content)
+        done = object()
+        while (chunk := await sync_to_async(next)(chunks, done)) is not done:
+            yield chunk
+
+
+def export_response(file_format, filename, header, rows, sheet_name='Export'):
+    if file_format == 'xlsx':
+        response = ExportStreamingResponse(xlsx_stream(header, rows, sheet_name),
+                                           content_type=XLSXExportRenderer.media_type)
+    else:
+        response = ExportStreamingResponse(csv_stream(header, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+
+def parse_currency(value, param='currency'):
+    """Validated upper-case currency code, or a 400 naming ``param``."""
+    currency = value.upper()
+    if currency not in currency_registry:
+        raise ValidationError({param: f"Currency '{currency}' is not supported."})
+    return currency
+
+
+def parse_export_filters(user, query_params):
+    """Read ?start_date=, ?end_date=, ?category= and ?currency= (default: the user's reporting currency)."""
+    filters = {'start_date': None, 'end_date': None, 'category_id': None}
+    for param in ('start_date', 'end_date'):
+        value = query_params.get(param)
+        if value:
+            try:
+                filters[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValidationError({param: "Invalid date format. Use YYYY-MM-DD."})
+
+    category = query_params.get('category')
+    if category:
+        if not category.isdigit():
+            raise ValidationError({"category": "Invalid category id."})
+        filters['category_id'] = int(category)
+
+    filters['currency'] = parse_currency(query_params.get('currency') or get_reporting_currency(user))
+    return filters
+
+
+def transaction_export(user, start_date=None, end_date=None, category_id=None, currency='USD'):
+    """Header and a lazy row iterator for the user's transactions, oldest first.
+
+    Amounts are converted in the query, with the rate of each transaction's date.
+    """
+    transactions = Transaction.objects.filter(user=user)
+    if start_date:
+        transactions = transactions.filter(date__gte=start_date)
+    if end_date:
+        transactions = transactions.filter(date__lte=end_date)
+    if category_id:
+        transactions = transactions.filter(category_id=category_id)
+
+    header = ['date', 'description', 'amount', 'currency', 'category', 'subcategory', 'budget',
+              f'amount_{currency.lower()}']
+
+    def rows():
+        values = transactions.annotate(
+            converted=from_usd_expression(F('amount_usd'), currency, F('date')),
+        ).order_by('date', 'id').values_list(
+            'date', 'description', 'amount_currency', 'currency',
+            'category__category', 'subcategory__subcategory_name', 'budget__name', 'converted',
+        )
+        for row_date, description, amount, row_currency, category, subcategory, budget, converted in (
+            values.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        ):
+            yield (row_date.isoformat(), description, amount, row_currency, category, subcategory, budget,
+                   cents(converted))
+
+    return header, rows()
+
+
+def report_export(user, start_date=None, end_date=None, category_id=None, currency='USD'):
+    """Header and a lazy row iterator of monthly totals per category and subcategory.
+
+    Totals are kept in USD and converted in the query with the rate at the end of each month.
+    """
+    rollups = MonthlyCategoryRollup.objects.filter(user=user)
+    if start_date:
+        rollups = rollups.filter(month__gte=start_date.replace(day=1))
+    if end_date:
+        rollups = rollups.filter(month__lte=end_date)
+    if category_id:
+        rollups = rollups.filter(category_id=category_id)
+
+    header = ['month', 'category', 'subcategory', 'transactions', f'total_{currency.lower()}']
+
+    def rows():
+        values = rollups.annotate(
+            converted=from_usd_expression(F('total_usd'), currency, month_end_rate_date(F('month'))),
+        ).order_by('month', 'category__category', 'subcategory__subcategory_name').values_list(
+            'month', 'category__category', 'subcategory__subcategory_name', 'transaction_count', 'converted',
+        )
+        for month, category, subcategory, count, converted in values.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield (month.strftime('%Y-%m'), category, subcategory, count, cents(converted))
+
+    return header, rows()
@@ -0,0 +1,183 @@
+"""Spending projections per category and unusually large transactions, computed with NumPy.
+
+Every category's monthly series is read from the rollup table in one query and fitted
+as one (categories x months) array, so the work is a handful of array operations
+whatever the number of categories or years. Amounts are in USD.
+"""
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum
+from rest_framework.exceptions import ValidationError
+from transactions_app.models import Transaction
+from .models import MonthlyCategoryRollup
+
+DEFAULT_FORECAST_MONTHS = 3
+MAX_FORECAST_MONTHS = 24
+BASELINE_MONTHS = 12  # The level is the median of the last year of months, seasonality removed
+SEASONAL_MIN_MONTHS = 24  # Calendar-month offsets need at least two of each month
+ANOMALY_LOOKBACK_MONTHS = 12
+ANOMALY_MIN_SAMPLES = 8  # Fewer transactions in a category give no usable spread
+ANOMALY_THRESHOLD = 3.5  # Robust z-score above which a transaction is flagged (Iglewicz and Hoaglin)
+MAX_ANOMALIES = 50
+
+
+def month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def month_key(index):
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+def money(values):
+    return [Decimal(f'{value:.2f}') for value in values]
+
+
+def forecast_months(query_params):
+    try:
+        months = int(query_params.get('months', DEFAULT_FORECAST_MONTHS))
+    except ValueError:
+        raise ValidationError({"months": "A valid integer is required."})
+    if not 1 <= months <= MAX_FORECAST_MONTHS:
+        raise ValidationError({"months": f"Forecasts cover 1 to {MAX_FORECAST_MONTHS} months."})
+    return months
+
+
+def monthly_series(user, before):
+    """``(category ids, names, first month index, totals)`` of the months before ``before``.
+
+    ``totals`` is a (categories x months) array of USD spending, zero where a month has none.
+    """
+    rows = list(
+        MonthlyCategoryRollup.objects.filter(user=user, month__lt=before)
+        .values_list('category_id', 'category__category', 'month')
+        .annotate(total=Sum('total_usd'))
+        .order_by()
+    )
+    if not rows:
+        return [], [], month_index(before), np.zeros((0, 0))
+
+    category_ids, names, months, totals = zip(*rows)
+    ids, row_category = np.unique(category_ids, return_inverse=True)
+    row_month = np.array([month_index(month) for month in months])
+    first = int(row_month.min())
+    series = np.zeros((len(ids), month_index(before) - first))
+    np.add.at(series, (row_category, row_month - first), np.array(totals, dtype=float))
+    name_by_id = dict(zip(category_ids, names))
+    return ids.tolist(), [name_by_id[category_id] for category_id in ids.tolist()], first, series
+
+
+def seasonal_forecast(series, first, horizon):
+    """Project every row of ``series`` over the ``horizon`` months that follow it.
+
+    Months before a category's first spending are left out rather than counted as zero.
+    Once a category has ``SEASONAL_MIN_MONTHS`` of history, each calendar month gets the
+    average offset of that month from the category's mean. The projection is the median
+    of the last ``BASELINE_MONTHS`` months with their offsets removed, plus the offset of
+    the projected month.
+    """
+    months = series.shape[1]
+    observed = np.cumsum(series != 0, axis=1) > 0
+    observed[:, -1] = True  # Keeps every row non-empty, e.g. a category whose rollups net to zero
+    history = np.where(observed, series, np.nan)
+    mean = np.nanmean(history, axis=1)
+
+    calendar = (first + np.arange(months)) % 12
+    by_calendar_month = (calendar[:, None] == np.arange(12)).astype(float)  # (months x 12)
+    sums = np.nan_to_num(history) @ by_calendar_month
+    counts = observed.astype(float) @ by_calendar_month
+    offsets = np.divide(sums, counts, out=np.tile(mean[:, None], 12), where=counts > 0) - mean[:, None]
+    offsets[observed.sum(axis=1) < SEASONAL_MIN_MONTHS] = 0
+
+    level = np.nanmedian(history[:, -BASELINE_MONTHS:] - offsets[:, calendar[-BASELINE_MONTHS:]], axis=1)
+    future = (first + months + np.arange(horizon)) % 12
+    return np.maximum(level[:, None] + offsets[:, future], 0)
+
+
+def robust_z_scores(groups, values):
+    """Modified z-score of each value within its group, plus the group's median, for all groups at once.
+
+    The score is ``(x - median) / (MAD / 0.6745)``; a group whose MAD is zero uses
+    ``1.253314 * mean absolute deviation`` instead. Groups with fewer than
+    ``ANOMALY_MIN_SAMPLES`` values or no spread at all score zero.
+    """
+    if not len(values):
+        return np.zeros(0), np.zeros(0)
+
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    _, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+
+    def group_medians(sorted_values):
+        # ``sorted_values`` is sorted within each group
+        return (sorted_values[starts + (counts - 1) // 2] + sorted_values[starts + counts // 2]) / 2
+
+    median = np.repeat(group_medians(values), counts)
+    deviation = np.abs(values - median)
+    mad = group_medians(deviation[np.lexsort((deviation, groups))])
+    mean_deviation = np.add.reduceat(deviation, starts) / counts
+    scale = np.where(mad > 0, mad / 0.6745, mean_deviation * 1.253314)
+    scale = np.repeat(np.where(counts >= ANOMALY_MIN_SAMPLES, scale, 0), counts)
+    scores = np.divide(values - median, scale, out=np.zeros_like(values), where=scale > 0)
+
+    # Back to the input order
+    unsorted_scores, unsorted_median = np.empty_like(scores), np.empty_like(median)
+    unsorted_scores[order], unsorted_median[order] = scores, median
+    return unsorted_scores, unsorted_median
+
+
+def anomalous_transactions(user, today):
+    """The user's transactions of the last ``ANOMALY_LOOKBACK_MONTHS`` that are unusually large for their category."""
+    since = today.replace(day=1) - relativedelta(months=ANOMALY_LOOKBACK_MONTHS - 1)
+    rows = list(
+        Transaction.objects.filter(user=user, date__gte=since, date__lte=today)
+        .values_list('id', 'date', 'description', 'category_id', 'category__category', 'amount_usd')
+        .order_by()
+    )
+    if not rows:
+        return []
+
+    ids, dates, descriptions, category_ids, names, amounts = zip(*rows)
+    scores, medians = robust_z_scores(np.array(category_ids), np.array(amounts, dtype=float))
+    # Only unusually high spending is worth flagging
+    flagged = np.flatnonzero(scores > ANOMALY_THRESHOLD)
+    flagged = flagged[np.argsort(-scores[flagged], kind='stable')][:MAX_ANOMALIES]
+    return [
+        {
+            'id': ids[index],
+            'date': dates[index],
+            'description': descriptions[index],
+            'category_id': category_ids[index],
+            'category': names[index],
+            'amount_usd': amounts[index],
+            'typical_amount_usd': Decimal(f'{medians[index]:.2f}'),
+            'score': round(float(scores[index]), 2),
+        }
+        for index in flagged.tolist()
+    ]
+
+
+def build_forecast(user, months=DEFAULT_FORECAST_MONTHS, today=None):
+    """The /reports/forecast/ payload: ``months`` of projections from the current month on, and anomalies.
+
+    Two queries: the monthly rollups of complete months, and the recent transactions.
+    """
+    today = today or date.today()
+    current = month_index(today)
+    category_ids, names, first, series = monthly_series(user, today.replace(day=1))
+    projections = seasonal_forecast(series, first, months) if category_ids else np.zeros((0, months))
+
+    return {
+        'months': [month_key(current + step) for step in range(months)],
+        'categories': sorted(
+            (
+                {'category_id': category_id, 'category': name, 'forecast_usd': money(projection)}
+                for category_id, name, projection in zip(category_ids, names, projections)
+            ),
+            key=lambda category: category['category'],
+        ),
+        'total_usd': money(projections.sum(axis=0)),
+        'anomalies': anomalous_transactions(user, today),
+    }
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from reports_app.models import MonthlyCategoryRollup
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the monthly category rollup table from app_transactions, or verify it with --verify. "
+        "Archived months keep their stored totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild/verify rollups for this username.")
+        parser.add_argument('--verify', action='store_true', help="Compare stored rollups with a full recomputation.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        if options['verify']:
+            mismatches = MonthlyCategoryRollup.objects.verify(user)
+            for mismatch in mismatches:
+                self.stdout.write(f"Mismatch {mismatch['bucket']}: expected {mismatch['expected']}, stored {mismatch['stored']}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} rollup buckets are out of date. Run without --verify to rebuild.")
+            self.stdout.write(self.style.SUCCESS("Monthly rollups are up to date."))
+            return
+
+        count = MonthlyCategoryRollup.objects.rebuild(user)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} monthly rollup rows."))
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-18 17:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('categories_app', '0005_alter_category_category'),
+        ('subcategories_app', '0004_alter_subcategory_subcategory_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total_usd', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='categories_app.category')),
+                ('subcategory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='subcategories_app.subcategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'app_monthly_category_rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlycategoryrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'month', 'category', 'subcategory'), name='unique_rollup_per_user_month_category_subcategory'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    Transaction = apps.get_model('transactions_app', 'Transaction')
+    MonthlyCategoryRollup = apps.get_model('reports_app', 'MonthlyCategoryRollup')
+
+    rows = (
+        Transaction.objects.annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category_id', 'subcategory_id')
+        .annotate(total_usd=Sum('amount_usd'), transaction_count=Count('id'))
+        .order_by()
+    )
+    MonthlyCategoryRollup.objects.bulk_create(
+        [MonthlyCategoryRollup(**row) for row in rows.iterator()],
+        batch_size=5000,
+    )
+
+
+def clear_rollups(apps, schema_editor):
+    apps.get_model('reports_app', 'MonthlyCategoryRollup').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports_app', '0001_initial'),
+        ('transactions_app', '0014_alter_transaction_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_rollups, clear_rollups),
+    ]
@@ -1,3 +1,266 @@
-from django.db import models
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from django.db import connection, models, transaction, IntegrityError
+from django.db.models import F, Sum, Count
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from euniceproj.response_cache import bump_data_version
+from euniceproj.pubsub import RESYNC, publish
 
-# Create your models here.
+User = get_user_model()
+
+
+def month_start(value):
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def rollup_key(transaction_obj):
+    """The (user, month, category, subcategory) bucket a transaction contributes to."""
+    return (
+        transaction_obj.user_id,
+        month_start(transaction_obj.date),
+        transaction_obj.category_id,
+        transaction_obj.subcategory_id,
+    )
+
+
+def publish_rollup_delta(user_id, month, category_id, subcategory_id, amount, count):
+    # What /dashboard/events/ clients add to their overview, instead of reloading it
+    publish(user_id, 'rollup', {
+        'month': month_start(month).strftime('%Y-%m'),
+        'category_id': category_id,
+        'subcategory_id': subcategory_id,
+        'amount_usd': amount,
+        'count': count,
+    })
+
+
+class MonthlyCategoryRollupManager(models.Manager):
+
+    def apply(self, user_id, month, category_id, subcategory_id, amount, count):
+        """Add ``amount``/``count`` (possibly negative) to one rollup bucket."""
+        # Bulk writes (imports, recurring occurrences, reassignments) all pass through here
+        bump_data_version(user_id)
+        bucket = self.filter(user_id=user_id, month=month, category_id=category_id, subcategory_id=subcategory_id)
+        updated = bucket.update(
+            total_usd=F('total_usd') + amount,
+            transaction_count=F('transaction_count') + count,
+        )
+
+        if not updated:
+            if count <= 0:
+                return  # Nothing to subtract from, e.g. the bucket was already removed by a cascade
+            try:
+                with transaction.atomic():
+                    self.create(user_id=user_id, month=month, category_id=category_id,
+                                subcategory_id=subcategory_id, total_usd=amount, transaction_count=count)
+            except IntegrityError:
+                # Another writer created the bucket first
+                bucket.update(total_usd=F('total_usd') + amount, transaction_count=F('transaction_count') + count)
+        elif count < 0:
+            bucket.filter(transaction_count__lte=0).delete()
+        publish_rollup_delta(user_id, month, category_id, subcategory_id, amount, count)
+
+    def add_transactions(self, transactions, sign=1):
+        """Fold an iterable of saved transactions into the rollup, e.g. after ``bulk_create``."""
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+        for transaction_obj in transactions:
+            delta = deltas[rollup_key(transaction_obj)]
+            delta[0] += Decimal(str(transaction_obj.amount_usd)) * sign
+            delta[1] += sign
+
+        with transaction.atomic():
+            for (user_id, month, category_id, subcategory_id), (amount, count) in deltas.items():
+                self.apply(user_id, month, category_id, subcategory_id, amount, count)
+
+    def move(self, source, category, subcategory_name=None):
+        """Merge the buckets matching ``source`` (a ``Q``) into ``category``, merging with existing buckets.
+
+        Buckets keep their subcategory, or go to each user's ``subcategory_name`` subcategory of
+        ``category``, which must exist (the oldest wins if there are several). One INSERT ...
+        SELECT ... ON CONFLICT DO UPDATE and one DELETE, whatever the number of buckets.
+        Affected users' streams get a resync.
+        """
+        buckets = self.filter(source)
+        with transaction.atomic():
+            user_ids = set(buckets.order_by().values_list('user_id', flat=True).distinct())
+            if not user_ids:
+                return 0
+            table = connection.ops.quote_name(self.model._meta.db_table)
+            source_sql, source_params = buckets.values('id').query.sql_with_params()
+            if subcategory_name is None:
+                target, join, params = "bucket.subcategory_id", "", [category.id]
+            else:
+                target = "target.id"
+                join = f"""
+                    JOIN (
+                      SELECT user_id, MIN(id) AS id FROM {connection.ops.quote_name(Subcategory._meta.db_table)}
+                      WHERE category_id = %s AND subcategory_name = %s
+                      GROUP BY user_id
+                    ) target ON target.user_id = bucket.user_id"""
+                params = [category.id, category.id, subcategory_name]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (user_id, month, category_id, subcategory_id, total_usd, transaction_count)
+                    SELECT bucket.user_id, bucket.month, %s, {target},
+                           SUM(bucket.total_usd), SUM(bucket.transaction_count)
+                    FROM {table} bucket{join}
+                    WHERE bucket.id IN ({source_sql})
+                    GROUP BY bucket.user_id, bucket.month, {target}
+                    ON CONFLICT (user_id, month, category_id, subcategory_id) DO UPDATE SET
+                      total_usd = {table}.total_usd + excluded.total_usd,
+                      transaction_count = {table}.transaction_count + excluded.transaction_count
+                    """,
+                    [*params, *source_params],
+                )
+            moved = buckets._raw_delete(self.db)
+
+        for user_id in user_ids:
+            bump_data_version(user_id)
+            # One event per user instead of a pair of deltas per bucket
+            publish(user_id, RESYNC, {})
+        return moved
+
+    def recomputable(self, user=None):
+        """The stored buckets that can be recomputed, i.e. outside the archived months.
+
+        Archived months' rows were detached from ``app_transactions`` (see
+        ``transactions_app.partitioning``), so their buckets are the only record of their totals.
+        """
+        from transactions_app.partitioning import archived_months
+
+        buckets = self.all() if user is None else self.filter(user=user)
+        return buckets.exclude(month__in=archived_months())
+
+    def expected_rows(self, user=None):
+        """Rollup rows recomputed from scratch from ``app_transactions``, skipping archived months."""
+        from transactions_app.models import Transaction
+        from transactions_app.partitioning import archived_months
+
+        transactions = Transaction.objects.all()
+        if user is not None:
+            transactions = transactions.filter(user=user)
+
+        return (
+            transactions.annotate(month=TruncMonth('date'))
+            .exclude(month__in=archived_months())
+            .values('user_id', 'month', 'category_id', 'subcategory_id')
+            .annotate(total_usd=Sum('amount_usd'), transaction_count=Count('id'))
+            .order_by()
+        )
+
+    def rebuild(self, user=None):
+        with transaction.atomic():
+            self.recomputable(user).delete()
+            rows = [
+                self.model(
+                    user_id=row['user_id'],
+                    month=month_start(row['month']),
+                    category_id=row['category_id'],
+                    subcategory_id=row['subcategory_id'],
+                    total_usd=row['total_usd'],
+                    transaction_count=row['transaction_count'],
+                )
+                for row in self.expected_rows(user)
+            ]
+            self.bulk_create(rows, batch_size=5000)
+        return len(rows)
+
+    def verify(self, user=None):
+        """Return the buckets whose stored totals differ from a full recomputation."""
+        def bucket(row):
+            return (row['user_id'], month_start(row['month']), row['category_id'], row['subcategory_id'])
+
+        expected = {
+            bucket(row): (row['total_usd'], row['transaction_count'])
+            for row in self.expected_rows(user)
+        }
+        stored = {
+            bucket(row): (row['total_usd'], row['transaction_count'])
+            for row in self.recomputable(user).values('user_id', 'month', 'category_id', 'subcategory_id',
+                                          'total_usd', 'transaction_count')
+        }
+
+        return [
+            {'bucket': key, 'expected': expected.get(key), 'stored': stored.get(key)}
+            for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        ]
+
+
+class MonthlyCategoryRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    subcategory = models.ForeignKey(Subcategory, on_delete=models.CASCADE)
+    total_usd = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.IntegerField(default=0)
+
+    objects = MonthlyCategoryRollupManager()
+
+    class Meta:
+        db_table = 'app_monthly_category_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'category', 'subcategory'],
+                name='unique_rollup_per_user_month_category_subcategory'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.category_id}/{self.subcategory_id}: {self.total_usd} USD"
+
+
+@receiver(pre_save, sender='transactions_app.Transaction')
+def capture_previous_rollup_bucket(sender, instance, **kwargs):
+    # Remember which bucket an existing row contributed to before this save changes it
+    instance._rollup_previous = None
+    if instance.pk is None:
+        return
+    row = sender.objects.filter(pk=instance.pk).values(
+        'user_id', 'date', 'category_id', 'subcategory_id', 'amount_usd'
+    ).first()
+    if row:
+        instance._rollup_previous = (
+            (row['user_id'], month_start(row['date']), row['category_id'], row['subcategory_id']),
+            row['amount_usd'],
+        )
+
+
+@receiver(post_save, sender='transactions_app.Transaction')
+def update_rollup_on_save(sender, instance, created, **kwargs):
+    current = (rollup_key(instance), Decimal(str(instance.amount_usd)))
+    previous = None if created else getattr(instance, '_rollup_previous', None)
+
+    if previous == current:
+        return
+    if previous is not None:
+        MonthlyCategoryRollup.objects.apply(*previous[0], -previous[1], -1)
+    MonthlyCategoryRollup.objects.apply(*current[0], current[1], 1)
+
+
+@receiver(post_delete, sender='transactions_app.Transaction')
+def update_rollup_on_delete(sender, instance, **kwargs):
+    MonthlyCategoryRollup.objects.apply(*rollup_key(instance), -Decimal(str(instance.amount_usd)), -1)
+
+
+@receiver(post_save, sender='budgets_app.Budget')
+@receiver(post_delete, sender='budgets_app.Budget')
+def publish_budget_change(sender, instance, **kwargs):
+    # The overview shows each budget's limit in its start month
+    publish(instance.user_id, 'budget', {
+        'id': instance.id,
+        'month': month_start(instance.start_date).strftime('%Y-%m'),
+        'total_limit': instance.total_limit,
+        'deleted': kwargs['signal'] is post_delete,
+    })
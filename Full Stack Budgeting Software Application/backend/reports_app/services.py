@@ -0,0 +1,101 @@
+import calendar
+from datetime import date
+from django.db.models import F, Sum
+from budgets_app.models import Budget
+from currencies_app.services import RateTable, from_usd_expression, month_end_rate_date
+from transactions_app.recurrence import virtual_occurrences
+from .models import MonthlyCategoryRollup
+
+RECURRING_CATEGORY = 'Recurring'
+
+
+def monthly_total(currency):
+    """Sum of a month's USD rollups, converted in SQL with the month-end rate unless ``currency`` is USD."""
+    if currency == 'USD':
+        return Sum('total_usd')
+    return from_usd_expression(Sum('total_usd'), currency, month_end_rate_date(F('month')))
+
+
+def monthly_category_totals(user, currency='USD'):
+    """Totals per (month, category) for non-recurring transactions, read from the rollup table."""
+    return (
+        MonthlyCategoryRollup.objects.filter(user=user)
+        .exclude(category__category=RECURRING_CATEGORY)
+        .values_list('month', 'category__category')
+        .annotate(total=monthly_total(currency))
+        .order_by()
+    )
+
+
+def monthly_recurring_totals(user, currency='USD'):
+    """Totals per (month, subcategory) for the Recurring category, read from the rollup table."""
+    return (
+        MonthlyCategoryRollup.objects.filter(user=user, category__category=RECURRING_CATEGORY)
+        .values_list('month', 'subcategory__subcategory_name')
+        .annotate(total=monthly_total(currency))
+        .order_by()
+    )
+
+
+def build_overview(user, currency='USD'):
+    """Build the /reports/overview-data/ payload in a constant number of queries.
+
+    Amounts are in ``currency``; stored totals are converted inside the queries, with the
+    rate at the end of each month (today for the current and future months). Scheduled
+    occurrences are converted from one ``RateTable``, loaded once for all of them.
+    """
+    monthly_data = {}
+    months = set()
+
+    # Budgets set up their start month; a later budget starting in the same month replaces an earlier one
+    budgets = Budget.objects.filter(user=user).order_by('id')
+    if currency == 'USD':
+        budgets = budgets.values_list('start_date', 'total_limit')
+    else:
+        budgets = budgets.annotate(
+            limit=from_usd_expression(F('total_limit'), currency, month_end_rate_date(F('start_date')))
+        ).values_list('start_date', 'limit')
+    for start_date, total_limit in budgets:
+        month_key = start_date.strftime('%Y-%m')
+        months.add(month_key)
+        monthly_data[month_key] = {'budget': total_limit}
+
+    available_categories = set()
+    for month, category_name, total in monthly_category_totals(user, currency):
+        month_key = month.strftime('%Y-%m')
+        months.add(month_key)
+        monthly_data.setdefault(month_key, {})[category_name] = total
+        available_categories.add(category_name)
+
+    for month, subcategory_name, total in monthly_recurring_totals(user, currency):
+        month_key = month.strftime('%Y-%m')
+        months.add(month_key)
+        recurring = monthly_data.setdefault(month_key, {}).setdefault(RECURRING_CATEGORY, {})
+        recurring[subcategory_name] = total
+
+    # Future occurrences of recurring series are not stored yet; add them on the fly
+    rates = RateTable()
+    today = date.today()
+    for occurrence in virtual_occurrences(user, rates=rates):
+        month_key = occurrence.date.strftime('%Y-%m')
+        months.add(month_key)
+        month = monthly_data.setdefault(month_key, {})
+        amount = occurrence.amount_usd
+        if currency != 'USD':
+            month_end = occurrence.date.replace(day=calendar.monthrange(occurrence.date.year, occurrence.date.month)[1])
+            amount = rates.from_usd(amount, currency, min(month_end, today)) or 0
+        category_name = occurrence.category.category
+        if category_name == RECURRING_CATEGORY:
+            recurring = month.setdefault(RECURRING_CATEGORY, {})
+            subcategory_name = occurrence.subcategory.subcategory_name
+            recurring[subcategory_name] = recurring.get(subcategory_name, 0) + amount
+        else:
+            month[category_name] = month.get(category_name, 0) + amount
+            available_categories.add(category_name)
+
+    return {
+        'currency': currency,
+        'monthly_data': monthly_data,
+        'months': sorted(months),
+        'filtered_categories': sorted(available_categories),
+    }
@@ -1,3 +1,382 @@
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from budgets_app.models import Budget
+from transactions_app.models import Transaction
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from accounts.models import Profile
+from django.core.cache import cache
+from currencies_app.models import ExchangeRate
+from .models import MonthlyCategoryRollup
+from .forecast import build_forecast, robust_z_scores
+from .exports import csv_stream
+from unittest.mock import patch
+from decimal import Decimal
+from datetime import date
+from io import StringIO, BytesIO
+from dateutil.relativedelta import relativedelta
+import numpy as np
+from xml.etree import ElementTree
+import asyncio
+import csv
+import json
+import zipfile
 
-# Create your tests here.
+
+class OverviewDataTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="overview_user", password="testpassword")
+        self.other_user = User.objects.create_user(username="other_user", password="testpassword")
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        self.recurring = Category.objects.create(category="Recurring", user=self.user)
+        self.rent = Subcategory.objects.create(subcategory_name="Rent", category=self.recurring, user=self.user)
+
+        Budget.objects.create(name="January Budget", total_limit=Decimal('5000.00'),
+                              start_date="2025-01-01", end_date="2025-01-31", user=self.user)
+
+        self.create_transaction(self.food, self.groceries, '100.00', "2025-01-05")
+        self.create_transaction(self.food, self.groceries, '50.50', "2025-01-20")
+        self.create_transaction(self.food, self.groceries, '20.00', "2025-02-02")
+        self.create_transaction(self.recurring, self.rent, '2000.00', "2025-01-01")
+        self.create_transaction(self.recurring, self.rent, '2000.00', "2025-02-01")
+        self.create_transaction(self.food, self.groceries, '999.00', "2025-01-05", user=self.other_user)
+
+    def create_transaction(self, category, subcategory, amount, date, user=None):
+        return Transaction.objects.create(
+            user=user or self.user,
+            category=category,
+            subcategory=subcategory,
+            amount_currency=Decimal(amount),
+            currency="USD",
+            description="Test transaction",
+            date=date
+        )
+
+    def test_overview_data_totals(self):
+        response = self.client.get('/reports/overview-data/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['months'], ['2025-01', '2025-02'])
+        self.assertEqual(response.data['filtered_categories'], ['Food'])
+
+        january = response.data['monthly_data']['2025-01']
+        self.assertEqual(january['budget'], Decimal('5000.00'))
+        self.assertEqual(january['Food'], Decimal('150.50'))
+        self.assertEqual(january['Recurring'], {'Rent': Decimal('2000.00')})
+
+        february = response.data['monthly_data']['2025-02']
+        self.assertNotIn('budget', february)
+        self.assertEqual(february['Food'], Decimal('20.00'))
+
+    def test_overview_data_query_count_is_constant(self):
+        for day in range(1, 29):
+            self.create_transaction(self.food, self.groceries, '1.00', f"2025-03-{day:02d}")
+
+        with self.assertNumQueries(4):
+            response = self.client.get('/reports/overview-data/')
+
+        self.assertEqual(response.data['monthly_data']['2025-03']['Food'], Decimal('28.00'))
+
+    @patch('currencies_app.services.requests.get', side_effect=AssertionError("network access"))
+    def test_overview_data_in_another_currency(self, mock_get):
+        # Each month uses the latest snapshot on or before its last day
+        ExchangeRate.objects.create(date=date(2024, 12, 31), currency="EUR", rate_to_usd=Decimal("1.25"))
+        ExchangeRate.objects.create(date=date(2025, 2, 15), currency="EUR", rate_to_usd=Decimal("2"))
+        ExchangeRate.objects.create(date=date(2025, 3, 1), currency="EUR", rate_to_usd=Decimal("4"))
+
+        with self.assertNumQueries(4):
+            response = self.client.get('/reports/overview-data/?currency=eur')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['currency'], 'EUR')
+        january = response.data['monthly_data']['2025-01']
+        self.assertEqual(january['budget'], Decimal('4000.00'))
+        self.assertEqual(january['Food'], Decimal('120.40'))
+        self.assertEqual(january['Recurring'], {'Rent': Decimal('1600.00')})
+        february = response.data['monthly_data']['2025-02']
+        self.assertEqual(february['Food'], Decimal('10.00'))
+        self.assertEqual(february['Recurring'], {'Rent': Decimal('1000.00')})
+
+        # Stored amounts are untouched; USD is still the default
+        self.assertEqual(self.client.get('/reports/overview-data/').data['monthly_data']['2025-01']['Food'],
+                         Decimal('150.50'))
+        self.assertEqual(self.client.get('/reports/overview-data/?currency=XYZ').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        mock_get.assert_not_called()
+
+
+class MonthlyCategoryRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rollup_user", password="testpassword")
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        self.fun = Category.objects.create(category="Fun", user=self.user)
+        self.tickets = Subcategory.objects.create(subcategory_name="Tickets", category=self.fun, user=self.user)
+
+    def create_transaction(self, category, subcategory, amount, date):
+        return Transaction.objects.create(
+            user=self.user,
+            category=category,
+            subcategory=subcategory,
+            amount_currency=Decimal(amount),
+            currency="USD",
+            description="Test transaction",
+            date=date
+        )
+
+    def bucket(self, month, category, subcategory):
+        return MonthlyCategoryRollup.objects.filter(
+            user=self.user, month=month, category=category, subcategory=subcategory
+        ).values_list('total_usd', 'transaction_count').first()
+
+    def test_rollup_follows_create_update_and_delete(self):
+        first = self.create_transaction(self.food, self.groceries, '100.00', "2025-01-05")
+        self.create_transaction(self.food, self.groceries, '25.00', "2025-01-10")
+        self.assertEqual(self.bucket(date(2025, 1, 1), self.food, self.groceries), (Decimal('125.00'), 2))
+
+        first.amount_currency = Decimal('60.00')
+        first.date = "2025-02-01"
+        first.save()
+        self.assertEqual(self.bucket(date(2025, 1, 1), self.food, self.groceries), (Decimal('25.00'), 1))
+        self.assertEqual(self.bucket(date(2025, 2, 1), self.food, self.groceries), (Decimal('60.00'), 1))
+
+        first.delete()
+        self.assertIsNone(self.bucket(date(2025, 2, 1), self.food, self.groceries))
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    def test_category_delete_moves_rollups_to_uncategorized(self):
+        misc = Category.objects.create(category="Misc", user=self.user)
+        transaction = self.create_transaction(misc, self.groceries, '40.00', "2025-01-05")
+
+        misc.delete()
+
+        transaction.refresh_from_db()
+        uncategorized = Category.objects.get(category="Uncategorized")
+        self.assertEqual(transaction.category, uncategorized)
+        self.assertEqual(self.bucket(date(2025, 1, 1), uncategorized, self.groceries), (Decimal('40.00'), 1))
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    def test_rebuild_command_repairs_and_verifies_rollups(self):
+        self.create_transaction(self.food, self.groceries, '100.00', "2025-01-05")
+        self.create_transaction(self.fun, self.tickets, '30.00', "2025-03-05")
+        MonthlyCategoryRollup.objects.all().update(total_usd=0)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_monthly_rollups', '--verify', stdout=StringIO())
+
+        call_command('rebuild_monthly_rollups', stdout=StringIO())
+        call_command('rebuild_monthly_rollups', '--verify', stdout=StringIO())
+        self.assertEqual(self.bucket(date(2025, 1, 1), self.food, self.groceries), (Decimal('100.00'), 1))
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="forecast_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        self.travel = Category.objects.create(category="Travel", user=self.user)
+        self.trains = Subcategory.objects.create(subcategory_name="Trains", category=self.travel, user=self.user)
+
+        # Two years of groceries at 100 a month, 300 in December
+        for step in range(24):
+            month = date(2023, 1, 1) + relativedelta(months=step)
+            self.add(self.groceries, '300.00' if month.month == 12 else '100.00', month)
+        # Three months of trains
+        for step, amount in enumerate(['50.00', '70.00', '60.00']):
+            self.add(self.trains, amount, date(2024, 10, 5) + relativedelta(months=step))
+
+    def add(self, subcategory, amount, on_date, description="Test transaction"):
+        return Transaction.objects.create(user=self.user, category=subcategory.category, subcategory=subcategory,
+                                          amount_currency=Decimal(amount), currency="USD",
+                                          description=description, date=on_date)
+
+    def test_projects_seasonal_and_short_series(self):
+        forecast = build_forecast(self.user, months=12, today=date(2025, 1, 15))
+
+        self.assertEqual(forecast['months'][0], '2025-01')
+        self.assertEqual(forecast['months'][-1], '2025-12')
+        food, travel = forecast['categories']
+        self.assertEqual(food['category'], "Food")
+        self.assertEqual(food['forecast_usd'][:11], [Decimal('100.00')] * 11)
+        self.assertEqual(food['forecast_usd'][11], Decimal('300.00'))
+        # Too short for seasonality: the median of what there is
+        self.assertEqual(travel['forecast_usd'], [Decimal('60.00')] * 12)
+        self.assertEqual(forecast['total_usd'][0], Decimal('160.00'))
+
+    def test_flags_unusually_large_transactions(self):
+        for day, amount in enumerate(['40.00', '45.00', '50.00', '55.00', '60.00', '48.00', '52.00', '47.00'], 1):
+            self.add(self.groceries, amount, date(2025, 2, day), description="Market")
+        splurge = self.add(self.groceries, '900.00', date(2025, 2, 20), description="Party")
+        self.add(self.trains, '400.00', date(2025, 2, 21))  # Too few trains to judge
+
+        anomalies = build_forecast(self.user, today=date(2025, 2, 28))['anomalies']
+
+        self.assertEqual([anomaly['id'] for anomaly in anomalies], [splurge.id])
+        self.assertEqual(anomalies[0]['typical_amount_usd'], Decimal('100.00'))
+        self.assertGreater(anomalies[0]['score'], 3.5)
+
+    def test_robust_z_scores_match_a_per_group_computation(self):
+        generator = np.random.default_rng(7)
+        groups = generator.integers(0, 20, 2000)
+        values = generator.lognormal(3, 1, 2000).round(2)
+
+        scores, medians = robust_z_scores(groups, values)
+
+        for group in np.unique(groups):
+            members = groups == group
+            median = np.median(values[members])
+            mad = np.median(np.abs(values[members] - median))
+            np.testing.assert_allclose(medians[members], median)
+            np.testing.assert_allclose(scores[members], 0.6745 * (values[members] - median) / mad)
+
+    def test_endpoint_is_cached_and_query_count_is_constant(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/reports/forecast/', {'months': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['months']), 2)
+        self.assertEqual(len(response.data['total_usd']), 2)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/reports/forecast/', {'months': 2}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalid_months(self):
+        for months in ('0', '25', 'soon'):
+            response = self.client.get('/reports/forecast/', {'months': months})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="export_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        self.fun = Category.objects.create(category="Fun", user=self.user)
+        self.tickets = Subcategory.objects.create(subcategory_name="Tickets", category=self.fun, user=self.user)
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="EUR", rate_to_usd=Decimal("1.25"))
+
+        for category, subcategory, amount, day, description in [
+            (self.food, self.groceries, '10.00', "2025-01-05", "Market"),
+            (self.food, self.groceries, '15.00', "2025-02-05", 'Bakery, "fresh"'),
+            (self.fun, self.tickets, '50.00', "2025-02-10", "Concert"),
+        ]:
+            Transaction.objects.create(user=self.user, category=category, subcategory=subcategory,
+                                       amount_currency=Decimal(amount), currency="USD",
+                                       description=description, date=day)
+
+    def csv_rows(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(StringIO(content)))
+
+    def test_transaction_csv_uses_profile_currency_and_filters(self):
+        Profile.objects.create(user=self.user, reporting_currency="EUR")
+
+        response = self.client.get(f'/transactions/export/?start_date=2025-02-01&category={self.food.id}')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment; filename="transactions.csv"', response['Content-Disposition'])
+        self.assertEqual(self.csv_rows(response), [
+            ['date', 'description', 'amount', 'currency', 'category', 'subcategory', 'budget', 'amount_eur'],
+            ['2025-02-05', 'Bakery, "fresh"', '15.00', 'USD', 'Food', 'Groceries', '', '12.00'],
+        ])
+
+    def test_transaction_xlsx_is_a_readable_workbook(self):
+        response = self.client.get('/transactions/export/?format=xlsx')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        workbook = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('xl/workbook.xml', workbook.namelist())
+        sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        namespace = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = sheet.findall('.//s:row', namespace)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1].find('s:c/s:is/s:t', namespace).text, '2025-01-05')
+
+    def test_report_csv_has_monthly_totals(self):
+        response = self.client.get('/reports/export/?currency=eur')
+
+        self.assertEqual(self.csv_rows(response), [
+            ['month', 'category', 'subcategory', 'transactions', 'total_eur'],
+            ['2025-01', 'Food', 'Groceries', '1', '8.00'],
+            ['2025-02', 'Food', 'Groceries', '1', '12.00'],
+            ['2025-02', 'Fun', 'Tickets', '1', '40.00'],
+        ])
+
+    def test_csv_text_cannot_start_a_formula(self):
+        Transaction.objects.create(user=self.user, category=self.food, subcategory=self.groceries,
+                                   amount_currency=Decimal('-5.00'), currency="USD",
+                                   description='=HYPERLINK("http://example.com")', date="2025-03-01")
+
+        rows = self.csv_rows(self.client.get('/transactions/export/?start_date=2025-03-01'))
+
+        self.assertEqual(rows[1][1:3], ['\'=HYPERLINK("http://example.com")', '-5.00'])
+
+    def test_csv_is_streamed_chunk_by_chunk_under_asgi(self):
+        produced, sent = [], []
+
+        def counting_csv_stream(header, rows):
+            for chunk in csv_stream(header, rows):
+                produced.append(chunk)
+                yield chunk
+
+        requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()  # The client stays connected
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and message.get('body'):
+                sent.append(len(produced))
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': '/transactions/export/', 'raw_path': b'/transactions/export/', 'query_string': b'',
+            'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver'),
+                        (b'authorization', f'Bearer {AccessToken.for_user(self.user)}'.encode())],
+        }
+        # As the test client does: closing connections would end the test's transaction
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with patch('reports_app.exports.STREAM_ROWS_PER_CHUNK', 1), \
+                    patch('reports_app.exports.csv_stream', counting_csv_stream):
+                async_to_sync(ASGIHandler())(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        # Every chunk goes out before the next one is produced
+        self.assertEqual(len(produced), 3)
+        self.assertEqual(sent, [1, 2, 3])
+
+    def test_invalid_filters_are_reported_as_json(self):
+        response = self.client.get('/reports/export/?currency=XYZ')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('currency', json.loads(response.content))
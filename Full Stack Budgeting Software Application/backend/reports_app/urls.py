@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import OverviewDataView
+from .views import OverviewDataView, ForecastView, ReportExportView
 
 urlpatterns = [
     path('overview-data/', OverviewDataView.as_view(), name='overview-data'),
+    path('forecast/', ForecastView.as_view(), name='reports-forecast'),
+    path('export/', ReportExportView.as_view(), name='reports-export'),
 ]
\ No newline at end of file
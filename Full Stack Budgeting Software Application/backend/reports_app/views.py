@@ -1,97 +1,48 @@
-from rest_framework.exceptions import NotFound
-from transactions_app.models import Transaction
-from budgets_app.models import Budget
-from categories_app.models import Category
-from subcategories_app.models import Subcategory
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from decimal import Decimal
+from accounts.authentication import CachedJWTAuthentication
+from .services import build_overview
+from .forecast import build_forecast, forecast_months
+from euniceproj.response_cache import cached_response
+from .exports import (
+    CSVExportRenderer, XLSXExportRenderer, export_response, parse_currency, parse_export_filters, report_export
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 class OverviewDataView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
+    @cached_response
     def get(self, request):
-        user = request.user
-        transactions = Transaction.objects.filter(user=user)
-        budgets = Budget.objects.filter(user=user)
+        # Monthly totals come from the incrementally maintained rollup table, not a scan of every transaction
+        # ?currency=<code> converts them with stored rate snapshots (default USD)
+        overview = build_overview(request.user, parse_currency(request.query_params.get('currency', 'USD')))
+        logger.debug("Overview for user %s covers %d months", request.user.id, len(overview['months']))
 
-        # Debug log all transactions
-        logger.info(f"All transactions: {[f'{t.category.category}: {t.amount_usd} USD ({t.date})' for t in transactions]}")
+        return Response(overview)
 
-        monthly_data = {}
-        months = []
 
-        # First, set up months and their budgets from the budgets table
-        for budget in budgets:
-            month_key = budget.start_date.strftime('%Y-%m')
-            if month_key not in months:
-                months.append(month_key)
-            monthly_data[month_key] = {'budget': budget.total_limit}
-
-        # Add any additional months from transactions
-        for transaction in transactions:
-            month_key = transaction.date.strftime('%Y-%m')
-            if month_key not in months:
-                months.append(month_key)
-                monthly_data[month_key] = {}
-
-        # Handle regular transactions
-        for transaction in transactions:
-            if transaction.category.category != 'Recurring':  # Skip recurring transactions for now
-                month_key = transaction.date.strftime('%Y-%m')
-                category_name = transaction.category.category
-                logger.info(f"Processing transaction: {category_name} - {transaction.amount_usd} USD for {month_key}")
-                
-                if category_name in monthly_data[month_key]:
-                    monthly_data[month_key][category_name] += transaction.amount_usd
-                else:
-                    monthly_data[month_key][category_name] = transaction.amount_usd
-                logger.info(f"Monthly data after processing: {monthly_data[month_key]}")
-
-        # Get available non-recurring categories
-        available_categories = set()
-        for transaction in transactions:
-            if transaction.category.category != 'Recurring':
-                available_categories.add(transaction.category.category)
-        filtered_categories = list(available_categories)
-        logger.info(f"Available categories: {filtered_categories}")
-
-        # Handle Recurring transactions
-        try:
-            recurring_category = Category.objects.get(category='Recurring')
-            recurring_transactions = Transaction.objects.filter(
-                user=user,
-                category=recurring_category
-            )
+class ForecastView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
 
-            # Process recurring transactions
-            for transaction in recurring_transactions:
-                month_key = transaction.date.strftime('%Y-%m')
-                
-                # Initialize Recurring category if not exists
-                if 'Recurring' not in monthly_data[month_key]:
-                    monthly_data[month_key]['Recurring'] = {}
+    @cached_response
+    def get(self, request):
+        # ?months=<1-24>; projections per category from the current month on, plus unusually large transactions
+        return Response(build_forecast(request.user, forecast_months(request.query_params)))
 
-                subcategory_name = transaction.subcategory.subcategory_name
-                if subcategory_name in monthly_data[month_key]['Recurring']:
-                    monthly_data[month_key]['Recurring'][subcategory_name] += transaction.amount_usd
-                else:
-                    monthly_data[month_key]['Recurring'][subcategory_name] = transaction.amount_usd
 
-        except Category.DoesNotExist:
-            pass  # No recurring category exists
+class ReportExportView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVExportRenderer, XLSXExportRenderer]
 
-        months = sorted(list(set(months)))
-        logger.info(f"Final monthly_data: {monthly_data}")
-        
-        return Response({
-            'monthly_data': monthly_data,
-            'months': months,
-            'filtered_categories': filtered_categories
-        })
+    def get(self, request):
+        # ?format=csv|xlsx&start_date=&end_date=&category=<id>&currency=<code>
+        filters = parse_export_filters(request.user, request.query_params)
+        header, rows = report_export(request.user, **filters)
+        return export_response(request.accepted_renderer.format, 'monthly-report', header, rows, 'Monthly report')
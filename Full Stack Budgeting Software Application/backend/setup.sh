@@ -23,7 +23,10 @@ python manage.py migrate || {
   python manage.py migrate --noinput; 
 }
 
+python manage.py refresh_exchange_rates || echo "Exchange rate refresh failed - using stored or fallback rates."
 python setup_data.py
+python manage.py materialize_recurring_transactions # Also run daily (e.g. cron) to create due recurring transactions
+python manage.py partition_transactions ensure --if-partitioned # Also run daily once app_transactions is partitioned
 
 # python test_setup_data.py
 
@@ -48,7 +51,10 @@ python setup_data.py
 # print(f'Admin Token: {token.key}')
 # "
 
-python manage.py runserver 0.0.0.0:8000
+python manage.py runworker & # Background jobs: recurring materialization, rate refreshes, queued Wolfram lookups
+
+# Served through euniceproj/asgi.py so the async views (e.g. /wolfram/) share one event loop
+uvicorn euniceproj.asgi:application --host 0.0.0.0 --port 8000 --lifespan off
 
 ##################################################################################################
 ### For AWS ######################################################################################
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories_app', '0005_alter_category_category'),
+        ('subcategories_app', '0004_alter_subcategory_subcategory_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subcategory',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='subcategories', to='categories_app.category'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories_app', '0005_alter_category_category'),
+        ('subcategories_app', '0005_alter_subcategory_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Same uniqueness, with the user as the leading column of its index
+        migrations.RemoveConstraint(
+            model_name='subcategory',
+            name='unique_subcategory_per_category_and_user',
+        ),
+        migrations.AddConstraint(
+            model_name='subcategory',
+            constraint=models.UniqueConstraint(fields=('user', 'category', 'subcategory_name'), name='unique_subcategory_per_category_and_user'),
+        ),
+    ]
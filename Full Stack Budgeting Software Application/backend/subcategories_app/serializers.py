@@ -8,3 +8,16 @@ class SubcategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Subcategory
         fields = ['id', 'subcategory_name', 'category']
+
+    def validate(self, attrs):
+        # Names are unique per user within a category
+        request = self.context.get('request')
+        name = attrs.get('subcategory_name', getattr(self.instance, 'subcategory_name', None))
+        category = attrs.get('category', getattr(self.instance, 'category', None))
+        if request is not None:
+            subcategories = Subcategory.objects.for_user(request.user, category).filter(subcategory_name=name)
+            if self.instance is not None:
+                subcategories = subcategories.exclude(pk=self.instance.pk)
+            if subcategories.exists():
+                raise serializers.ValidationError("You already have this subcategory in this category.")
+        return attrs
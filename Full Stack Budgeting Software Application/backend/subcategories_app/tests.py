@@ -1,14 +1,26 @@
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.test import TestCase
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from unittest import skipUnless
 from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from euniceproj.testing import QueryPlanAssertions
 from .models import Subcategory
 from categories_app.models import Category
+from categories_app.services import ProtectedCategoryError, delete_category, reassign_category
+from transactions_app.models import Transaction
+from reports_app.models import MonthlyCategoryRollup
 from decimal import Decimal
+from datetime import date
+from dateutil.relativedelta import relativedelta
 from django.urls import reverse
 from django.contrib.auth.models import User
 from dotenv import load_dotenv
 import os 
 import json 
+import time
 
 load_dotenv()
 
@@ -83,4 +95,203 @@ class SubcategoryTests(APITestCase):
 
     def test_delete_non_existent_subcategory(self):
         response = self.client.delete(reverse('subcategory-by-id', kwargs={'pk': 99999})) 
-        self.assertIn(response.status_code, [status.HTTP_404_NOT_FOUND, status.HTTP_204_NO_CONTENT])
\ No newline at end of file
+        self.assertIn(response.status_code, [status.HTTP_404_NOT_FOUND, status.HTTP_204_NO_CONTENT])
+
+class CategoryDeleteReassignmentTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reassign_user", password="testpassword")
+        uncategorized = Category.objects.create(category="Uncategorized", user=self.user)
+        Subcategory.objects.create(subcategory_name="Uncategorized", category=uncategorized, user=self.user)
+        self.make_category("Hobbies")
+
+    def make_category(self, name):
+        self.category = Category.objects.create(category=name, user=self.user)
+        self.painting = Subcategory.objects.create(subcategory_name="Painting", category=self.category, user=self.user)
+        self.climbing = Subcategory.objects.create(subcategory_name="Climbing", category=self.category, user=self.user)
+
+    def add_transactions(self, count, month=date(2025, 1, 1), months=1):
+        # bulk_create skips the rollup signals, so rebuild the rollup afterwards
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user, category=self.category,
+                subcategory=self.painting if i % 2 else self.climbing,
+                amount_currency=Decimal('5.00'), amount_usd=Decimal('5.00'), currency='USD',
+                description=f"Hobby {i}",
+                date=month + relativedelta(months=i // 2 % months, days=i % 28)
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        MonthlyCategoryRollup.objects.rebuild(self.user)
+
+    def delete_category(self):
+        with CaptureQueriesContext(connection) as queries:
+            delete_category(self.category)
+        return len(queries)
+
+    def test_transactions_survive_and_move_to_uncategorized(self):
+        self.add_transactions(10)
+
+        self.category.delete()
+
+        uncategorized = Subcategory.objects.get(
+            category__category="Uncategorized", subcategory_name="Uncategorized", user=self.user
+        )
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 10)
+        self.assertEqual(
+            Transaction.objects.filter(user=self.user, category=uncategorized.category, subcategory=uncategorized).count(), 10
+        )
+        self.assertFalse(Subcategory.objects.filter(pk__in=[self.painting.pk, self.climbing.pk]).exists())
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    def test_each_user_gets_their_own_uncategorized_subcategory(self):
+        other = User.objects.create_user(username="reassign_other", password="testpassword")
+        self.add_transactions(4)
+        Transaction.objects.create(
+            user=other, category=self.category, subcategory=Subcategory.objects.create(
+                subcategory_name="Knitting", category=self.category, user=other
+            ),
+            amount_currency=Decimal('3.00'), amount_usd=Decimal('3.00'), currency='USD',
+            description="Yarn", date=date(2025, 1, 3)
+        )
+
+        delete_category(self.category)
+
+        for user, count in ((self.user, 4), (other, 1)):
+            uncategorized = Subcategory.objects.get(subcategory_name="Uncategorized", user=user)
+            self.assertEqual(Transaction.objects.filter(user=user, subcategory=uncategorized).count(), count)
+            self.assertEqual(MonthlyCategoryRollup.objects.verify(user), [])
+
+    def test_service_returns_summary(self):
+        self.add_transactions(6)
+
+        summary = reassign_category(self.category)
+
+        self.assertEqual(summary['reassigned_transactions'], 6)
+        self.assertEqual(summary['deleted_subcategories'], 2)
+        self.assertEqual(summary['uncategorized_category_id'], Category.objects.get(category="Uncategorized").id)
+
+    def test_delete_view_returns_summary(self):
+        self.add_transactions(6)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.delete('/categories/Hobbies/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['category_name'], "Hobbies")
+        self.assertEqual(response.data['reassigned_transactions'], 6)
+        self.assertEqual(response.data['deleted_subcategories'], 2)
+        self.assertFalse(Category.objects.filter(category="Hobbies").exists())
+
+    def test_uncategorized_cannot_be_deleted(self):
+        self.add_transactions(2)
+        delete_category(self.category)
+        uncategorized = Category.objects.get(category="Uncategorized")
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.delete('/categories/Uncategorized/')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertRaises(ProtectedCategoryError), transaction.atomic():
+            uncategorized.delete()
+        self.assertEqual(Transaction.objects.filter(user=self.user, category=uncategorized).count(), 2)
+
+    def test_query_count_does_not_depend_on_transaction_count(self):
+        self.add_transactions(5)
+        few = self.delete_category()
+
+        self.make_category("Crafts")
+        self.add_transactions(500, month=date(2025, 2, 1))
+        self.assertEqual(self.delete_category(), few)
+
+    def test_query_count_does_not_depend_on_rollup_bucket_count(self):
+        self.add_transactions(4)
+        few = self.delete_category()
+        self.assertEqual(MonthlyCategoryRollup.objects.filter(user=self.user).count(), 1)
+
+        # Two subcategories over 24 months: 48 buckets, several merging into existing ones
+        self.make_category("Crafts")
+        self.add_transactions(480, month=date(2024, 1, 1), months=24)
+        self.assertEqual(MonthlyCategoryRollup.objects.filter(category=self.category).count(), 48)
+        self.assertEqual(self.delete_category(), few)
+        self.assertEqual(MonthlyCategoryRollup.objects.filter(user=self.user).count(), 24)
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    @skipUnless(os.getenv('RUN_BENCHMARKS'), "Set RUN_BENCHMARKS=1 to run benchmarks")
+    def test_benchmark_delete_category_with_100k_transactions(self):
+        self.add_transactions(5)
+        few = self.delete_category()
+        self.make_category("Crafts")
+        self.add_transactions(100_000, months=12)
+
+        started = time.perf_counter()
+        queries = self.delete_category()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(queries, few)
+        self.assertLess(elapsed, 10)
+        self.assertEqual(Transaction.objects.filter(user=self.user, category__category="Uncategorized").count(), 100_005)
+
+
+class SubcategoryOwnershipTests(QueryPlanAssertions, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="subcategory_owner", password="testpassword")
+        self.other_user = User.objects.create_user(username="subcategory_other", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.home = Category.objects.create(category="Home", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        Subcategory.objects.create(subcategory_name="Rent", category=self.home, user=self.user)
+        self.others = Subcategory.objects.create(subcategory_name="Snacks", category=self.food, user=self.other_user)
+
+    def test_list_and_lookup_are_the_users_own(self):
+        response = self.client.get('/subcategories/')
+        self.assertEqual(sorted(item['subcategory_name'] for item in response.data), ["Groceries", "Rent"])
+        response = self.client.get('/subcategories/', {'category_id': self.food.id})
+        self.assertEqual([item['subcategory_name'] for item in response.data], ["Groceries"])
+
+        self.assertEqual(self.client.get(f'/subcategories/{self.groceries.id}/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(f'/subcategories/{self.others.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(f'/subcategories/{self.others.id}/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_names_are_unique_per_user_and_category(self):
+        # Another user's "Snacks" does not get in the way
+        response = self.client.post('/subcategories/', {'subcategory_name': "Snacks", 'category': self.food.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Subcategory.objects.get(pk=response.data['id']).user, self.user)
+
+        response = self.client.post('/subcategories/', {'subcategory_name': "Snacks", 'category': self.food.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/subcategories/', {'subcategory_name': "Snacks", 'category': self.home.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_transactions_only_accept_the_users_own_subcategories(self):
+        data = {'category': self.food.id, 'subcategory': self.others.id, 'amount_currency': '4.00',
+                'currency': 'USD', 'description': "Chips", 'date': '2025-01-12'}
+        response = self.client.post('/transactions/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('subcategory', response.data)
+
+        response = self.client.post('/transactions/', {**data, 'subcategory': self.groceries.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.put(f"/transactions/{response.data['id']}/", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('subcategory', response.data)
+
+    def test_lookups_use_the_per_user_index(self):
+        users = User.objects.bulk_create(User(username=f"tenant_{index}") for index in range(200))
+        Subcategory.objects.bulk_create(
+            Subcategory(subcategory_name=name, category=category, user=user)
+            for user in users for category in (self.food, self.home) for name in ("A", "B", "C")
+        )
+
+        index = 'unique_subcategory_per_category_and_user'
+        self.assertUsesIndex(Subcategory.objects.for_user(self.user), index)
+        self.assertUsesIndex(Subcategory.objects.for_user(self.user, self.food), index)
+        self.assertUsesIndex(Subcategory.objects.for_user(self.user, self.food).filter(subcategory_name="Groceries"), index)
+
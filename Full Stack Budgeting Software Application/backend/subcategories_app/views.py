@@ -7,18 +7,20 @@ from categories_app.models import Category
 from .serializers import SubcategorySerializer
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
+from euniceproj.response_cache import cached_response
 
 class SubcategoryView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_object(self, pk):
         try:
-            return Subcategory.objects.get(pk=pk)
+            return Subcategory.objects.for_user(self.request.user).get(pk=pk)
         except Subcategory.DoesNotExist:
             raise NotFound(detail="Subcategory not found", code=404)
 
+    @cached_response
     def get(self, request, pk=None):
         category_id = request.query_params.get('category_id')
 
@@ -28,29 +30,29 @@ class SubcategoryView(APIView):
             serializer = SubcategorySerializer(subcategory)
             return Response(serializer.data)
         
-        # List all subcategories, filtered by category_id if provided
+        # List the user's subcategories, filtered by category_id if provided
         if category_id:
             try:
                 category = Category.objects.get(pk=category_id)
-                subcategories = Subcategory.objects.filter(category=category)
+                subcategories = Subcategory.objects.for_user(request.user, category)
             except Category.DoesNotExist:
                 return Response([], status=status.HTTP_200_OK) # Return empty list if category does not exist.
         else:
-            subcategories = Subcategory.objects.all()
+            subcategories = Subcategory.objects.for_user(request.user)
 
         serializer = SubcategorySerializer(subcategories, many=True)
         return Response(serializer.data)
 
     def post(self, request):
-        serializer = SubcategorySerializer(data=request.data)
+        serializer = SubcategorySerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def put(self, request, pk):
         subcategory = self.get_object(pk)
-        serializer = SubcategorySerializer(subcategory, data=request.data)
+        serializer = SubcategorySerializer(subcategory, data=request.data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,245 @@
+from django.db import connections, transaction
+from django.db.models.sql import DeleteQuery
+from django.utils import timezone
+from rest_framework import serializers
+from budgets_app.models import Budget
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from currencies_app.registry import currency_registry
+from currencies_app.services import ExchangeRateUnavailable, RateTable
+from euniceproj.response_cache import bump_data_version
+from reports_app.models import MonthlyCategoryRollup
+from .fast_serializers import represent, transaction_rows
+from .importers import MAX_AMOUNT
+from .models import Transaction
+
+MAX_BATCH_OPERATIONS = 1000
+OPERATIONS = ('create', 'update', 'delete')
+
+# Changing any of these changes the stored USD amount
+CONVERSION_FIELDS = {'amount_currency', 'currency', 'date'}
+RELATIONS = ('category', 'subcategory', 'budget')
+
+
+class BatchError(ValueError):
+    """The request body as a whole is unusable, e.g. not a list of operations."""
+
+
+class BatchTransactionSerializer(serializers.Serializer):
+    """Field-level checks of one create/update; relations are checked against preloaded maps."""
+    category = serializers.IntegerField()
+    subcategory = serializers.IntegerField()
+    amount_currency = serializers.DecimalField(max_digits=10, decimal_places=2)
+    currency = serializers.CharField(max_length=3, default='USD')
+    description = serializers.CharField(max_length=200)
+    date = serializers.DateField()
+    budget = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate_currency(self, value):
+        # Checked against the in-process registry; never triggers a network call
+        if value not in currency_registry:
+            raise serializers.ValidationError(f"Currency '{value}' is not supported.")
+        return value
+
+
+def delete_returning_ids(queryset):
+    """DELETE the rows of ``queryset`` without signals or cascades, like ``_raw_delete``; returns the deleted ids."""
+    query = queryset.query.clone()
+    query.__class__ = DeleteQuery
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {connection.ops.quote_name(queryset.model._meta.pk.column)}", params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def does_not_exist(pk):
+    return [f'Invalid pk "{pk}" - object does not exist.']
+
+
+class TransactionBatch:
+    """Validate a list of create/update/delete operations for ``user`` and apply them atomically.
+
+    Every operation is validated before anything is written. The transactions, categories,
+    subcategories and budgets they refer to are loaded with one query each, and the
+    writes are one ``bulk_create``, one ``bulk_update`` and one DELETE, plus one update
+    per touched monthly rollup bucket. Either every operation is applied or none is, and the
+    updated and deleted rows are locked (``SELECT ... FOR UPDATE``) from the moment they are read.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def parse(self, operations):
+        if not isinstance(operations, list) or not operations:
+            raise BatchError("Send a non-empty list of operations in 'operations'.")
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            raise BatchError(f"A batch is limited to {MAX_BATCH_OPERATIONS} operations.")
+
+        parsed = []
+        for operation in operations:
+            if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+                parsed.append({'op': None, 'errors': {'op': [f"Use one of: {', '.join(OPERATIONS)}."]}})
+                continue
+            item = {'op': operation['op'], 'id': operation.get('id'), 'errors': {}}
+            if item['op'] != 'create' and not isinstance(item['id'], int):
+                item['errors']['id'] = ["A transaction id is required."]
+            if item['op'] != 'delete':
+                serializer = BatchTransactionSerializer(data=operation.get('data') or {}, partial=item['op'] == 'update')
+                if serializer.is_valid():
+                    item['data'] = serializer.validated_data
+                else:
+                    item['errors'].update(serializer.errors)
+            parsed.append(item)
+        return parsed
+
+    def load(self, items):
+        """Fetch every row and exchange rate the operations refer to: five queries, whatever the batch size."""
+        ids = [item['id'] for item in items if item['op'] in ('update', 'delete') and not item['errors']]
+        self.existing = {
+            obj.pk: obj
+            for obj in Transaction.objects.filter(user=self.user, pk__in=ids).select_for_update().order_by('pk')
+        }
+
+        data = [item['data'] for item in items if 'data' in item]
+        current = list(self.existing.values())
+        self.categories = Category.objects.in_bulk(
+            {fields['category'] for fields in data if 'category' in fields}
+            | {transaction_obj.category_id for transaction_obj in current}
+        )
+        self.subcategories = Subcategory.objects.for_user(self.user).in_bulk(
+            {fields['subcategory'] for fields in data if 'subcategory' in fields}
+            | {transaction_obj.subcategory_id for transaction_obj in current}
+        )
+        self.budgets = Budget.objects.for_user(self.user).in_bulk(
+            {fields['budget'] for fields in data if fields.get('budget') is not None}
+            | {transaction_obj.budget_id for transaction_obj in current if transaction_obj.budget_id}
+        )
+        self.rates = RateTable()
+        self.rates.load({fields.get('currency', 'USD') for fields in data} | {obj.currency for obj in current})
+
+    def check(self, item, seen):
+        """Relation and cross-field checks of one operation; returns the transaction it acts on."""
+        errors = item['errors']
+        transaction_obj = None
+        if item['op'] is None:
+            return None
+        if item['op'] != 'create':
+            transaction_obj = self.existing.get(item['id'])
+            if transaction_obj is None:
+                errors.setdefault('id', ["Transaction not found."])
+                return None
+            if item['id'] in seen:
+                errors.setdefault('id', ["The transaction appears in more than one operation."])
+            seen.add(item['id'])
+        if item['op'] == 'delete' or errors:
+            return transaction_obj
+
+        # The values the row will have: the stored ones overlaid with the operation's fields
+        fields = item['data']
+        category_id = fields.get('category', transaction_obj and transaction_obj.category_id)
+        subcategory_id = fields.get('subcategory', transaction_obj and transaction_obj.subcategory_id)
+        budget_id = fields['budget'] if 'budget' in fields else transaction_obj and transaction_obj.budget_id
+        on_date = fields.get('date', transaction_obj and transaction_obj.date)
+
+        category = self.categories.get(category_id)
+        subcategory = self.subcategories.get(subcategory_id)
+        budget = self.budgets.get(budget_id) if budget_id else None
+        if category is None:
+            errors['category'] = does_not_exist(category_id)
+        if subcategory is None:
+            errors['subcategory'] = does_not_exist(subcategory_id)
+        if budget_id and budget is None:
+            errors['budget'] = does_not_exist(budget_id)
+        if errors:
+            return transaction_obj
+
+        non_field_errors = []
+        if budget is not None and not budget.start_date <= on_date <= budget.end_date:
+            non_field_errors.append("Transaction date must be within the budget's timeframe.")
+        if subcategory.category_id != category.id:
+            non_field_errors.append(
+                f"Subcategory '{subcategory.subcategory_name}' does not belong to category '{category.category}'"
+            )
+        if non_field_errors:
+            errors['non_field_errors'] = non_field_errors
+        currency = fields.get('currency', transaction_obj.currency if transaction_obj else 'USD')
+        if item['op'] == 'create' or CONVERSION_FIELDS & fields.keys():
+            if self.rates.rate(currency, on_date) is None:
+                errors['currency'] = [str(ExchangeRateUnavailable(currency.upper(), on_date))]
+                return transaction_obj
+            amount = fields.get('amount_currency', transaction_obj and transaction_obj.amount_currency)
+            item['amount_usd'] = self.rates.convert(amount, currency, on_date)
+            if item['amount_usd'] >= MAX_AMOUNT:
+                errors['amount_currency'] = [f"Amount {amount} {currency} is too large once converted to USD."]
+        return transaction_obj
+
+    def run(self, operations):
+        """Apply ``operations``; returns ``(applied, results)`` with one result per operation, in order."""
+        items = self.parse(operations)
+        # The rows stay locked from load() to the writes, so the amounts taken out of the rollup
+        # are the stored ones, not those of a snapshot a concurrent PUT or DELETE has changed
+        with transaction.atomic():
+            self.load(items)
+            seen = set()
+            targets = [self.check(item, seen) for item in items]
+            if any(item['errors'] for item in items):
+                # 424 Failed Dependency: valid, but not applied because another operation is invalid
+                return False, [
+                    {'op': item['op'], 'status': 400, 'errors': item['errors']} if item['errors']
+                    else {'op': item['op'], 'status': 424}
+                    for item in items
+                ]
+
+            creates, updates, previous, deletes = [], [], [], []
+            update_fields = {'updated_at'}
+            for item, transaction_obj in zip(items, targets):
+                if item['op'] == 'delete':
+                    deletes.append(transaction_obj)
+                    continue
+                fields = {
+                    f'{name}_id' if name in RELATIONS else name: value for name, value in item['data'].items()
+                }
+                if item['op'] == 'create':
+                    transaction_obj = Transaction(user_id=self.user.id, **fields)
+                    creates.append(transaction_obj)
+                else:
+                    # The rollup bucket and amount the row counted toward before this update
+                    previous.append(Transaction(
+                        user_id=transaction_obj.user_id, date=transaction_obj.date,
+                        category_id=transaction_obj.category_id, subcategory_id=transaction_obj.subcategory_id,
+                        amount_usd=transaction_obj.amount_usd,
+                    ))
+                    for name, value in fields.items():
+                        setattr(transaction_obj, name, value)
+                    transaction_obj.updated_at = timezone.now()
+                    update_fields.update(fields)
+                    updates.append(transaction_obj)
+                if 'amount_usd' in item:
+                    transaction_obj.amount_usd = item['amount_usd']
+                    update_fields.add('amount_usd')
+                item['transaction'] = transaction_obj
+
+            if deletes:
+                # A raw DELETE skips the per-row post_delete rollup signal; the rollup is adjusted once below,
+                # for the rows this statement removed
+                deleted = delete_returning_ids(Transaction.objects.filter(pk__in=[obj.pk for obj in deletes]))
+                MonthlyCategoryRollup.objects.add_transactions([obj for obj in deletes if obj.pk in deleted], sign=-1)
+            if updates:
+                Transaction.objects.bulk_update(updates, sorted(update_fields), batch_size=MAX_BATCH_OPERATIONS)
+                MonthlyCategoryRollup.objects.add_transactions(previous, sign=-1)
+                MonthlyCategoryRollup.objects.add_transactions(updates)
+            if creates:
+                # bulk_create skips the rollup signals, so fold the new rows in explicitly
+                Transaction.objects.bulk_create(creates, batch_size=MAX_BATCH_OPERATIONS)
+                MonthlyCategoryRollup.objects.add_transactions(creates)
+            bump_data_version(self.user.id)
+
+        saved = [obj.pk for obj in creates + updates]
+        rows = {row['id']: row for row in represent(transaction_rows(Transaction.objects.filter(pk__in=saved)))}
+        return True, [
+            {'op': 'delete', 'status': 204, 'id': item['id']} if item['op'] == 'delete'
+            else {'op': item['op'], 'status': 201 if item['op'] == 'create' else 200,
+                  'transaction': rows[item['transaction'].pk]}
+            for item in items
+        ]
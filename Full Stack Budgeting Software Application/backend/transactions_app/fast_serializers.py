@@ -0,0 +1,132 @@
+from decimal import Decimal
+from django.db.models import F
+from currencies_app.services import from_usd_expression
+
+TWO_PLACES = Decimal('0.01')
+
+RECURRING_FIELDS = (
+    'id', 'user_id', 'category_id', 'subcategory_id', 'amount_currency', 'currency',
+    'description', 'start_date', 'end_date', 'frequency', 'day_of_month', 'is_active',
+)
+
+ROW_FIELDS = (
+    'id', 'user_id', 'amount_currency', 'currency', 'description', 'date',
+    'category_id', 'category__category',
+    'subcategory_id', 'subcategory__subcategory_name', 'subcategory__category_id',
+    'budget_id', 'budget__name', 'budget__total_limit', 'budget__start_date', 'budget__end_date',
+    'recurring_transaction_id',
+    *(f'recurring_transaction__{field}' for field in RECURRING_FIELDS[1:]),
+)
+
+
+def transaction_rows(queryset):
+    """``queryset`` as flat dicts, joined with category, subcategory, budget and series."""
+    return queryset.values(*ROW_FIELDS)
+
+
+def with_display_amount(rows, currency):
+    """Add ``amount_display`` to ``transaction_rows``: the USD amount in ``currency`` at each row's date.
+
+    The rates are joined into the same SELECT, so any display currency costs no extra queries.
+    """
+    return rows.annotate(amount_display=from_usd_expression(F('amount_usd'), currency, F('date')))
+
+
+def occurrence_row(occurrence, display_currency=None, rates=None):
+    """The flat row for an unsaved recurring occurrence (see ``recurrence.virtual_occurrences``).
+
+    With ``display_currency``, ``amount_display`` comes from ``rates`` (a ``RateTable``).
+    """
+    series = occurrence.recurring_transaction
+    row = {
+        'id': None,
+        'user_id': occurrence.user_id,
+        'amount_currency': occurrence.amount_currency,
+        'currency': occurrence.currency,
+        'description': occurrence.description,
+        'date': occurrence.date,
+        'category_id': occurrence.category_id,
+        'category__category': occurrence.category.category,
+        'subcategory_id': occurrence.subcategory_id,
+        'subcategory__subcategory_name': occurrence.subcategory.subcategory_name,
+        'subcategory__category_id': occurrence.subcategory.category_id,
+        'budget_id': None,
+        'recurring_transaction_id': series.id,
+    }
+    for field in RECURRING_FIELDS[1:]:
+        row[f'recurring_transaction__{field}'] = getattr(series, field)
+    if display_currency:
+        row['amount_display'] = rates.from_usd(occurrence.amount_usd, display_currency, occurrence.date)
+    return row
+
+
+def decimal_string(value):
+    # Matches DRF's DecimalField(decimal_places=2) with COERCE_DECIMAL_TO_STRING
+    return '{:f}'.format(value.quantize(TWO_PLACES))
+
+
+def represent(rows, display_currency=None):
+    """Serialize flat rows; the output is identical to ``TransactionSerializer(many=True).data``.
+
+    With ``display_currency``, each item also gets the row's ``amount_display`` (see
+    ``with_display_amount``) as ``display_amount`` plus the ``display_currency`` code.
+    """
+    series_cache = {}
+    data = []
+    for row in rows:
+        subcategory = None
+        if row['subcategory_id'] is not None:
+            subcategory = {
+                'id': row['subcategory_id'],
+                'subcategory_name': row['subcategory__subcategory_name'],
+                'category': row['subcategory__category_id'],
+            }
+
+        budget = None
+        if row['budget_id'] is not None:
+            budget = {
+                'id': row['budget_id'],
+                'name': row['budget__name'],
+                'total_limit': decimal_string(row['budget__total_limit']),
+                'start_date': row['budget__start_date'].isoformat(),
+                'end_date': row['budget__end_date'].isoformat(),
+            }
+
+        series_id = row['recurring_transaction_id']
+        series = None
+        if series_id is not None:
+            series = series_cache.get(series_id)
+            if series is None:
+                series = series_cache[series_id] = {
+                    'id': series_id,
+                    'user': row['recurring_transaction__user_id'],
+                    'category': row['recurring_transaction__category_id'],
+                    'subcategory': row['recurring_transaction__subcategory_id'],
+                    'amount_currency': decimal_string(row['recurring_transaction__amount_currency']),
+                    'currency': row['recurring_transaction__currency'],
+                    'description': row['recurring_transaction__description'],
+                    'start_date': row['recurring_transaction__start_date'].isoformat(),
+                    'end_date': row['recurring_transaction__end_date'].isoformat(),
+                    'frequency': row['recurring_transaction__frequency'],
+                    'day_of_month': row['recurring_transaction__day_of_month'],
+                    'is_active': row['recurring_transaction__is_active'],
+                }
+
+        item = {
+            'id': row['id'],
+            'user': row['user_id'],
+            'category': {'id': row['category_id'], 'category': row['category__category']},
+            'subcategory': subcategory,
+            'amount_currency': decimal_string(row['amount_currency']),
+            'currency': row['currency'],
+            'description': row['description'],
+            'date': row['date'].isoformat(),
+            'budget': budget,
+            'recurring_transaction': series,
+        }
+        if display_currency:
+            amount = row['amount_display']
+            item['display_amount'] = decimal_string(amount) if amount is not None else None
+            item['display_currency'] = display_currency
+        data.append(item)
+    return data
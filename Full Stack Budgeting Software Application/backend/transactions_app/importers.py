@@ -0,0 +1,250 @@
+import codecs
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from categories_app.models import Category
+from categories_app.services import UNCATEGORIZED, uncategorized_category
+from subcategories_app.models import Subcategory
+from currencies_app.registry import currency_registry
+from currencies_app.services import ExchangeRateUnavailable, RateTable
+from reports_app.models import MonthlyCategoryRollup
+from .models import Transaction
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+MAX_AMOUNT = Decimal('1e8')  # Transaction amounts have max_digits=10, decimal_places=2
+
+CSV_REQUIRED_COLUMNS = {'date', 'description', 'amount'}
+CSV_OPTIONAL_COLUMNS = {'currency', 'category', 'subcategory'}
+
+
+class ImportFileError(ValueError):
+    """The upload as a whole cannot be read, e.g. a CSV without the required columns."""
+
+
+class ImportRowError(ValueError):
+    """One row is invalid; it is reported and the import carries on."""
+
+
+def read_csv(upload):
+    """Yield ``(line number, fields)`` for each CSV data row, decoding the upload as it streams.
+
+    Bytes that are not UTF-8 (e.g. a Latin-1 export) are replaced rather than failing the
+    import; they can only end up in a description or fail that row's checks.
+    """
+    reader = csv.DictReader(codecs.iterdecode(upload, 'utf-8-sig', errors='replace'))
+    try:
+        columns = {name.strip().lower() for name in reader.fieldnames or []}
+        missing = CSV_REQUIRED_COLUMNS - columns
+        if missing:
+            raise ImportFileError(f"Missing CSV columns: {', '.join(sorted(missing))}.")
+
+        for row in reader:
+            yield reader.line_num, {
+                key.strip().lower(): (value or '').strip()
+                for key, value in row.items()
+                if key and key.strip().lower() in CSV_REQUIRED_COLUMNS | CSV_OPTIONAL_COLUMNS
+            }
+    except csv.Error as exc:
+        raise ImportFileError(f"Unreadable CSV file (line {reader.line_num}): {exc}.")
+
+
+def ofx_tags(chunks):
+    """Yield ``(TAG, value)`` pairs from OFX text chunks; closing tags have a leading "/"."""
+    tail = ''
+    for chunk in chunks:
+        tokens = (tail + chunk).split('<')
+        tail = tokens.pop()
+        for token in tokens:
+            if '>' in token:
+                tag, value = token.split('>', 1)
+                yield tag.strip().upper(), value.strip()
+    if '>' in tail:
+        tag, value = tail.split('>', 1)
+        yield tag.strip().upper(), value.strip()
+
+
+def read_ofx(upload):
+    """Yield ``(statement line number, fields)`` for each debit in an OFX statement.
+
+    Credits (deposits, refunds) are not spending and are skipped. OFX has no categories,
+    so debits land in "Uncategorized".
+    """
+    currency = 'USD'
+    current = None
+    number = 0
+    for tag, value in ofx_tags(codecs.iterdecode(upload.chunks(), 'utf-8-sig', errors='replace')):
+        if tag == 'CURDEF':
+            currency = value
+        elif tag == 'STMTTRN':
+            current = {}
+            number += 1
+        elif tag == '/STMTTRN' and current is not None:
+            amount = current.get('TRNAMT', '')
+            if not amount.startswith('-'):
+                yield number, None
+            else:
+                yield number, {
+                    'date': current.get('DTPOSTED', '')[:8],
+                    'description': current.get('NAME') or current.get('MEMO', ''),
+                    'amount': amount[1:],
+                    'currency': currency,
+                }
+            current = None
+        elif current is not None:
+            current[tag] = value
+
+
+READERS = {
+    'csv': read_csv,
+    'ofx': read_ofx,
+}
+
+
+def parse_date(value):
+    for date_format in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ImportRowError(f"Invalid date '{value}'. Use YYYY-MM-DD.")
+
+
+def parse_amount(value):
+    try:
+        amount = Decimal(value.replace(',', ''))
+    except InvalidOperation:
+        raise ImportRowError(f"Invalid amount '{value}'.")
+    if not amount.is_finite() or amount < 0 or amount >= MAX_AMOUNT:
+        raise ImportRowError(f"Invalid amount '{value}'.")
+    return amount.quantize(Decimal('0.01'))
+
+
+class TransactionImporter:
+    """Turn parsed rows into transactions for ``user`` and insert them in batches.
+
+    Category and subcategory names are resolved against maps loaded once per import; a
+    subcategory the user does not have yet is created for them, once the rest of the row is
+    valid. Amounts are converted with a ``RateTable`` that loads each currency once.
+    """
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.rates = RateTable()
+        self.categories = {
+            name.casefold(): category_id
+            for category_id, name in Category.objects.values_list('id', 'category')
+        }
+        # Subcategories are per user: rows only ever land in the importing user's own
+        self.subcategories = {
+            (category_id, name.casefold()): subcategory_id
+            for subcategory_id, category_id, name in Subcategory.objects.for_user(user).order_by('-id').values_list(
+                'id', 'category_id', 'subcategory_name'
+            )
+        }
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.error_count = 0
+
+    def uncategorized(self):
+        category_id = self.categories.get(UNCATEGORIZED.casefold())
+        if category_id is None:
+            category_id = uncategorized_category().id
+            self.categories[UNCATEGORIZED.casefold()] = category_id
+        return category_id, self.subcategory(category_id, UNCATEGORIZED)
+
+    def subcategory(self, category_id, name):
+        """The user's subcategory ``name`` of the category, created for them the first time it is used."""
+        key = (category_id, name.casefold())
+        if key not in self.subcategories:
+            self.subcategories[key] = Subcategory.objects.create(
+                category_id=category_id, subcategory_name=name, user=self.user
+            ).id
+        return self.subcategories[key]
+
+    def resolve_category(self, category_name, subcategory_name):
+        if not category_name and not subcategory_name:
+            return self.uncategorized()
+        if not category_name or not subcategory_name:
+            raise ImportRowError("Give both a category and a subcategory, or neither.")
+
+        category_id = self.categories.get(category_name.casefold())
+        if category_id is None:
+            raise ImportRowError(f"Unknown category '{category_name}'.")
+        if len(subcategory_name) > Subcategory._meta.get_field('subcategory_name').max_length:
+            raise ImportRowError("Subcategory is longer than 100 characters.")
+        return category_id, self.subcategory(category_id, subcategory_name)
+
+    def build(self, fields):
+        description = fields.get('description', '')
+        if len(description) > 200:
+            raise ImportRowError("Description is longer than 200 characters.")
+        currency = (fields.get('currency') or 'USD').upper()
+        if currency not in currency_registry:
+            raise ImportRowError(f"Currency '{currency}' is not supported.")
+        transaction_obj = Transaction(
+            user_id=self.user.id,
+            amount_currency=parse_amount(fields.get('amount', '')),
+            currency=currency,
+            description=description,
+            date=parse_date(fields.get('date', '')),
+        )
+        self.convert(transaction_obj)
+        # Last, as it may create a subcategory: a rejected row leaves nothing behind
+        transaction_obj.category_id, transaction_obj.subcategory_id = self.resolve_category(
+            fields.get('category'), fields.get('subcategory')
+        )
+        return transaction_obj
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    def convert(self, transaction_obj):
+        try:
+            transaction_obj.amount_usd = self.rates.convert(
+                transaction_obj.amount_currency, transaction_obj.currency, transaction_obj.date
+            )
+        except ExchangeRateUnavailable as exc:
+            raise ImportRowError(str(exc))
+        if transaction_obj.amount_usd >= MAX_AMOUNT:
+            raise ImportRowError(
+                f"Amount {transaction_obj.amount_currency} {transaction_obj.currency} is too large once converted to USD."
+            )
+
+    def flush(self, batch):
+        if not batch:
+            return
+        # bulk_create skips the rollup signals, so fold the batch in explicitly
+        Transaction.objects.bulk_create(batch, batch_size=self.batch_size)
+        MonthlyCategoryRollup.objects.add_transactions(batch)
+        self.imported += len(batch)
+
+    def run(self, rows):
+        """Import every valid row of ``rows``; returns a summary with per-row errors."""
+        batch = []
+        with transaction.atomic():
+            for row_number, fields in rows:
+                if fields is None:
+                    self.skipped += 1
+                    continue
+                try:
+                    batch.append(self.build(fields))
+                except ImportRowError as exc:
+                    self.add_error(row_number, str(exc))
+                    continue
+                if len(batch) >= self.batch_size:
+                    self.flush(batch)
+                    batch = []
+            self.flush(batch)
+
+        return {
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
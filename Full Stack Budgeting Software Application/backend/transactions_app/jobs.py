@@ -0,0 +1,12 @@
+from datetime import date
+from jobs_app.services import job
+from .models import RecurringTransaction
+from .recurrence import materialize_due_occurrences
+
+
+@job('transactions.materialize_recurring')
+def materialize_recurring(series_id=None, through=None):
+    """Store the past-due occurrences of one series, or of every series when ``series_id`` is None."""
+    series = RecurringTransaction.objects.filter(pk=series_id) if series_id else None
+    through = date.fromisoformat(through) if through else None
+    return {'created': materialize_due_occurrences(series, through)}
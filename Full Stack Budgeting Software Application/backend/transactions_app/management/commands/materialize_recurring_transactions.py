@@ -0,0 +1,21 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions_app.recurrence import materialize_due_occurrences
+
+
+class Command(BaseCommand):
+    help = "Create Transaction rows for recurring occurrences that are now due. Run daily (e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', help="Materialize occurrences up to this date (YYYY-MM-DD), defaults to today.")
+
+    def handle(self, *args, **options):
+        try:
+            through = datetime.strptime(options['through'], '%Y-%m-%d').date() if options['through'] else date.today()
+        except ValueError:
+            raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+
+        created = materialize_due_occurrences(through=through)
+        self.stdout.write(self.style.SUCCESS(f"Materialized {created} recurring transactions through {through}."))
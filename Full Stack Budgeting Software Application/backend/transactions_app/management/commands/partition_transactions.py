@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from transactions_app.partitioning import (
+    MONTHS_AHEAD, PartitioningError, archive_partitions, convert, ensure_partitions, partition_status,
+    restore_partition,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Opt-in monthly partitioning of app_transactions on PostgreSQL. "
+        "'convert' partitions the table once; 'ensure' creates upcoming months (run daily); "
+        "'archive --before YYYY-MM' detaches old months; 'restore <partition>' attaches one back; "
+        "'status' lists partitions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['status', 'convert', 'ensure', 'archive', 'restore'])
+        parser.add_argument('partition', nargs='?', help="Partition to restore, e.g. app_transactions_y2023m01.")
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD,
+                            help="Months of future partitions to keep ready (convert, ensure).")
+        parser.add_argument('--before', help="Archive months that end on or before this month (YYYY-MM).")
+        parser.add_argument('--if-partitioned', action='store_true',
+                            help="With 'ensure': do nothing when the table has not been converted.")
+
+    def handle(self, *args, **options):
+        try:
+            self.run(options)
+        except PartitioningError as exc:
+            raise CommandError(str(exc))
+
+    def run(self, options):
+        action = options['action']
+        if action == 'status':
+            status = partition_status()
+            if not status['partitioned']:
+                self.stdout.write("app_transactions is not partitioned.")
+                return
+            for partition in status['partitions']:
+                self.stdout.write(f"{partition['name']}: ~{partition['estimated_rows']} rows")
+            for name in status['archived']:
+                self.stdout.write(f"{name}: archived")
+
+        elif action == 'convert':
+            created = convert(months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f"Partitioned app_transactions into {len(created)} partitions."))
+
+        elif action == 'ensure':
+            if options['if_partitioned'] and (connection.vendor != 'postgresql' or not partition_status()['partitioned']):
+                return
+            created = ensure_partitions(months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions."))
+
+        elif action == 'archive':
+            if not options['before']:
+                raise CommandError("archive needs --before YYYY-MM.")
+            try:
+                before = datetime.strptime(options['before'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("Invalid month format. Use YYYY-MM.")
+            archived = archive_partitions(before)
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {len(archived)} partitions into the transactions_archive schema."
+            ))
+
+        elif action == 'restore':
+            if not options['partition']:
+                raise CommandError("restore needs the name of an archived partition.")
+            restore_partition(options['partition'])
+            self.stdout.write(self.style.SUCCESS(f"Restored {options['partition']}."))
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories_app', '0005_alter_category_category'),
+        ('transactions_app', '0013_transaction_created_at_transaction_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='categories_app.category'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-18 17:50
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_series_materialized(apps, schema_editor):
+    # Series created before lazy expansion already have a row for every occurrence
+    RecurringTransaction = apps.get_model('transactions_app', 'RecurringTransaction')
+    RecurringTransaction.objects.update(materialized_through=F('end_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions_app', '0014_alter_transaction_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='materialized_through',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_series_materialized, migrations.RunPython.noop),
+    ]
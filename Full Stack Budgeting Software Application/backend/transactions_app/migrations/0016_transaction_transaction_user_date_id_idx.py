@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-18 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets_app', '0006_budget_user'),
+        ('categories_app', '0005_alter_category_category'),
+        ('subcategories_app', '0004_alter_subcategory_subcategory_name'),
+        ('transactions_app', '0015_recurringtransaction_materialized_through'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'date', 'id'], name='transaction_user_date_id_idx'),
+        ),
+    ]
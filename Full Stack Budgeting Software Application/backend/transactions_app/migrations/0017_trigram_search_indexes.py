@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# (index, model, column) served by /transactions/search/; PostgreSQL only
+TRIGRAM_INDEXES = [
+    ('transaction_description_trgm_idx', 'transactions_app.Transaction', 'description'),
+    ('category_name_trgm_idx', 'categories_app.Category', 'category'),
+    ('subcategory_name_trgm_idx', 'subcategories_app.Subcategory', 'subcategory_name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return  # Other databases fall back to plain substring matching
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, model, column in TRIGRAM_INDEXES:
+        table = apps.get_model(model)._meta.db_table
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin ("{column}" gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, model, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories_app', '0005_alter_category_category'),
+        ('subcategories_app', '0005_alter_subcategory_category'),
+        ('transactions_app', '0016_transaction_transaction_user_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,13 +1,10 @@
 from django.db import models
 from django.conf import settings
-from django.dispatch import receiver
-from django.db.models.signals import pre_delete
 from django.db import transaction
 from categories_app.models import Category
 from subcategories_app.models import Subcategory
 from budgets_app.models import Budget
-import requests
-from decimal import Decimal, InvalidOperation
+from currencies_app.services import convert_to_usd
 from dotenv import load_dotenv
 from datetime import date, timedelta
 from django.utils import timezone
@@ -29,20 +26,6 @@ load_dotenv()
 
 WOLFRAM_APP_ID = os.getenv("WOLFRAM_APP_ID")
 
-currency_to_usd = { # Used in case Exchange Rate API limit is reached
-    "USD": 1.00,  # US Dollar
-    "EUR": 1.03,  # Euro
-    "JPY": 0.0063,  # Japanese Yen
-    "GBP": 1.22,  # British Pound
-    "AUD": 0.61,  # Australian Dollar
-    "CAD": 0.71,  # Canadian Dollar
-    "CHF": 1.09,  # Swiss Franc
-    "CNY": 0.14,  # Chinese Yuan
-    "INR": 0.012,  # Indian Rupee
-    "MXN": 0.048,  # Mexican Peso
-    "MYR": 0.222292,  # Malaysian Ringgit
-}
-
 class RecurringTransaction(models.Model):
     FREQUENCY_CHOICES = [
         ('monthly', 'Monthly'),
@@ -61,6 +44,8 @@ class RecurringTransaction(models.Model):
     frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='monthly')
     day_of_month = models.IntegerField()  # Day of the month when transaction should occur
     is_active = models.BooleanField(default=True)
+    # Occurrences up to this date exist as Transaction rows; later ones are computed on demand
+    materialized_through = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -72,7 +57,8 @@ class RecurringTransaction(models.Model):
 
 class Transaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=get_default_user)
-    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    # Reassigned to "Uncategorized" by categories_app.services.reassign_category before the category row is removed
+    category = models.ForeignKey(Category, on_delete=models.DO_NOTHING)
     subcategory = models.ForeignKey(Subcategory, on_delete=models.CASCADE)
     amount_currency = models.DecimalField(max_digits=10, decimal_places=2)
     amount_usd = models.DecimalField(max_digits=10, decimal_places=2)
@@ -86,6 +72,10 @@ class Transaction(models.Model):
 
     class Meta:
         db_table = 'app_transactions'
+        indexes = [
+            # Serves the per-user, newest-first keyset pagination in TransactionView.get
+            models.Index(fields=['user', 'date', 'id'], name='transaction_user_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.description} - {self.amount_currency} {self.currency}"
@@ -94,24 +84,9 @@ class Transaction(models.Model):
         if self.currency == 'USD':
             self.amount_usd = self.amount_currency
         else:
-            # Convert to USD using exchange rate API
-            api_key = os.getenv('EXCHANGE_RATE_API_KEY')
-            url = f'https://v6.exchangerate-api.com/v6/{api_key}/pair/{self.currency}/USD/{self.amount_currency}'
-            
-            try:
-                response = requests.get(url)
-                data = response.json()
-                self.amount_usd = Decimal(str(data['conversion_result']))
-            except Exception as e:
-                print(f"Error converting currency: {e}")
-                self.amount_usd = self.amount_currency  # Fallback to original amount
-                
-        super().save(*args, **kwargs)
-
-@receiver(pre_delete, sender=Category)
-def handle_category_delete(sender, instance, **kwargs):
-    uncategorized_category, created = Category.objects.get_or_create(category="Uncategorized")
+            # Convert to USD from the locally stored exchange rate snapshots
+            self.amount_usd = convert_to_usd(self.amount_currency, self.currency, self.date)
 
-    # Reassign all transactions associated with this category to the "Uncategorized" category
-    with transaction.atomic():
-        Transaction.objects.filter(category=instance).update(category=uncategorized_category)
+        # Keep the row and its monthly rollup update (post_save) in one DB transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
@@ -0,0 +1,73 @@
+import base64
+from datetime import datetime
+from itertools import islice
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def position(row):
+    """The row's place in the (date, id) order.
+
+    Scheduled (not yet stored) recurring occurrences have no id. A series has at most one
+    occurrence a day, so they take the negated series id: unique and stable between
+    requests, and below every stored id, so they sort after the stored rows of the same day.
+    """
+    return row['id'] or -row['recurring_transaction_id']
+
+
+def encode_cursor(row):
+    raw = f"{row['date'].isoformat()}:{position(row)}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, id_str = raw.split(':')
+        return datetime.strptime(date_str, '%Y-%m-%d').date(), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def page_size(query_params):
+    try:
+        limit = int(query_params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValidationError({"limit": "A valid integer is required."})
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def sort_key(row):
+    return (row['date'], position(row))
+
+
+def before_cursor(queryset, cursor):
+    """Rows strictly after ``cursor`` in (-date, -id) order, served by the (user, date, id) index.
+
+    After a scheduled occurrence (a negative id) no stored row of the same day is left.
+    """
+    cursor_date, cursor_id = cursor
+    return queryset.filter(Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id))
+
+
+def paginate(queryset, scheduled, limit, cursor=None):
+    """Return one keyset page of stored rows merged with scheduled occurrences, plus the next cursor.
+
+    ``queryset`` is a ``values()`` queryset already filtered to the user and ``scheduled`` an
+    iterable of rows of the same shape, newest first; only ``limit + 1`` rows of each are ever read.
+    """
+    queryset = queryset.order_by('-date', '-id')
+    if cursor:
+        queryset = before_cursor(queryset, cursor)
+        scheduled = (t for t in scheduled if sort_key(t) < cursor)
+
+    stored = list(queryset[:limit + 1])
+    rows = sorted([*stored, *islice(scheduled, limit + 1)], key=sort_key, reverse=True)
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
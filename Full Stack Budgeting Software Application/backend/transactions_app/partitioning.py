@@ -0,0 +1,314 @@
+"""Opt-in monthly range partitioning of app_transactions on PostgreSQL.
+
+``convert`` turns the plain table into one partitioned by ``date``, with one partition
+per month plus a default partition for dates outside every monthly range. ``ensure``
+keeps partitions created ahead of time, and ``archive`` detaches old months into the
+``transactions_archive`` schema so they leave the working set. Monthly totals of
+archived months stay in the rollup table, so reports still cover them;
+``MonthlyCategoryRollup.objects.rebuild`` and ``verify`` leave those months alone.
+
+Every unique constraint or index on a partitioned table has to include ``date``, so
+the primary key becomes (id, date); ids still come from a single sequence.
+"""
+import re
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from budgets_app.models import Budget
+from categories_app.models import Category
+from categories_app.services import UNCATEGORIZED, uncategorized_category
+from subcategories_app.models import Subcategory
+from .models import RecurringTransaction, Transaction
+
+TABLE = Transaction._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+ARCHIVE_SCHEMA = 'transactions_archive'
+MONTHS_AHEAD = 3
+
+PARTITION_NAME = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year:04d}m{month.month:02d}'
+
+
+def partition_month(name):
+    match = PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def months_between(first, last):
+    """Month starts from the month of ``first`` through the month of ``last``."""
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month += relativedelta(months=1)
+
+
+def check_backend():
+    if connection.vendor != 'postgresql':
+        raise PartitioningError("Table partitioning needs PostgreSQL.")
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def partitions(cursor):
+    """Names of the partitions currently attached to the table."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(%s) ORDER BY child.relname",
+        [TABLE],
+    )
+    return [name for name, in cursor.fetchall()]
+
+
+def archived_months():
+    """Months whose partition sits in the archive schema; empty where the table cannot be partitioned."""
+    if connection.vendor != 'postgresql':
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class JOIN pg_namespace ON pg_namespace.oid = relnamespace "
+            "WHERE nspname = %s AND relkind = 'r'",
+            [ARCHIVE_SCHEMA],
+        )
+        return {partition_month(name) for name, in cursor.fetchall()} - {None}
+
+
+def partition_status():
+    """Whether the table is partitioned, and its partitions with row estimates."""
+    check_backend()
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return {'partitioned': False, 'partitions': [], 'archived': []}
+        cursor.execute(
+            "SELECT child.relname, child.reltuples::bigint FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s) ORDER BY child.relname",
+            [TABLE],
+        )
+        rows = [{'name': name, 'estimated_rows': max(rows, 0)} for name, rows in cursor.fetchall()]
+        cursor.execute(
+            "SELECT relname FROM pg_class JOIN pg_namespace ON pg_namespace.oid = relnamespace "
+            "WHERE nspname = %s AND relkind = 'r' ORDER BY relname",
+            [ARCHIVE_SCHEMA],
+        )
+        archived = [name for name, in cursor.fetchall()]
+    return {'partitioned': True, 'partitions': rows, 'archived': archived}
+
+
+def add_partition(cursor, month):
+    """Attach the partition for ``month``, moving its rows out of the default partition first."""
+    name = partition_name(month)
+    start, end = month, month + relativedelta(months=1)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE date >= %s AND date < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [start, end],
+    )
+
+
+def ensure_partitions(through=None, months_ahead=MONTHS_AHEAD):
+    """Create the missing monthly partitions up to ``months_ahead`` months after ``through``.
+
+    Gaps after the oldest attached partition are filled too; rows that landed in the
+    default partition for those months are moved. Returns the names of the new partitions.
+    Run daily, e.g. next to materialize_recurring_transactions.
+    """
+    check_backend()
+    through = through or date.today()
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise PartitioningError(f'{TABLE} is not partitioned. Run "partition_transactions convert" first.')
+        existing = {partition_month(name) for name in partitions(cursor)} - {None}
+        first = min(existing | {through.replace(day=1)})
+        for month in months_between(first, through + relativedelta(months=months_ahead)):
+            if month not in existing:
+                add_partition(cursor, month)
+                created.append(partition_name(month))
+    return created
+
+
+def convert(months_ahead=MONTHS_AHEAD):
+    """Rebuild app_transactions as a partitioned table, keeping its rows, indexes and foreign keys.
+
+    Runs in one transaction and holds an exclusive lock on the table while rows are
+    copied, so run it in a maintenance window.
+    """
+    check_backend()
+    legacy = f'{TABLE}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            raise PartitioningError(f'{TABLE} is already partitioned.')
+        # Django's foreign keys are deferred; checks still pending would block dropping the old table
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+
+        # Indexes and foreign keys are recreated under their current names once the old table is gone
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+            [TABLE],
+        )
+        indexes = [
+            (name, definition) for name, definition in cursor.fetchall()
+            if 'UNIQUE' not in definition.upper()
+        ]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT coalesce(max(id), 0) FROM "{TABLE}"')
+        max_id = cursor.fetchone()[0]
+        # Months that hold rows get a partition each; other past months fall into the default partition
+        cursor.execute(f'SELECT DISTINCT date_trunc(\'month\', date)::date FROM "{TABLE}"')
+        months = {month for month, in cursor.fetchall()}
+        today = date.today()
+        months.update(months_between(today, today + relativedelta(months=months_ahead)))
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (date)'
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, date)')
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        for month in sorted(months):
+            cursor.execute(
+                f'CREATE TABLE "{partition_name(month)}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [month, month + relativedelta(months=1)],
+            )
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{legacy}"')
+        cursor.execute(f'DROP TABLE "{legacy}"')
+        # The old identity sequence went with the old table; carry on from its last id
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+        cursor.execute(f"SELECT setval('\"{TABLE}_id_seq\"', %s, %s)", [max(max_id, 1), max_id > 0])
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{TABLE}_id_seq"\')')
+        for name, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        cursor.execute(f'ANALYZE "{TABLE}"')
+        return partitions(cursor)
+
+
+def archive_partitions(before):
+    """Detach the monthly partitions that end on or before ``before`` into the archive schema.
+
+    Archived rows no longer show up in the app; ``restore_partition`` attaches one back.
+    Their foreign keys are dropped so that deleting a user, category or budget is not
+    blocked by rows the app cannot see. Returns the names of the archived partitions.
+    """
+    check_backend()
+    archived = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise PartitioningError(f'{TABLE} is not partitioned.')
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"')
+        for name in partitions(cursor):
+            month = partition_month(name)
+            if month is not None and month + relativedelta(months=1) <= before:
+                cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+                cursor.execute(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'", [name]
+                )
+                for constraint, in cursor.fetchall():
+                    cursor.execute(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"')
+                cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{ARCHIVE_SCHEMA}"')
+                archived.append(name)
+    return archived
+
+
+def repair_references(cursor, name):
+    """Give the rows of a detached partition what the live rows got while it was archived.
+
+    Rows of deleted users and subcategories are deleted, rows of deleted categories move to
+    "Uncategorized" (keeping a subcategory that still exists, else the user's "Uncategorized"
+    one) and deleted budgets and recurring transactions are unset. The rollup buckets of the
+    month were already removed or moved along with the live rows, so they stay as they are.
+    """
+    quote = connection.ops.quote_name
+    users = quote(get_user_model()._meta.db_table)
+    categories, subcategories = quote(Category._meta.db_table), quote(Subcategory._meta.db_table)
+    table = quote(name)
+
+    cursor.execute(f"DELETE FROM {table} archived WHERE NOT EXISTS (SELECT 1 FROM {users} WHERE id = archived.user_id)")
+    cursor.execute(
+        f"SELECT DISTINCT user_id FROM {table} archived "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {categories} WHERE id = archived.category_id)"
+    )
+    user_ids = {user_id for user_id, in cursor.fetchall()}
+    if user_ids:
+        uncategorized = uncategorized_category()
+        existing = set(
+            Subcategory.objects.filter(category=uncategorized, subcategory_name=UNCATEGORIZED, user_id__in=user_ids)
+            .values_list('user_id', flat=True)
+        )
+        Subcategory.objects.bulk_create(
+            Subcategory(category=uncategorized, subcategory_name=UNCATEGORIZED, user_id=user_id)
+            for user_id in user_ids - existing
+        )
+        cursor.execute(
+            f"UPDATE {table} archived SET category_id = %s, subcategory_id = CASE "
+            f"WHEN EXISTS (SELECT 1 FROM {subcategories} WHERE id = archived.subcategory_id) THEN archived.subcategory_id "
+            f"ELSE (SELECT MIN(id) FROM {subcategories} "
+            f"WHERE category_id = %s AND subcategory_name = %s AND user_id = archived.user_id) END "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {categories} WHERE id = archived.category_id)",
+            [uncategorized.id, uncategorized.id, UNCATEGORIZED],
+        )
+    cursor.execute(
+        f"DELETE FROM {table} archived WHERE NOT EXISTS (SELECT 1 FROM {subcategories} WHERE id = archived.subcategory_id)"
+    )
+    for column, model in (('budget_id', Budget), ('recurring_transaction_id', RecurringTransaction)):
+        cursor.execute(
+            f"UPDATE {table} archived SET {column} = NULL WHERE {column} IS NOT NULL "
+            f"AND NOT EXISTS (SELECT 1 FROM {quote(model._meta.db_table)} WHERE id = archived.{column})"
+        )
+
+
+def restore_partition(name):
+    """Attach an archived month back to the table.
+
+    Its foreign keys are validated again on attach, so references deleted while it was
+    archived are repaired first (see ``repair_references``).
+    """
+    check_backend()
+    month = partition_month(name)
+    if month is None:
+        raise PartitioningError(f'"{name}" is not a monthly partition name.')
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_class JOIN pg_namespace ON pg_namespace.oid = relnamespace "
+            "WHERE nspname = %s AND relname = %s",
+            [ARCHIVE_SCHEMA, name],
+        )
+        if cursor.fetchone() is None:
+            raise PartitioningError(f'No archived partition "{name}".')
+        if month in {partition_month(partition) for partition in partitions(cursor)}:
+            raise PartitioningError(f'A partition for {month:%Y-%m} is already attached.')
+        cursor.execute("SELECT current_schema()")
+        cursor.execute(f'ALTER TABLE "{ARCHIVE_SCHEMA}"."{name}" SET SCHEMA "{cursor.fetchone()[0]}"')
+        repair_references(cursor, name)
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+            [month, month + relativedelta(months=1)],
+        )
@@ -0,0 +1,181 @@
+import calendar
+import heapq
+import logging
+from datetime import date, timedelta
+from itertools import islice
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from currencies_app.services import ExchangeRateUnavailable, RateTable
+from reports_app.models import MonthlyCategoryRollup
+from .models import Transaction, RecurringTransaction
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_MONTHS = {
+    'monthly': 1,
+    'quarterly': 3,
+    'yearly': 12,
+}
+
+
+def occurrence_dates(series, start=None, end=None):
+    """Yield the dates ``series`` falls on between ``start`` and ``end`` (inclusive).
+
+    Periods are anchored on the month of ``series.start_date`` and step by the
+    series frequency; a ``day_of_month`` past the end of a month falls on its last day.
+    """
+    step = FREQUENCY_MONTHS.get(series.frequency, 1)
+    start = max(start, series.start_date) if start else series.start_date
+    end = min(end, series.end_date) if end else series.end_date
+
+    period = series.start_date.replace(day=1)
+    # Skip whole periods before the requested window instead of walking through them
+    if start > period:
+        months_ahead = (start.year - period.year) * 12 + start.month - period.month
+        period += relativedelta(months=(months_ahead // step) * step)
+
+    while period <= end:
+        last_day = calendar.monthrange(period.year, period.month)[1]
+        occurrence = period.replace(day=min(series.day_of_month, last_day))
+        if start <= occurrence <= end:
+            yield occurrence
+        period += relativedelta(months=step)
+
+
+def occurrence_dates_desc(series, start=None, end=None):
+    """Like ``occurrence_dates``, newest first.
+
+    Whole periods after ``end`` are skipped, so the first dates cost the same however far
+    the series runs.
+    """
+    step = FREQUENCY_MONTHS.get(series.frequency, 1)
+    start = max(start, series.start_date) if start else series.start_date
+    end = min(end, series.end_date) if end else series.end_date
+
+    first_period = series.start_date.replace(day=1)
+    if end < first_period:
+        return
+    months_ahead = (end.year - first_period.year) * 12 + end.month - first_period.month
+    period = first_period + relativedelta(months=(months_ahead // step) * step)
+
+    while period >= start.replace(day=1):
+        last_day = calendar.monthrange(period.year, period.month)[1]
+        occurrence = period.replace(day=min(series.day_of_month, last_day))
+        if start <= occurrence <= end:
+            yield occurrence
+        period -= relativedelta(months=step)
+
+
+def build_occurrence(series, occurrence_date, rates):
+    """An unsaved Transaction for one occurrence of ``series``, converted with the ``RateTable`` ``rates``."""
+    return Transaction(
+        user_id=series.user_id,
+        category_id=series.category_id,
+        subcategory_id=series.subcategory_id,
+        amount_currency=series.amount_currency,
+        amount_usd=rates.convert(series.amount_currency, series.currency, occurrence_date),
+        currency=series.currency,
+        description=series.description,
+        date=occurrence_date,
+        recurring_transaction=series,
+    )
+
+
+def pending_start(series):
+    """First date that has not been materialized for ``series`` yet."""
+    if series.materialized_through:
+        return series.materialized_through + timedelta(days=1)
+    return series.start_date
+
+
+def active_series(user, rates, **filters):
+    """The user's active series, with every currency they use loaded into ``rates`` in one query."""
+    series_list = list(RecurringTransaction.objects.filter(user=user, is_active=True, **filters).select_related(
+        'category', 'subcategory'
+    ))
+    rates.load({series.currency for series in series_list})
+    return series_list
+
+
+def series_occurrences(series, dates, rates):
+    """Unsaved occurrences of ``series`` on ``dates``, with its category and subcategory attached."""
+    for occurrence_date in dates:
+        try:
+            occurrence = build_occurrence(series, occurrence_date, rates)
+        except ExchangeRateUnavailable:
+            # Only a series saved before rates were checked; it shows up once a rate is stored
+            continue
+        occurrence.category = series.category
+        occurrence.subcategory = series.subcategory
+        yield occurrence
+
+
+def virtual_occurrences(user, start=None, end=None, rates=None):
+    """Unsaved occurrences of the user's active series that have not been materialized yet.
+
+    Amounts are converted with ``rates``, which is loaded with every series' currency in one query.
+    """
+    rates = rates or RateTable()
+    occurrences = []
+    for series in active_series(user, rates):
+        window_start = max(start, pending_start(series)) if start else pending_start(series)
+        occurrences.extend(series_occurrences(series, occurrence_dates(series, window_start, end), rates))
+    return occurrences
+
+
+def scheduled_occurrences(user, start=None, end=None, rates=None, limit=None, **filters):
+    """Like ``virtual_occurrences``, but lazy and newest first, in the listing's (date, id) order.
+
+    Each series is walked back from ``end`` and the series are merged, so reading the first
+    rows builds only those, and no series yields more than ``limit``. ``filters`` apply to
+    the series, e.g. ``category_id``.
+    """
+    rates = rates or RateTable()
+    per_series = []
+    for series in active_series(user, rates, **filters):
+        window_start = max(start, pending_start(series)) if start else pending_start(series)
+        occurrences = series_occurrences(series, occurrence_dates_desc(series, window_start, end), rates)
+        per_series.append(islice(occurrences, limit) if limit is not None else occurrences)
+    # Within a day, scheduled rows are ordered by their negated series id (see pagination.position)
+    return heapq.merge(
+        *per_series, key=lambda occurrence: (occurrence.date, -occurrence.recurring_transaction_id), reverse=True
+    )
+
+
+def materialize_due_occurrences(series_queryset=None, through=None):
+    """Insert every past-due occurrence as a real Transaction row; returns the number created.
+
+    Each series is locked while it is materialized so concurrent runs never insert an
+    occurrence twice. Rows are written with ``bulk_create`` and folded into the monthly rollup.
+    """
+    through = through or date.today()
+    if series_queryset is None:
+        series_queryset = RecurringTransaction.objects.all()
+
+    created = 0
+    series_ids = series_queryset.filter(is_active=True).values_list('id', flat=True)
+    for series_id in series_ids:
+        try:
+            created += materialize_series(series_id, through)
+        except ExchangeRateUnavailable as exc:
+            # Left pending, not stored unconverted; the next run retries it
+            logger.warning("Recurring transaction %s not materialized: %s", series_id, exc)
+    return created
+
+
+def materialize_series(series_id, through):
+    with transaction.atomic():
+        series = RecurringTransaction.objects.select_for_update().get(pk=series_id)
+        window_end = min(through, series.end_date)
+        if window_end < pending_start(series):
+            return 0
+        rates = RateTable()
+        occurrences = [
+            build_occurrence(series, occurrence_date, rates)
+            for occurrence_date in occurrence_dates(series, pending_start(series), window_end)
+        ]
+        if occurrences:
+            Transaction.objects.bulk_create(occurrences, batch_size=1000)
+            MonthlyCategoryRollup.objects.add_transactions(occurrences)
+        RecurringTransaction.objects.filter(pk=series.pk).update(materialized_through=window_end)
+    return len(occurrences)
@@ -0,0 +1,30 @@
+import json
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library encoder gives the same bytes, just slower
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer for payloads made only of dicts, lists, str, int, bool and None.
+
+    Output is byte-identical to ``JSONRenderer`` with the default settings. Anything
+    else (indentation, Decimals, lazy strings, ...) is handed to ``JSONRenderer``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type or '', renderer_context or {}) is None:
+            try:
+                if orjson is not None:
+                    ret = orjson.dumps(data)
+                    # JSONRenderer escapes these for JavaScript compatibility
+                    return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+                ret = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+                return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+            except (TypeError, ValueError):
+                pass
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,127 @@
+import base64
+from datetime import datetime
+from django.db import connection
+from django.db.models import BooleanField, Case, F, FloatField, Func, Q, Value, When
+from django.db.models.functions import Cast, Greatest
+from rest_framework.exceptions import ValidationError
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from .fast_serializers import ROW_FIELDS
+from .models import Transaction
+
+MAX_QUERY_LENGTH = 100
+
+# Text a query is matched against: the description and the category and subcategory names
+SEARCH_FIELDS = ('description', 'category__category', 'subcategory__subcategory_name')
+
+
+class ILike(Func):
+    """``lhs ILIKE pattern``; unlike ``icontains`` on PostgreSQL, served by a trigram index."""
+    arg_joiner = ' ILIKE '
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+
+class WordSimilar(Func):
+    """pg_trgm ``query <% text``: some word run of ``text`` is similar enough to ``query`` (fuzzy match)."""
+    arg_joiner = ' <%% '
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+
+class WordSimilarity(Func):
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+def like_escape(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def trigram_search(queryset, query):
+    """Substring, prefix and typo-tolerant matches, ranked by pg_trgm word similarity.
+
+    Each branch of the match is served by a GIN trigram index (see migration 0017); the
+    category and subcategory names are looked up first, which keeps the join out of the filter.
+    """
+    contains = Value(f'%{like_escape(query)}%')
+    categories = Category.objects.filter(
+        Q(ILike(F('category'), contains)) | Q(WordSimilar(Value(query), F('category')))
+    ).values('id')
+    subcategories = Subcategory.objects.filter(
+        Q(ILike(F('subcategory_name'), contains)) | Q(WordSimilar(Value(query), F('subcategory_name')))
+    ).values('id')
+    matches = queryset.filter(
+        Q(ILike(F('description'), contains))
+        | Q(WordSimilar(Value(query), F('description')))
+        | Q(category_id__in=categories)
+        | Q(subcategory_id__in=subcategories)
+    )
+    similarity = Greatest(*(WordSimilarity(Value(query), F(field)) for field in SEARCH_FIELDS))
+    prefix = Case(When(ILike(F('description'), Value(f'{like_escape(query)}%')), then=Value(1.0)), default=Value(0.0))
+    # Double precision, so the rank in a cursor compares equal to the one recomputed by the next query
+    return matches.annotate(rank=Cast(similarity + prefix, FloatField()))
+
+
+def substring_search(queryset, query):
+    """Case-insensitive substring matches ranked by where they matched; no fuzzy matching."""
+    matches = queryset.filter(
+        Q(description__icontains=query)
+        | Q(category__category__icontains=query)
+        | Q(subcategory__subcategory_name__icontains=query)
+    )
+    return matches.annotate(rank=Case(
+        When(description__istartswith=query, then=Value(2.0)),
+        When(description__icontains=query, then=Value(1.0)),
+        default=Value(0.5),
+        output_field=FloatField(),
+    ))
+
+
+def search_transactions(user, query):
+    """The user's stored transactions matching ``query``, as rows with a ``rank``, best first.
+
+    PostgreSQL uses pg_trgm; other databases (SQLite in tests) fall back to substring matching.
+    """
+    query = query.strip()
+    if not query:
+        raise ValidationError({"q": "A search query is required."})
+    if len(query) > MAX_QUERY_LENGTH:
+        raise ValidationError({"q": f"Search queries are limited to {MAX_QUERY_LENGTH} characters."})
+
+    queryset = Transaction.objects.filter(user=user)
+    if connection.vendor == 'postgresql':
+        queryset = trigram_search(queryset, query)
+    else:
+        queryset = substring_search(queryset, query)
+    return queryset.values(*ROW_FIELDS, 'rank').order_by('-rank', '-date', '-id')
+
+
+def encode_search_cursor(row):
+    raw = f"{row['rank']!r}:{row['date'].isoformat()}:{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        rank_str, date_str, id_str = raw.split(':')
+        return float(rank_str), datetime.strptime(date_str, '%Y-%m-%d').date(), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def search_page(queryset, limit, cursor=None):
+    """One keyset page of ``search_transactions`` results in (-rank, -date, -id) order, plus the next cursor."""
+    if cursor:
+        rank, cursor_date, cursor_id = cursor
+        queryset = queryset.filter(
+            Q(rank__lt=rank)
+            | Q(rank=rank, date__lt=cursor_date)
+            | Q(rank=rank, date=cursor_date, id__lt=cursor_id)
+        )
+    rows = list(queryset[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_search_cursor(rows[-1])
+    return rows, None
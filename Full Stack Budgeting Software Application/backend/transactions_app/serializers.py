@@ -4,13 +4,16 @@ from categories_app.models import Category
 from subcategories_app.models import Subcategory
 from budgets_app.models import Budget
 from budgets_app.serializers import BudgetSerializer
-from dotenv import load_dotenv
-import os
-import requests
+from currencies_app.registry import currency_registry
+from currencies_app.services import ExchangeRateUnavailable, convert_to_usd
 
-load_dotenv()
 
-api_key = os.getenv("EXCHANGE_RATE_API_KEY")
+def check_exchange_rate(currency, on_date):
+    """Amounts are stored in USD as well, so a currency that cannot be converted on ``on_date`` is refused."""
+    try:
+        convert_to_usd(0, currency, on_date)
+    except ExchangeRateUnavailable as exc:
+        raise serializers.ValidationError({'currency': str(exc)})
 
 class RecurringTransactionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,7 +28,9 @@ class RecurringTransactionSerializer(serializers.ModelSerializer):
         
         if data['day_of_month'] < 1 or data['day_of_month'] > 31:
             raise serializers.ValidationError("Day of month must be between 1 and 31")
-        
+
+        # Snapshots only ever add rates, so one on the first day covers every later occurrence
+        check_exchange_rate(data.get('currency', 'USD'), data['start_date'])
         return data
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -40,11 +45,19 @@ class TransactionSerializer(serializers.ModelSerializer):
                  'description', 'date', 'budget', 'recurring_transaction']
         read_only_fields = ['id']
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # Views pass the request so only the user's own subcategories are accepted
+        request = self.context.get('request')
+        if request is not None:
+            fields['subcategory'].queryset = Subcategory.objects.for_user(request.user)
+        return fields
+
     def create(self, validated_data):
         budget_data = validated_data.pop('budget', None)
         
         if budget_data:
-            budget = Budget.objects.create(**budget_data)
+            budget = Budget.objects.create(user=validated_data['user'], **budget_data)
             validated_data['budget'] = budget
             
         return Transaction.objects.create(**validated_data)
@@ -95,45 +108,13 @@ class TransactionSerializer(serializers.ModelSerializer):
                     f"Subcategory '{subcategory.subcategory_name}' does not belong to category '{category.category}'"
                 )
 
+        on_date = data.get('date', getattr(self.instance, 'date', None))
+        if on_date is not None:
+            check_exchange_rate(data.get('currency', getattr(self.instance, 'currency', 'USD')), on_date)
         return data
 
-    supported_currencies = None
-
-    currency_codes = [ # Used in case API quota reached
-        "AFN", "ALL", "DZD", "AOA", "ARS", "AMD", "AWG", "AUD", "AZN", "BAM", 
-        "BBD", "BDT", "BGN", "BHD", "BIF", "BMD", "BND", "BOB", "BRL", "BSD", 
-        "BTN", "BWP", "BYN", "BZD", "CAD", "CDF", "CHF", "CLP", "CNY", "COP", 
-        "CRC", "CUP", "CVE", "CZK", "DJF", "DKK", "DOP", "DZD", "EGP", "ERN", 
-        "ETB", "EUR", "FJD", "FKP", "FOK", "GBP", "GEL", "GHS", "GIP", "GMD", 
-        "GNF", "GTQ", "GYD", "HKD", "HNL", "HRK", "HTG", "HUF", "IDR", "ILS", 
-        "INR", "IQD", "IRR", "ISK", "JMD", "JOD", "JPY", "KES", "KGS", "KHR", 
-        "KMF", "KPW", "KRW", "KWD", "KYD", "KZT", "LAK", "LBP", "LKR", "LRD", 
-        "LSL", "LTL", "LVL", "LYD", "MAD", "MDL", "MGA", "MKD", "MMK", "MNT", 
-        "MOP", "MUR", "MVR", "MWK", "MXN", "MYR", "MZN", "NAD", "NGN", "NIO", 
-        "NOK", "NPR", "NZD", "OMR", "PAB", "PEN", "PGK", "PHP", "PKR", "PLN", 
-        "PYG", "QAR", "RON", "RSD", "RUB", "RWF", "SAR", "SBD", "SCR", "SDG", 
-        "SEK", "SGD", "SHP", "SLL", "SOS", "SPL", "SRD", "SSP", "STN", "SYP", 
-        "SZL", "THB", "TJS", "TMT", "TND", "TOP", "TRY", "TTD", "TWD", "TZS", 
-        "UAH", "UGX", "USD", "UYU", "UZS", "VEF", "VND", "VUV", "WST", "XAF", 
-        "XCD", "XOF", "XPF", "YER", "ZAR", "ZMW", "ZWL"
-    ]
-
     def validate_currency(self, value):
-        if not self.supported_currencies:
-            try:
-                api_url = f"https://v6.exchangerate-api.com/v6/{api_key}/latest/USD"
-                response = requests.get(api_url) 
-
-                response.raise_for_status()  
-                data = response.json()
-
-                if data.get('result') == 'error' and data.get('error-type') == 'quota-reached':
-                    self.supported_currencies = self.currency_codes
-                else:
-                    self.supported_currencies = data.get('conversion_rates', {}).keys()
-            except requests.RequestException:
-                self.supported_currencies = self.currency_codes
-
-        if value not in self.supported_currencies:
+        # Checked against the in-process registry; never triggers a network call
+        if value not in currency_registry:
             raise serializers.ValidationError(f"Currency '{value}' is not supported.")
         return value
\ No newline at end of file
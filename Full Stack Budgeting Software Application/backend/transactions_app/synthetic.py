@@ -0,0 +1,232 @@
+import calendar
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from budgets_app.models import Budget
+from categories_app.models import Category
+from subcategories_app.models import Subcategory
+from currencies_app.services import RateTable, currency_to_usd
+from reports_app.models import MonthlyCategoryRollup
+from .models import Transaction, RecurringTransaction
+from .recurrence import occurrence_dates
+
+User = get_user_model()
+
+SYNTHETIC_BATCH_SIZE = 5000
+
+# (category, subcategory, relative frequency, typical USD amount range)
+SPENDING = [
+    ("Food", "Groceries", 30, (15, 160)),
+    ("Food", "Restaurants", 18, (12, 90)),
+    ("Food", "Meal Delivery", 10, (15, 60)),
+    ("Car", "Gas", 8, (25, 80)),
+    ("Car", "Parking", 4, (5, 30)),
+    ("Car", "Uber", 6, (8, 45)),
+    ("Clothing", "Casual", 4, (20, 150)),
+    ("Fun", "Tickets", 3, (15, 120)),
+    ("Fun", "Gifts", 3, (20, 200)),
+    ("Health", "Fitness", 3, (10, 80)),
+    ("Health", "Medical", 1, (40, 400)),
+    ("Home", "Furniture", 1, (80, 900)),
+    ("Home", "Decor", 2, (15, 120)),
+    ("Services", "Hair", 2, (30, 120)),
+    ("Tech", "Accessories", 2, (10, 150)),
+    ("Toiletries", "Skincare", 3, (8, 60)),
+    ("Travel", "Flights", 1, (150, 1200)),
+    ("Travel", "Hotels", 1, (90, 600)),
+]
+
+# (category, subcategory, description, frequency, typical USD amount range)
+RECURRING = [
+    ("Recurring", "Rent", "Rent", 'monthly', (1200, 2800)),
+    ("Home", "Internet", "Internet", 'monthly', (40, 90)),
+    ("Tech", "Phone", "Phone plan", 'monthly', (25, 85)),
+    ("Tech", "Subscriptions", "Streaming subscription", 'monthly', (8, 20)),
+    ("Car", "Insurance", "Car insurance", 'quarterly', (250, 600)),
+    ("Home", "Rental Insurance", "Rental insurance", 'yearly', (120, 300)),
+]
+
+# Most spending is in USD; the rest spreads over a few currencies
+CURRENCIES = ["USD"] * 17 + ["EUR", "GBP", "JPY", "MYR", "CAD"]
+
+MERCHANT_WORDS = ["Corner", "Market", "Central", "Downtown", "Express", "Online", "City", "Family", "Green", "Harbor"]
+
+
+def month_starts(start, end):
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month += relativedelta(months=1)
+
+
+class SyntheticDataGenerator:
+    """Seed ``users`` users with ``years`` years of transactions, recurring series and budgets.
+
+    Everything is written with ``bulk_create`` and converted to USD with stored or static
+    rates, so no network is involved. A given seed always produces the same data.
+    """
+
+    def __init__(self, users=10, years=1, transactions_per_month=60, seed=0, prefix='synthetic',
+                 password='synthetic-password', end=None, batch_size=SYNTHETIC_BATCH_SIZE):
+        self.users = users
+        self.years = years
+        self.transactions_per_month = transactions_per_month
+        self.seed = seed
+        self.prefix = prefix
+        self.password = password
+        self.end = end or date.today()
+        self.start = (self.end - relativedelta(years=years) + timedelta(days=1)).replace(day=1)
+        self.batch_size = batch_size
+        self.rates = RateTable()
+        self.rates.load(CURRENCIES)
+        self.counts = {'users': 0, 'transactions': 0, 'recurring_transactions': 0, 'budgets': 0}
+
+    def create_users(self):
+        usernames = [f"{self.prefix}{index:05d}" for index in range(self.users)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        password = make_password(self.password)  # Hashing is slow; every synthetic user shares one hash
+        User.objects.bulk_create(
+            User(username=username, email=f"{username}@example.com", password=password)
+            for username in usernames if username not in existing
+        )
+        self.counts['users'] = len(usernames) - len(existing)
+        # Users that already existed keep their data; only new ones are filled
+        return list(User.objects.filter(username__in=set(usernames) - existing).order_by('username'))
+
+    def create_categories(self, owner):
+        names = {category for category, *_ in SPENDING + RECURRING}
+        existing = set(Category.objects.filter(category__in=names).values_list('category', flat=True))
+        Category.objects.bulk_create(Category(category=name, user=owner) for name in names - existing)
+        return dict(Category.objects.filter(category__in=names).values_list('category', 'id'))
+
+    def create_subcategories(self, users, categories):
+        pairs = {(category, subcategory) for category, subcategory, *_ in SPENDING + RECURRING}
+        Subcategory.objects.bulk_create(
+            (Subcategory(subcategory_name=subcategory, category_id=categories[category], user=user)
+             for user in users for category, subcategory in sorted(pairs)),
+            batch_size=self.batch_size,
+        )
+        names = {category_id: name for name, category_id in categories.items()}
+        subcategories = {}
+        for subcategory_id, user_id, category_id, name in Subcategory.objects.filter(user__in=users).values_list(
+            'id', 'user_id', 'category_id', 'subcategory_name'
+        ):
+            subcategories[(user_id, names.get(category_id), name)] = subcategory_id
+        return subcategories
+
+    def amount(self, rng, usd_range, currency):
+        usd = Decimal(str(round(rng.uniform(*usd_range), 2)))
+        if currency == 'USD':
+            return usd
+        return (usd / Decimal(str(currency_to_usd[currency]))).quantize(Decimal('0.01'))
+
+    def transaction(self, user, category_id, subcategory_id, amount, currency, description, on_date, series=None):
+        return Transaction(
+            user_id=user.id,
+            category_id=category_id,
+            subcategory_id=subcategory_id,
+            amount_currency=amount,
+            amount_usd=self.rates.convert(amount, currency, on_date),
+            currency=currency,
+            description=description,
+            date=on_date,
+            recurring_transaction=series,
+        )
+
+    def generate_user(self, user, index, categories, subcategories):
+        # One stream per user, so a user's data does not depend on how many users are generated
+        rng = random.Random(f"{self.seed}:{index}")
+        volume = self.transactions_per_month * rng.uniform(0.5, 1.5)
+        weights = [weight for _, _, weight, _ in SPENDING]
+        batch = []
+        monthly_spend = {}
+
+        def add(transaction_obj):
+            batch.append(transaction_obj)
+            monthly_spend[transaction_obj.date.replace(day=1)] = (
+                monthly_spend.get(transaction_obj.date.replace(day=1), Decimal('0')) + transaction_obj.amount_usd
+            )
+            if len(batch) >= self.batch_size:
+                Transaction.objects.bulk_create(batch)
+                self.counts['transactions'] += len(batch)
+                batch.clear()
+
+        series_list = []
+        for category, subcategory, description, frequency, usd_range in RECURRING:
+            if category != "Recurring" and rng.random() < 0.3:
+                continue  # Not everyone has every bill
+            currency = "USD" if rng.random() < 0.9 else rng.choice(CURRENCIES)
+            series_list.append(RecurringTransaction(
+                user=user,
+                category_id=categories[category],
+                subcategory_id=subcategories[(user.id, category, subcategory)],
+                amount_currency=self.amount(rng, usd_range, currency),
+                currency=currency,
+                description=description,
+                start_date=self.start,
+                end_date=self.end + relativedelta(years=1),
+                frequency=frequency,
+                day_of_month=rng.randint(1, 28),
+                materialized_through=self.end,
+            ))
+        RecurringTransaction.objects.bulk_create(series_list)
+        self.counts['recurring_transactions'] += len(series_list)
+        for series in series_list:
+            for occurrence_date in occurrence_dates(series, self.start, self.end):
+                add(self.transaction(user, series.category_id, series.subcategory_id, series.amount_currency,
+                                     series.currency, series.description, occurrence_date, series))
+
+        for month in month_starts(self.start, self.end):
+            last_day = min(month.replace(day=calendar.monthrange(month.year, month.month)[1]), self.end)
+            for _ in range(max(0, round(rng.gauss(volume, volume * 0.2)))):
+                category, subcategory, _, usd_range = rng.choices(SPENDING, weights)[0]
+                currency = rng.choice(CURRENCIES)
+                add(self.transaction(
+                    user, categories[category], subcategories[(user.id, category, subcategory)],
+                    self.amount(rng, usd_range, currency), currency,
+                    f"{rng.choice(MERCHANT_WORDS)} {subcategory}",
+                    month + timedelta(days=rng.randint(0, (last_day - month).days)),
+                ))
+        Transaction.objects.bulk_create(batch)
+        self.counts['transactions'] += len(batch)
+
+        # Monthly budgets around what was actually spent (some months overshoot), plus overlapping yearly ones
+        budgets = []
+        for month, spent in sorted(monthly_spend.items()):
+            budgets.append(Budget(
+                name=f"{month:%B %Y} Budget",
+                total_limit=(spent * Decimal(str(rng.uniform(0.85, 1.25)))).quantize(Decimal('1')),
+                start_date=month,
+                end_date=month + relativedelta(months=1, days=-1),
+                user=user,
+            ))
+        for year in sorted({month.year for month in monthly_spend}):
+            spent = sum(total for month, total in monthly_spend.items() if month.year == year)
+            budgets.append(Budget(
+                name=f"{year} Budget",
+                total_limit=(spent * Decimal(str(rng.uniform(0.9, 1.2)))).quantize(Decimal('1')),
+                start_date=date(year, 1, 1),
+                end_date=date(year, 12, 31),
+                user=user,
+            ))
+        Budget.objects.bulk_create(budgets)
+        self.counts['budgets'] += len(budgets)
+
+        # bulk_create skips the rollup signals; rebuilding one user's buckets is a single aggregate
+        MonthlyCategoryRollup.objects.rebuild(user)
+
+    def run(self):
+        """Generate everything; returns how many users, transactions, series and budgets were created."""
+        with transaction.atomic():
+            users = self.create_users()
+            if not users:
+                return self.counts
+            categories = self.create_categories(users[0])
+            subcategories = self.create_subcategories(users, categories)
+            for user in users:
+                self.generate_user(user, int(user.username[len(self.prefix):]), categories, subcategories)
+        return self.counts
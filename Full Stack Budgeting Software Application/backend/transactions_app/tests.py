@@ -1,16 +1,45 @@
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from categories_app.models import Category
 from budgets_app.models import Budget
 from subcategories_app.models import Subcategory
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from .models import Transaction
+from .models import Transaction, RecurringTransaction
+from .recurrence import occurrence_dates, occurrence_dates_desc, materialize_due_occurrences, virtual_occurrences
+from . import recurrence
+from jobs_app.models import Job
+from jobs_app.services import run_pending
+from .serializers import TransactionSerializer
+from .fast_serializers import transaction_rows, occurrence_row, represent
+from .renderers import FastJSONRenderer
+from .importers import TransactionImporter, read_csv
+from .batch import TransactionBatch
+from .synthetic import SyntheticDataGenerator
+from .search import search_transactions, ILike, WordSimilar
+from django.db.models import F, Q, Value
+from .partitioning import (
+    PartitioningError, archive_partitions, convert, ensure_partitions, months_between, partition_month, partition_name,
+    partition_status, restore_partition,
+)
+from django.core.management import call_command, CommandError
+from io import StringIO
+from currencies_app.models import ExchangeRate
+from currencies_app.services import rate_cache
+from reports_app.models import MonthlyCategoryRollup
+from categories_app.services import UNCATEGORIZED, delete_category
+from django.core.files.uploadedfile import SimpleUploadedFile
+from .pagination import sort_key
+from rest_framework.renderers import JSONRenderer
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from dateutil.relativedelta import relativedelta
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from unittest.mock import patch, MagicMock
+from unittest import skipUnless
 import os
 from dotenv import load_dotenv
 import json
@@ -365,4 +394,912 @@ class TransactionTest(TestCase):
         #     )
             
         #     self.assertEqual(transaction.amount_currency, Decimal('0.00'))
-        #     self.assertEqual(transaction.amount_usd, Decimal('0.00'))
\ No newline at end of file
+        #     self.assertEqual(transaction.amount_usd, Decimal('0.00'))
+
+
+class RecurringTransactionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="recurring_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.category = Category.objects.create(category="Recurring", user=self.user)
+        self.subcategory = Subcategory.objects.create(subcategory_name="Rent", category=self.category, user=self.user)
+        self.today = date.today()
+
+    def create_series(self, start_date, end_date, day_of_month=1, frequency='monthly'):
+        return self.client.post('/transactions/recurring-transactions/', {
+            "category": self.category.id,
+            "subcategory": self.subcategory.id,
+            "amount_currency": "2000.00",
+            "currency": "USD",
+            "description": "Rent",
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "frequency": frequency,
+            "day_of_month": day_of_month,
+        }, format='json')
+
+    def test_occurrence_dates_clamp_to_month_end(self):
+        series = RecurringTransaction(
+            start_date=date(2025, 1, 1), end_date=date(2025, 4, 30), day_of_month=31, frequency='monthly'
+        )
+        self.assertEqual(list(occurrence_dates(series)), [
+            date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)
+        ])
+        self.assertEqual(list(occurrence_dates(series, start=date(2025, 3, 1))), [date(2025, 3, 31), date(2025, 4, 30)])
+
+    def test_occurrence_dates_desc_mirror_occurrence_dates(self):
+        series = RecurringTransaction(
+            start_date=date(2025, 2, 15), end_date=date(2031, 1, 10), day_of_month=31, frequency='quarterly'
+        )
+        for start, end in [(None, None), (date(2026, 5, 31), date(2029, 8, 30)), (date(2030, 12, 1), None)]:
+            self.assertEqual(list(occurrence_dates_desc(series, start, end)),
+                             list(occurrence_dates(series, start, end))[::-1])
+        self.assertEqual(list(occurrence_dates_desc(series, end=date(2025, 1, 31))), [])
+
+    def test_create_series_only_materializes_past_due_occurrences(self):
+        start_date = (self.today - relativedelta(months=6)).replace(day=1)
+        response = self.create_series(start_date, self.today + relativedelta(years=30))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Materializing is queued; meanwhile the past-due occurrences are listed as virtual rows
+        job = Job.objects.get(pk=response.data['job']['id'])
+        self.assertEqual((job.kind, job.user), ('transactions.materialize_recurring', self.user))
+        self.assertEqual(response.data['job']['url'], f'/jobs/{job.pk}/')
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertEqual(len(virtual_occurrences(self.user, end=self.today)), 7)
+
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.SUCCEEDED, {'created': 7}))
+        stored = Transaction.objects.filter(user=self.user)
+        self.assertEqual(stored.count(), 7)
+        self.assertFalse(stored.filter(date__gt=self.today).exists())
+
+        series = RecurringTransaction.objects.get(user=self.user)
+        self.assertEqual(series.materialized_through, self.today)
+
+        # Running the periodic job again must not duplicate occurrences
+        self.assertEqual(materialize_due_occurrences(), 0)
+        self.assertEqual(materialize_due_occurrences(through=self.today + relativedelta(months=2)), 2)
+
+    def test_list_includes_future_occurrences_on_demand(self):
+        self.create_series(self.today.replace(day=1), self.today + relativedelta(months=12))
+        run_pending()
+
+        response = self.client.get('/transactions/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 13)
+        self.assertEqual(sum(1 for t in response.data if t['id'] is None), 12)
+        self.assertGreater(response.data[0]['date'], response.data[-1]['date'])
+
+    def test_series_without_an_exchange_rate(self):
+        start_date = (self.today - relativedelta(months=2)).replace(day=1)
+        data = {"category": self.category.id, "subcategory": self.subcategory.id, "amount_currency": "500.00",
+                "currency": "KWD", "description": "Rent", "start_date": start_date.isoformat(),
+                "end_date": (self.today + relativedelta(months=2)).isoformat(), "day_of_month": 1}
+        response = self.client.post('/transactions/recurring-transactions/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # A series stored before rates were checked is left pending instead of stored unconverted
+        RecurringTransaction.objects.create(user=self.user, **dict(data, category=self.category,
+                                                                   subcategory=self.subcategory))
+        with self.assertLogs('transactions_app.recurrence', 'WARNING'):
+            self.assertEqual(materialize_due_occurrences(), 0)
+        self.assertFalse(Transaction.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get('/transactions/').data, [])
+
+    def test_virtual_occurrences_load_rates_once(self):
+        ExchangeRate.objects.create(date=self.today - relativedelta(years=1), currency="EUR", rate_to_usd=Decimal("1.10"))
+        start_date = (self.today + relativedelta(months=1)).replace(day=1)
+        RecurringTransaction.objects.create(
+            user=self.user, category=self.category, subcategory=self.subcategory, amount_currency=Decimal("1500.00"),
+            currency="EUR", description="Rent", start_date=start_date,
+            end_date=start_date + relativedelta(years=30) - timedelta(days=1), day_of_month=1,
+        )
+        rate_cache.clear()
+
+        with self.assertNumQueries(2):  # the series, every EUR snapshot
+            occurrences = virtual_occurrences(self.user)
+
+        self.assertEqual(len(occurrences), 360)
+        self.assertEqual({occurrence.amount_usd for occurrence in occurrences}, {Decimal("1650.00")})
+
+    def test_delete_series_is_constant_time(self):
+        start_date = (self.today + relativedelta(months=1)).replace(day=1)
+        self.create_series(start_date, start_date + relativedelta(years=30))
+        series = RecurringTransaction.objects.get(user=self.user)
+
+        # savepoint, series lookup, savepoint, locking SELECT of the series (nothing is due yet), release,
+        # UPDATE, empty SELECT of legacy future rows, release
+        with self.assertNumQueries(8):
+            response = self.client.delete(f'/transactions/recurring-transactions/{series.id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get('/transactions/')
+        self.assertEqual(response.data, [])
+
+    def test_delete_series_keeps_past_due_occurrences(self):
+        start_date = (self.today - relativedelta(months=3)).replace(day=1)
+        self.create_series(start_date, self.today + relativedelta(months=9))
+        series = RecurringTransaction.objects.get(user=self.user)
+
+        # Deleted before the materializing job ran
+        response = self.client.delete(f'/transactions/recurring-transactions/{series.id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        stored = Transaction.objects.filter(user=self.user)
+        expected = list(occurrence_dates(series, end=self.today - timedelta(days=1)))
+        self.assertEqual(sorted(stored.values_list('date', flat=True)), expected)
+        self.assertEqual(len(expected), 4 if self.today.day > 1 else 3)
+        self.assertEqual(len(self.client.get('/transactions/').data), len(expected))
+        # The queued job finds the series inactive and stores nothing more
+        run_pending()
+        self.assertEqual(stored.count(), len(expected))
+
+
+class TransactionPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="pagination_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        self.fun = Category.objects.create(category="Fun", user=self.user)
+        self.tickets = Subcategory.objects.create(subcategory_name="Tickets", category=self.fun, user=self.user)
+
+        # Several rows share a date so the id tie-breaker matters
+        for i in range(25):
+            Transaction.objects.create(
+                user=self.user,
+                amount_currency=Decimal('10.00'),
+                category=self.food if i % 2 else self.fun,
+                subcategory=self.groceries if i % 2 else self.tickets,
+                description=f"Transaction {i}",
+                date=date(2025, 1, 1) + timedelta(days=i // 3),
+                currency="EUR" if i % 5 == 0 else "USD"
+            )
+
+    def next_url(self, response):
+        link = response.get('Link')
+        return link[link.index('<') + 1:link.index('>')] if link else None
+
+    def test_cursor_pages_cover_every_row_once(self):
+        url = '/transactions/?limit=10'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend((t['date'], t['id']) for t in response.data)
+            url = self.next_url(response)
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_page_query_count_does_not_grow_with_history(self):
+        def page_queries():
+            response = self.client.get('/transactions/?limit=5')
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(self.next_url(response))
+            return len(queries)
+
+        before = page_queries()
+        for i in range(50):
+            Transaction.objects.create(
+                user=self.user, amount_currency=Decimal('1.00'), category=self.food,
+                subcategory=self.groceries, description="Older", date=date(2024, 1, 1), currency="USD"
+            )
+        self.assertEqual(page_queries(), before)
+
+    def test_pages_only_build_the_scheduled_occurrences_they_show(self):
+        RecurringTransaction.objects.create(
+            user=self.user, category=self.fun, subcategory=self.tickets, amount_currency=Decimal('10.00'),
+            currency='EUR', description="Season ticket", start_date=date(2030, 1, 1), end_date=date(2059, 12, 31),
+            frequency='monthly', day_of_month=1,
+        )
+
+        with patch.object(recurrence, 'build_occurrence', wraps=recurrence.build_occurrence) as build:
+            response = self.client.get('/transactions/?limit=5')
+            self.client.get(self.next_url(response))
+
+        self.assertEqual([t['date'] for t in response.data][:2], ['2059-12-01', '2059-11-01'])
+        self.assertLessEqual(build.call_count, 2 * (5 + 2))
+        response = self.client.get(f'/transactions/?category={self.food.id}&limit=100')
+        self.assertFalse(any(t['id'] is None for t in response.data))
+
+    def test_filters(self):
+        response = self.client.get(f'/transactions/?category={self.food.id}&limit=100')
+        self.assertEqual(len(response.data), 12)
+
+        response = self.client.get('/transactions/?currency=eur')
+        self.assertEqual(len(response.data), 5)
+        self.assertTrue(all(t['currency'] == 'EUR' for t in response.data))
+
+    def test_cursor_pages_cover_same_day_scheduled_occurrences(self):
+        Transaction.objects.filter(user=self.user).delete()
+        for description in ("Rent", "Gym"):
+            RecurringTransaction.objects.create(
+                user=self.user, category=self.food, subcategory=self.groceries, amount_currency=Decimal('10.00'),
+                currency='USD', description=description, start_date=date(2030, 1, 1), end_date=date(2030, 12, 31),
+                frequency='monthly', day_of_month=1,
+            )
+        Transaction.objects.create(user=self.user, amount_currency=Decimal('1.00'), category=self.food,
+                                   subcategory=self.groceries, description="Stored", date=date(2030, 6, 1))
+
+        url = '/transactions/?limit=3'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            seen.extend((t['date'], t['id'], t['description']) for t in response.data)
+            url = self.next_url(response)
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        # The stored row comes before the scheduled ones of its day
+        june = [description for on_date, _, description in seen if on_date == '2030-06-01']
+        self.assertEqual(june[0], "Stored")
+        self.assertEqual(sorted(june[1:]), ["Gym", "Rent"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/transactions/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_display_currency(self):
+        ExchangeRate.objects.create(date=date(2024, 12, 1), currency="GBP", rate_to_usd=Decimal("2"))
+        ExchangeRate.objects.create(date=date(2025, 1, 5), currency="GBP", rate_to_usd=Decimal("4"))
+
+        with CaptureQueriesContext(connection) as plain:
+            self.client.get('/transactions/?limit=100')
+        with CaptureQueriesContext(connection) as converted:
+            response = self.client.get('/transactions/?limit=100&display_currency=gbp')
+        self.assertEqual(len(converted), len(plain))
+
+        for t in response.data:
+            self.assertEqual(t['display_currency'], 'GBP')
+            if t['currency'] == 'USD':
+                # Historical rates: the snapshot in force on each transaction's date
+                self.assertEqual(t['display_amount'], '5.00' if t['date'] < '2025-01-05' else '2.50')
+        self.assertNotIn('display_amount', self.client.get('/transactions/?limit=1').data[0])
+
+        response = self.client.get('/transactions/?display_currency=XYZ')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TransactionSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="search_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.car = Category.objects.create(category="Car", user=self.user)
+        self.rides = Subcategory.objects.create(subcategory_name="Uber", category=self.car, user=self.user)
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.restaurants = Subcategory.objects.create(subcategory_name="Restaurants", category=self.food, user=self.user)
+
+        self.add("Uber to airport", self.rides, date(2025, 1, 3))
+        self.add("Uber home", self.rides, date(2025, 1, 9))
+        self.add("Ride downtown", self.rides, date(2025, 1, 5))  # Matches on the subcategory name only
+        self.add("Restaurant dinner", self.restaurants, date(2025, 1, 4))
+        self.add("Lunch with team", self.restaurants, date(2025, 1, 6))
+        self.add("Tip for the Uber driver", self.rides, date(2025, 1, 7))
+
+        other = User.objects.create_user(username="search_other", password="testpassword")
+        self.add("Uber to the office", self.rides, date(2025, 1, 8), user=other)
+
+    def add(self, description, subcategory, on_date, user=None):
+        return Transaction.objects.create(
+            user=user or self.user, amount_currency=Decimal('12.00'), category=subcategory.category,
+            subcategory=subcategory, description=description, date=on_date, currency="USD",
+        )
+
+    def search(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_ranks_prefix_matches_first(self):
+        descriptions = [t['description'] for t in self.search('/transactions/search/?q=uber').data]
+        self.assertEqual(descriptions[:2], ["Uber home", "Uber to airport"])
+        self.assertCountEqual(descriptions[2:], ["Tip for the Uber driver", "Ride downtown"])
+        self.assertNotIn("Uber to the office", descriptions)
+
+    def test_matches_subcategory_names(self):
+        descriptions = [t['description'] for t in self.search('/transactions/search/?q=Restaurants').data]
+        self.assertCountEqual(descriptions, ["Restaurant dinner", "Lunch with team"])
+
+    def test_cursor_pages_cover_every_match_once(self):
+        url = '/transactions/search/?q=uber&limit=1'
+        seen = []
+        while url:
+            response = self.search(url)
+            self.assertLessEqual(len(response.data), 1)
+            seen.extend(t['id'] for t in response.data)
+            link = response.get('Link')
+            url = link[link.index('<') + 1:link.index('>')] if link else None
+
+        everything = [t['id'] for t in self.search('/transactions/search/?q=uber').data]
+        self.assertEqual(seen, everything)
+        self.assertEqual(len(set(seen)), 4)
+
+    def test_rejects_missing_query_and_bad_cursor(self):
+        self.assertEqual(self.client.get('/transactions/search/?q=%20').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/transactions/search/?q=uber&cursor=nope')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_wildcards_are_literal(self):
+        self.assertEqual(self.search('/transactions/search/?q=%25').data, [])
+
+    @skipUnless(connection.vendor == 'postgresql', "Fuzzy matching needs pg_trgm")
+    def test_fuzzy_matches_typos(self):
+        descriptions = [t['description'] for t in self.search('/transactions/search/?q=resturant').data]
+        self.assertEqual(descriptions[0], "Restaurant dinner")
+
+    @skipUnless(connection.vendor == 'postgresql', "Trigram indexes are PostgreSQL only")
+    def test_uses_trigram_index(self):
+        with connection.cursor() as cursor:
+            # The test table is tiny; make the planner show the plan it would use on a large one
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = search_transactions(self.user, "airport").explain()
+        self.assertIn("category_name_trgm_idx", plan)
+        self.assertIn("subcategory_name_trgm_idx", plan)
+        # A user with a long history is matched through the description index rather than all of their rows
+        plan = Transaction.objects.filter(
+            Q(ILike(F('description'), Value('%airport%'))) | Q(WordSimilar(Value('airport'), F('description')))
+        ).explain()
+        self.assertIn("transaction_description_trgm_idx", plan)
+
+
+class FastTransactionSerializationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="fast_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.category = Category.objects.create(category="Bills", user=self.user)
+        self.subcategory = Subcategory.objects.create(subcategory_name="Power", category=self.category, user=self.user)
+        self.budget = Budget.objects.create(
+            name="Household", total_limit=Decimal('1200.50'), user=self.user,
+            start_date=date(2025, 1, 1), end_date=date(2025, 12, 31)
+        )
+        self.series = RecurringTransaction.objects.create(
+            user=self.user, category=self.category, subcategory=self.subcategory,
+            amount_currency=Decimal('40.00'), currency='EUR', description="Électricité",
+            start_date=date(2025, 1, 5), end_date=date.today() + relativedelta(months=3),
+            frequency='monthly', day_of_month=5
+        )
+        materialize_due_occurrences()
+
+        for i in range(20):
+            Transaction.objects.create(
+                user=self.user, category=self.category, subcategory=self.subcategory,
+                amount_currency=Decimal('3.10') * i, currency='USD',
+                description=f"Line\u2028separated {i} ✓", date=date(2025, 2, 1) + timedelta(days=i),
+                budget=self.budget if i % 2 else None
+            )
+
+    def expected_bytes(self, rows):
+        # What the generic serializer produces for the same rows, stored and scheduled
+        instances = []
+        for row in rows:
+            if row['id'] is not None:
+                instances.append(Transaction.objects.get(pk=row['id']))
+            else:
+                instances.append(next(
+                    occurrence for occurrence in virtual_occurrences(self.user) if occurrence.date == row['date']
+                ))
+        return JSONRenderer().render(TransactionSerializer(instances, many=True).data)
+
+    def test_list_output_is_byte_identical(self):
+        response = self.client.get('/transactions/?limit=500')
+        rows = [occurrence_row(o) for o in virtual_occurrences(self.user)]
+        rows += list(transaction_rows(Transaction.objects.filter(user=self.user)))
+        rows.sort(key=sort_key, reverse=True)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(any(t['id'] is None for t in response.json()))
+        self.assertEqual(response.content, self.expected_bytes(rows))
+
+    def test_renderer_without_orjson(self):
+        rows = list(transaction_rows(Transaction.objects.filter(user=self.user).order_by('-date', '-id')))
+        with patch('transactions_app.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(represent(rows)), self.expected_bytes(rows))
+
+    def test_list_query_count_is_constant(self):
+        # One query for the user's recurring series and one joined query for the page
+        with self.assertNumQueries(2):
+            response = self.client.get('/transactions/?limit=500')
+        self.assertGreater(len(response.json()), 20)
+
+
+class TransactionImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="import_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="EUR", rate_to_usd=Decimal("1.10"))
+
+    def upload(self, name, content, **extra):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post('/transactions/import/', {'file': upload, **extra}, format='multipart')
+
+    def test_csv_import_reports_bad_rows_and_keeps_going(self):
+        content = (
+            "date,description,amount,currency,category,subcategory\n"
+            "2025-01-05,Market,12.50,USD,food,GROCERIES\n"
+            "2025-01-06,Bakery,10.00,EUR,Food,Groceries\n"
+            "06/01/2025,Bad date,1.00,USD,Food,Groceries\n"
+            "2025-01-07,Unknown,1.00,USD,Travel,Trains\n"
+            "2025-01-08,Bad currency,1.00,XYZ,,\n"
+            "2025-01-09,No category,3.00,,,\n"
+        )
+        response = self.upload('statement.csv', content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 3)
+        self.assertEqual(response.data['error_count'], 3)
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5, 6])
+
+        bakery = Transaction.objects.get(user=self.user, description="Bakery")
+        self.assertEqual(bakery.amount_usd, Decimal('11.00'))
+        self.assertEqual(bakery.subcategory, self.groceries)
+        self.assertEqual(
+            Transaction.objects.get(user=self.user, description="No category").category.category, "Uncategorized"
+        )
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    def test_rows_are_inserted_in_batches(self):
+        rows = "".join(f"2025-02-{day:02d},Row {day},1.00,USD,Food,Groceries\n" for day in range(1, 11))
+        rows_iter = read_csv(SimpleUploadedFile('s.csv', ("date,description,amount,currency,category,subcategory\n" + rows).encode()))
+
+        with patch.object(Transaction.objects, 'bulk_create', wraps=Transaction.objects.bulk_create) as bulk_create:
+            summary = TransactionImporter(self.user, batch_size=4).run(rows_iter)
+
+        self.assertEqual(summary['imported'], 10)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [4, 4, 2])
+
+    def test_ofx_import_skips_credits(self):
+        content = (
+            "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>EUR\n"
+            "<BANKTRANLIST>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250110120000<TRNAMT>-20.00<NAME>Cafe</STMTTRN>\n"
+            "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250111<TRNAMT>500.00<NAME>Salary</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        )
+        response = self.upload('statement.ofx', content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['imported'], response.data['skipped']), (1, 1))
+        cafe = Transaction.objects.get(user=self.user)
+        self.assertEqual((cafe.description, cafe.date, cafe.currency), ("Cafe", date(2025, 1, 10), "EUR"))
+        self.assertEqual(cafe.amount_usd, Decimal('22.00'))
+
+    def test_rows_without_an_exchange_rate_are_reported(self):
+        content = (
+            "date,description,amount,currency,category,subcategory\n"
+            "2025-01-05,Souq,12.50,KWD,Food,Groceries\n"
+            "2025-01-06,Bakery,10.00,EUR,Food,Groceries\n"
+        )
+        response = self.upload('statement.csv', content)
+
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual(response.data['errors'], [{'row': 2, 'error': "No exchange rate for KWD on 2025-01-05."}])
+        self.assertFalse(Transaction.objects.filter(currency="KWD").exists())
+
+    def test_rows_only_use_the_users_own_subcategories(self):
+        other = User.objects.create_user(username="import_other", password="testpassword")
+        theirs = Subcategory.objects.create(subcategory_name="Snacks", category=self.food, user=other)
+        content = (
+            "date,description,amount,currency,category,subcategory\n"
+            "2025-01-05,Chips,2.00,USD,Food,Snacks\n"
+            "2025-01-06,Nuts,3.00,USD,Food,snacks\n"
+            "2025-01-07,Unsorted,1.00,USD,,\n"
+        )
+        self.assertEqual(self.upload('statement.csv', content).data['imported'], 3)
+
+        snacks = Subcategory.objects.get(subcategory_name="Snacks", user=self.user)
+        self.assertNotEqual(snacks, theirs)
+        self.assertEqual(set(Transaction.objects.filter(user=self.user, description__in=["Chips", "Nuts"])
+                             .values_list('subcategory', flat=True)), {snacks.id})
+        unsorted = Transaction.objects.get(user=self.user, description="Unsorted")
+        self.assertEqual(unsorted.subcategory.user, self.user)
+        # A fresh "Uncategorized" category belongs to no user, so the importing user can still be deleted
+        self.assertIsNone(unsorted.category.user)
+        self.user.delete()
+        self.assertTrue(Category.objects.filter(category=UNCATEGORIZED).exists())
+
+    def test_rejected_rows_do_not_create_subcategories(self):
+        content = (
+            "date,description,amount,currency,category,subcategory\n"
+            "2025-01-05,Chips,lots,USD,Food,Snacks\n"
+            "2025-13-01,Nuts,3.00,USD,Food,Nuts\n"
+            "2025-01-07,Souq,1.00,KWD,Food,Souvenirs\n"
+        )
+        response = self.upload('statement.csv', content)
+
+        self.assertEqual((response.data['imported'], response.data['error_count']), (0, 3))
+        self.assertEqual(list(Subcategory.objects.filter(user=self.user).values_list('subcategory_name', flat=True)),
+                         ["Groceries"])
+
+    def test_amounts_too_large_in_usd_are_reported(self):
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="KWD", rate_to_usd=Decimal("3.25"))
+        content = (
+            "date,description,amount,currency,category,subcategory\n"
+            "2025-01-05,Villa,99999999.00,KWD,Food,Groceries\n"
+            "2025-01-06,Market,10.00,KWD,Food,Groceries\n"
+        )
+        response = self.upload('statement.csv', content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+
+    def test_non_utf8_csv_is_read(self):
+        upload = SimpleUploadedFile('statement.csv', "date,description,amount\n2025-01-05,Café,4.00\n".encode('latin-1'))
+        response = self.client.post('/transactions/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.get(user=self.user).description, "Caf\ufffd")
+
+        # A field past the csv module's size limit makes the reader itself fail
+        upload = SimpleUploadedFile('statement.csv', b'date,description,amount\n2025-01-06,"' + b'x' * 200_000 + b'",1\n')
+        response = self.client.post('/transactions/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Unreadable CSV", response.data['detail'])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+    def test_rejects_unreadable_files(self):
+        response = self.upload('statement.csv', "when,what\n2025-01-01,x\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.upload('statement.pdf', "%PDF")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TransactionBatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="batch_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(category="Food", user=self.user)
+        self.groceries = Subcategory.objects.create(subcategory_name="Groceries", category=self.food, user=self.user)
+        self.car = Category.objects.create(category="Car", user=self.user)
+        self.fuel = Subcategory.objects.create(subcategory_name="Fuel", category=self.car, user=self.user)
+        self.budget = Budget.objects.create(name="January", start_date="2025-01-01", end_date="2025-01-31",
+                                            user=self.user)
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="EUR", rate_to_usd=Decimal("1.10"))
+
+        self.market = self.add("Market", '10.00')
+        self.bakery = self.add("Bakery", '5.00')
+
+    def add(self, description, amount, user=None):
+        return Transaction.objects.create(
+            user=user or self.user, category=self.food, subcategory=self.groceries, amount_currency=Decimal(amount),
+            currency="USD", description=description, date=date(2025, 1, 10),
+        )
+
+    def create_data(self, description, **fields):
+        return {'category': self.food.id, 'subcategory': self.groceries.id, 'amount_currency': '4.00',
+                'description': description, 'date': '2025-01-12', **fields}
+
+    def batch(self, operations):
+        return self.client.post('/transactions/batch/', {'operations': operations}, format='json')
+
+    def test_applies_creates_updates_and_deletes(self):
+        response = self.batch([
+            {'op': 'create', 'data': self.create_data("Fuel", category=self.car.id, subcategory=self.fuel.id,
+                                                      currency='EUR', budget=self.budget.id)},
+            {'op': 'update', 'id': self.market.id, 'data': {'amount_currency': '20.00', 'date': '2025-02-01'}},
+            {'op': 'delete', 'id': self.bakery.id},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        created, updated, deleted = response.data['results']
+        self.assertEqual((created['status'], updated['status'], deleted), (201, 200, {'op': 'delete', 'status': 204,
+                                                                                     'id': self.bakery.id}))
+        self.assertEqual(created['transaction']['budget']['name'], "January")
+        self.assertEqual(updated['transaction']['description'], "Market")
+        self.assertEqual(Transaction.objects.get(pk=created['transaction']['id']).amount_usd, Decimal('4.40'))
+
+        self.market.refresh_from_db()
+        self.assertEqual((self.market.amount_usd, self.market.date), (Decimal('20.00'), date(2025, 2, 1)))
+        self.assertFalse(Transaction.objects.filter(pk=self.bakery.pk).exists())
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    def test_nothing_is_applied_when_one_operation_is_invalid(self):
+        response = self.batch([
+            {'op': 'create', 'data': self.create_data("Valid")},
+            {'op': 'update', 'id': self.market.id, 'data': {'subcategory': self.fuel.id}},
+            {'op': 'create', 'data': self.create_data("Outside budget", budget=self.budget.id, date='2025-03-01')},
+            {'op': 'delete', 'id': self.bakery.id},
+            {'op': 'rename'},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([result['status'] for result in response.data['results']], [424, 400, 400, 424, 400])
+        self.assertIn("does not belong to category", response.data['results'][1]['errors']['non_field_errors'][0])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+        self.market.refresh_from_db()
+        self.assertEqual(self.market.subcategory, self.groceries)
+
+    def test_other_users_transactions_are_not_found(self):
+        other = User.objects.create_user(username="batch_other", password="testpassword")
+        theirs = self.add("Theirs", '1.00', user=other)
+
+        response = self.batch([{'op': 'delete', 'id': theirs.id},
+                               {'op': 'update', 'id': self.market.id, 'data': {}},
+                               {'op': 'delete', 'id': self.market.id}])
+
+        self.assertEqual(response.data['results'][0]['errors']['id'], ["Transaction not found."])
+        self.assertIn('id', response.data['results'][2]['errors'])  # The same transaction twice
+        self.assertTrue(Transaction.objects.filter(pk=theirs.pk).exists())
+
+    def test_other_users_subcategories_are_not_found(self):
+        other = User.objects.create_user(username="batch_subcategory_other", password="testpassword")
+        theirs = Subcategory.objects.create(subcategory_name="Snacks", category=self.food, user=other)
+
+        response = self.batch([
+            {'op': 'create', 'data': self.create_data("Chips", subcategory=theirs.id)},
+            {'op': 'update', 'id': self.market.id, 'data': {'subcategory': theirs.id}},
+        ])
+
+        self.assertEqual([result['status'] for result in response.data['results']], [400, 400])
+        self.assertIn('subcategory', response.data['results'][0]['errors'])
+        self.assertIn('subcategory', response.data['results'][1]['errors'])
+        self.market.refresh_from_db()
+        self.assertEqual(self.market.subcategory, self.groceries)
+
+    def test_rows_deleted_since_loading_are_not_subtracted_again(self):
+        load = TransactionBatch.load
+
+        def load_then_delete(batch, items):
+            load(batch, items)
+            # A row that is already gone by the time the batch writes
+            Transaction.objects.get(pk=self.bakery.pk).delete()
+
+        with patch.object(TransactionBatch, 'load', load_then_delete):
+            response = self.batch([{'op': 'delete', 'id': self.bakery.id}])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Transaction.objects.filter(user=self.user)), [self.market])
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    def test_amounts_without_an_exchange_rate_are_refused(self):
+        response = self.batch([
+            {'op': 'create', 'data': self.create_data("Souq", currency='KWD')},
+            {'op': 'update', 'id': self.market.id, 'data': {'currency': 'KWD'}},
+            {'op': 'update', 'id': self.bakery.id, 'data': {'description': "Only a rename"}},
+        ])
+
+        self.assertEqual([result['status'] for result in response.data['results']], [400, 400, 424])
+        self.assertIn('currency', response.data['results'][0]['errors'])
+        self.market.refresh_from_db()
+        self.assertEqual(self.market.currency, "USD")
+
+    def test_amounts_too_large_in_usd_are_refused(self):
+        ExchangeRate.objects.create(date=date(2025, 1, 1), currency="KWD", rate_to_usd=Decimal("3.25"))
+
+        response = self.batch([
+            {'op': 'create', 'data': self.create_data("Villa", currency='KWD', amount_currency='50000000.00')},
+            {'op': 'update', 'id': self.market.id, 'data': {'currency': 'KWD', 'amount_currency': '40000000.00'}},
+            {'op': 'create', 'data': self.create_data("Souq", currency='KWD')},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([result['status'] for result in response.data['results']], [400, 400, 424])
+        self.assertIn("too large", response.data['results'][0]['errors']['amount_currency'][0])
+        self.assertIn('amount_currency', response.data['results'][1]['errors'])
+        self.market.refresh_from_db()
+        self.assertEqual(self.market.currency, "USD")
+
+    def test_rejects_malformed_bodies(self):
+        self.assertEqual(self.batch([]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.batch({'op': 'delete'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def operations(count):
+            return [{'op': 'create', 'data': self.create_data(f"Row {index}")} for index in range(count)] + [
+                {'op': 'update', 'id': self.market.id, 'data': {'description': "Renamed"}},
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.batch(operations(5)).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.batch(operations(50)).status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 57)
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+    def test_invalidates_cached_reports(self):
+        etag = self.client.get('/reports/overview-data/')['ETag']
+        self.batch([{'op': 'create', 'data': self.create_data("New")}])
+        response = self.client.get('/reports/overview-data/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SyntheticDataTest(TestCase):
+    def generate(self, prefix, **options):
+        options = {'users': 2, 'years': 1, 'transactions_per_month': 15, 'seed': 7, 'end': date(2025, 6, 30), **options}
+        return SyntheticDataGenerator(prefix=prefix, **options).run()
+
+    @patch('currencies_app.services.requests.get', side_effect=AssertionError("network access"))
+    def test_generates_consistent_data_without_network(self, mock_get):
+        counts = self.generate('synth')
+        self.assertEqual(counts['users'], 2)
+        users = User.objects.filter(username__startswith='synth')
+        transactions = Transaction.objects.filter(user__in=users)
+        self.assertEqual(transactions.count(), counts['transactions'])
+        self.assertEqual(RecurringTransaction.objects.filter(user__in=users).count(), counts['recurring_transactions'])
+        # 12 monthly budgets per user, plus the overlapping yearly ones
+        self.assertEqual(Budget.objects.filter(user__in=users).count(), counts['budgets'])
+        self.assertGreaterEqual(counts['budgets'], 2 * 13)
+
+        self.assertEqual(transactions.filter(date__lt=date(2024, 7, 1)).count(), 0)
+        self.assertEqual(transactions.filter(date__gt=date(2025, 6, 30)).count(), 0)
+        self.assertEqual(transactions.filter(recurring_transaction__isnull=False,
+                                             subcategory__subcategory_name="Rent").count(), 2 * 12)
+        self.assertTrue(User.objects.get(username='synth00000').check_password('synthetic-password'))
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(), [])
+        mock_get.assert_not_called()
+
+    def test_same_seed_gives_same_data(self):
+        self.generate('first')
+        self.generate('second')
+
+        def amounts(prefix):
+            return list(Transaction.objects.filter(user__username__startswith=prefix)
+                        .order_by('user__username', 'date', 'description', 'amount_currency')
+                        .values_list('date', 'description', 'amount_currency', 'currency'))
+        self.assertEqual(amounts('first'), amounts('second'))
+
+    def test_existing_users_are_left_alone(self):
+        self.generate('synth', users=1)
+        counts = self.generate('synth', users=2)
+        self.assertEqual(counts['users'], 1)
+        self.assertEqual(User.objects.filter(username__startswith='synth').count(), 2)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_synthetic_data', users=1, years=1, transactions_per_month=5, end='2025-06-30', stdout=out)
+        self.assertIn("Created 1 users", out.getvalue())
+
+
+class PartitionNamingTest(TestCase):
+    def test_names_round_trip(self):
+        self.assertEqual(partition_name(date(2024, 3, 1)), 'app_transactions_y2024m03')
+        self.assertEqual(partition_month('app_transactions_y2024m03'), date(2024, 3, 1))
+        self.assertIsNone(partition_month('app_transactions_default'))
+        self.assertEqual(list(months_between(date(2024, 11, 15), date(2025, 2, 1))),
+                         [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)])
+
+    @skipUnless(connection.vendor != 'postgresql', "Checks the error on other databases")
+    def test_needs_postgresql(self):
+        with self.assertRaises(PartitioningError):
+            convert()
+        with self.assertRaises(CommandError):
+            call_command('partition_transactions', 'status', stdout=StringIO())
+        # setup.sh runs this on every start; it must not fail where the table cannot be partitioned
+        call_command('partition_transactions', 'ensure', '--if-partitioned', stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'postgresql', "Partitioning needs PostgreSQL")
+class TransactionPartitioningTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='partitioned', password='password')
+        self.category = Category.objects.create(category="Food", user=self.user)
+        self.subcategory = Subcategory.objects.create(subcategory_name="Groceries", category=self.category, user=self.user)
+        for month in (date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)):
+            for day in (3, 17):
+                self.add(month.replace(day=day))
+
+    def add(self, on_date, amount='10.00'):
+        return Transaction.objects.create(
+            user=self.user, category=self.category, subcategory=self.subcategory, amount_currency=Decimal(amount),
+            amount_usd=Decimal(amount), currency='USD', description="Groceries", date=on_date,
+        )
+
+    def scanned_partitions(self, queryset):
+        plan = queryset.explain()
+        return {partition['name'] for partition in partition_status()['partitions'] if partition['name'] in plan}
+
+    def test_convert_keeps_rows_and_ids(self):
+        last_id = Transaction.objects.order_by('-id').values_list('id', flat=True)[0]
+        created = convert(months_ahead=1)
+        self.assertTrue(partition_status()['partitioned'])
+        self.assertIn('app_transactions_y2024m02', created)
+        self.assertIn('app_transactions_default', created)
+        self.assertIn(partition_name(date.today().replace(day=1) + relativedelta(months=1)), created)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 6)
+
+        new = self.add(date(2024, 2, 20))
+        self.assertGreater(new.id, last_id)
+        self.assertGreater(self.add(date(2024, 2, 21)).id, new.id)
+        with self.assertRaises(PartitioningError):
+            convert()
+
+    def test_date_range_queries_only_scan_matching_partitions(self):
+        convert(months_ahead=1)
+        queryset = Transaction.objects.filter(user=self.user, date__range=(date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(self.scanned_partitions(queryset), {'app_transactions_y2024m02'})
+        self.assertEqual(queryset.count(), 2)
+
+        queryset = Transaction.objects.filter(user=self.user, date__gte=date(2024, 2, 10), date__lt=date(2024, 3, 10))
+        self.assertEqual(self.scanned_partitions(queryset), {'app_transactions_y2024m02', 'app_transactions_y2024m03'})
+
+    def test_ensure_creates_missing_months_and_moves_default_rows(self):
+        convert(months_ahead=0)
+        # 2024-05 has no partition yet, so its row lands in the default partition
+        stray = self.add(date(2024, 5, 9))
+        self.assertEqual(self.scanned_partitions(Transaction.objects.filter(date=stray.date)),
+                         {'app_transactions_default'})
+
+        created = ensure_partitions(through=date(2024, 6, 15), months_ahead=1)
+        self.assertEqual(created[:4], ['app_transactions_y2024m04', 'app_transactions_y2024m05',
+                                       'app_transactions_y2024m06', 'app_transactions_y2024m07'])
+        self.assertEqual(self.scanned_partitions(Transaction.objects.filter(date=stray.date)),
+                         {'app_transactions_y2024m05'})
+        self.assertEqual(Transaction.objects.get(date=stray.date).id, stray.id)
+        self.assertEqual(ensure_partitions(through=date(2024, 6, 15), months_ahead=1), [])
+
+    def test_archive_and_restore(self):
+        convert(months_ahead=1)
+        archived = archive_partitions(date(2024, 3, 1))
+        self.assertEqual(archived, ['app_transactions_y2024m01', 'app_transactions_y2024m02'])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(partition_status()['archived'], archived)
+
+        restore_partition('app_transactions_y2024m02')
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 4)
+        with self.assertRaises(PartitioningError):
+            restore_partition('app_transactions_y2024m02')
+
+    def test_rebuild_keeps_rollups_of_archived_months(self):
+        convert(months_ahead=1)
+        archive_partitions(date(2024, 3, 1))
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(self.user), [])
+
+        MonthlyCategoryRollup.objects.rebuild(self.user)
+        january = MonthlyCategoryRollup.objects.get(user=self.user, month=date(2024, 1, 1))
+        self.assertEqual((january.total_usd, january.transaction_count), (Decimal('20.00'), 2))
+        self.assertEqual(MonthlyCategoryRollup.objects.filter(user=self.user).count(), 3)
+
+    def test_restore_repairs_references_deleted_while_archived(self):
+        travel = Category.objects.create(category="Travel", user=self.user)
+        flights = Subcategory.objects.create(subcategory_name="Flights", category=travel, user=self.user)
+        trip = Transaction.objects.create(
+            user=self.user, category=travel, subcategory=flights, amount_currency=Decimal('80.00'),
+            amount_usd=Decimal('80.00'), currency='USD', description="Flight", date=date(2024, 1, 9),
+        )
+        other = User.objects.create_user(username='archived', password='password')
+        Transaction.objects.create(
+            user=other, category=self.category, subcategory=self.subcategory, amount_currency=Decimal('5.00'),
+            amount_usd=Decimal('5.00'), currency='USD', description="Groceries", date=date(2024, 1, 10),
+        )
+        convert(months_ahead=1)
+        archive_partitions(date(2024, 2, 1))
+        delete_category(travel)
+        other.delete()
+
+        restore_partition('app_transactions_y2024m01')
+        trip = Transaction.objects.get(pk=trip.pk)
+        self.assertEqual((trip.category.category, trip.subcategory.subcategory_name), (UNCATEGORIZED, UNCATEGORIZED))
+        self.assertEqual(Transaction.objects.filter(date__lt=date(2024, 2, 1)).count(), 3)
+        self.assertEqual(MonthlyCategoryRollup.objects.verify(), [])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('partition_transactions', 'ensure', '--if-partitioned', stdout=out)
+        self.assertEqual(out.getvalue(), "")
+        call_command('partition_transactions', 'convert', '--months-ahead', '1', stdout=out)
+        call_command('partition_transactions', 'archive', '--before', '2024-02', stdout=out)
+        call_command('partition_transactions', 'status', stdout=out)
+        self.assertIn("app_transactions_y2024m01: archived", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('partition_transactions', 'archive', '--before', 'February', stdout=out)
@@ -1,10 +1,17 @@
 from django.urls import path
-from transactions_app.views import TransactionView, RecurringTransactionView
+from transactions_app.views import (
+    TransactionView, RecurringTransactionView, TransactionImportView, TransactionExportView,
+    TransactionSearchView, TransactionBatchView,
+)
 
 urlpatterns = [
     path('', TransactionView.as_view(), name='transactions-list'),
     path('<int:pk>/', TransactionView.as_view(), name='transaction-by-id'),
     path('date-range/', TransactionView.as_view(), name='transactions-by-date-range'),
+    path('search/', TransactionSearchView.as_view(), name='transactions-search'),
+    path('batch/', TransactionBatchView.as_view(), name='transactions-batch'),
+    path('import/', TransactionImportView.as_view(), name='transactions-import'),
+    path('export/', TransactionExportView.as_view(), name='transactions-export'),
     path('transactions/', TransactionView.as_view(), name='transactions'),
     path('transactions/<int:pk>/', TransactionView.as_view(), name='transaction-detail'),
     path('recurring-transactions/', RecurringTransactionView.as_view(), name='recurring-transactions'),
@@ -1,5 +1,4 @@
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
@@ -10,11 +9,37 @@ from budgets_app.models import Budget
 from .serializers import TransactionSerializer, RecurringTransactionSerializer
 from budgets_app.serializers import BudgetSerializer
 from rest_framework.exceptions import NotFound
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
 from django.db import transaction
+from rest_framework.utils.urls import replace_query_param
+from .recurrence import materialize_series, scheduled_occurrences
+from jobs_app.services import enqueue
+from jobs_app.serializers import job_reference
+from euniceproj.response_cache import bump_data_version
+from euniceproj.instrumentation import timed
+from .pagination import page_size, decode_cursor, paginate
+from .fast_serializers import transaction_rows, occurrence_row, represent, with_display_amount
+from currencies_app.services import ExchangeRateUnavailable, RateTable
+from .renderers import FastJSONRenderer
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.parsers import MultiPartParser
+from .importers import READERS, ImportFileError, TransactionImporter
+from .search import search_transactions, decode_search_cursor, search_page
+from .batch import BatchError, TransactionBatch
+from reports_app.exports import (
+    CSVExportRenderer, XLSXExportRenderer, export_response, parse_currency, parse_export_filters, transaction_export
+)
+import os
+
+
+def display_currency_param(request):
+    # ?currency= already filters listings by the currency a transaction was entered in
+    value = request.query_params.get('display_currency')
+    return parse_currency(value, 'display_currency') if value else None
+
 
 class RecurringTransactionView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -33,69 +58,47 @@ class RecurringTransactionView(APIView):
         serializer = RecurringTransactionSerializer(data=data)
         if serializer.is_valid():
             with transaction.atomic():
-                # Save the recurring transaction
                 recurring_transaction = serializer.save()
 
-                # Create all future transactions up to the end date
-                current_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-                end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-                day_of_month = data['day_of_month']
-
-                while current_date <= end_date:
-                    # Adjust the day of month if it exceeds the month's last day
-                    try:
-                        transaction_date = current_date.replace(day=day_of_month)
-                    except ValueError:
-                        # If day is invalid (e.g., 31 in a 30-day month), use last day
-                        next_month = current_date.replace(day=1) + relativedelta(months=1)
-                        transaction_date = next_month - timedelta(days=1)
-
-                    if transaction_date >= current_date and transaction_date <= end_date:
-                        Transaction.objects.create(
-                            user=request.user,
-                            category=recurring_transaction.category,
-                            subcategory=recurring_transaction.subcategory,
-                            amount_currency=recurring_transaction.amount_currency,
-                            currency=recurring_transaction.currency,
-                            description=recurring_transaction.description,
-                            date=transaction_date,
-                            recurring_transaction=recurring_transaction
-                        )
-
-                    # Move to next occurrence based on frequency
-                    if data['frequency'] == 'monthly':
-                        current_date = current_date + relativedelta(months=1)
-                    elif data['frequency'] == 'quarterly':
-                        current_date = current_date + relativedelta(months=3)
-                    else:  # yearly
-                        current_date = current_date + relativedelta(years=1)
+                # Past-due occurrences become rows in the background; the job commits with the series,
+                # and until it runs the listings show those occurrences as virtual rows
+                job = enqueue(
+                    'transactions.materialize_recurring', {'series_id': recurring_transaction.pk}, user=request.user
+                )
 
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response({**serializer.data, 'job': job_reference(job)}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
-        try:
-            recurring_transaction = RecurringTransaction.objects.get(pk=pk, user=request.user)
-        except RecurringTransaction.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
-
         with transaction.atomic():
-            # Delete future transactions
-            future_transactions = Transaction.objects.filter(
-                recurring_transaction=recurring_transaction,
-                date__gte=datetime.now().date()
-            )
-            future_transactions.delete()
+            is_active = RecurringTransaction.objects.filter(pk=pk, user=request.user).values_list(
+                'is_active', flat=True
+            ).first()
+            if is_active is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            if is_active:
+                # Occurrences due before today are kept as rows, even if the worker has not stored them yet
+                try:
+                    materialize_series(pk, datetime.now().date() - timedelta(days=1))
+                except ExchangeRateUnavailable as exc:
+                    return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            # Future occurrences are virtual, so deactivating the series removes them
+            RecurringTransaction.objects.filter(pk=pk).update(is_active=False)
+            # The queryset update skips post_save; the overview's scheduled occurrences change
+            bump_data_version(request.user.id)
 
-            # Mark recurring transaction as inactive
-            recurring_transaction.is_active = False
-            recurring_transaction.save()
+            # Only series expanded eagerly before lazy occurrences still have future rows
+            Transaction.objects.filter(
+                recurring_transaction_id=pk,
+                date__gte=datetime.now().date()
+            ).delete()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 class TransactionView(APIView):
-    authentication_classes = [JWTAuthentication] 
+    authentication_classes = [CachedJWTAuthentication] 
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     def get(self, request, pk=None):
         # Handle transaction by primary key if ID (pk) is provided
@@ -110,43 +113,77 @@ class TransactionView(APIView):
         # Handle transactions with optional date range filters
         start_date_str = request.query_params.get('start_date')
         end_date_str = request.query_params.get('end_date')
+        start_date = end_date = None
+
+        transactions = Transaction.objects.filter(user=request.user)
 
         if start_date_str and end_date_str:
             try:
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
             except ValueError:
                 return Response(
                     {"detail": "Invalid date format. Use YYYY-MM-DD."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            transactions = Transaction.objects.filter(
-                user=request.user,
-                date__gte=start_date,
-                date__lte=end_date
-            ).order_by('-date')
+            transactions = transactions.filter(date__gte=start_date, date__lte=end_date)
 
-            if not transactions.exists():
-                return Response(
-                    {"detail": "No transactions found within the given date range."},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+        # Optional filters: ?category=<id>&subcategory=<id>&budget=<id>&currency=<code>
+        filters = {}
+        for param in ('category', 'subcategory', 'budget'):
+            value = request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    return Response({"detail": f"Invalid {param} id."}, status=status.HTTP_400_BAD_REQUEST)
+                filters[f'{param}_id'] = int(value)
+        if request.query_params.get('currency'):
+            filters['currency'] = request.query_params['currency'].upper()
+        transactions = transactions.filter(**filters)
+        # ?display_currency=<code> adds each amount converted at its date's stored rate
+        display_currency = display_currency_param(request)
 
-            serializer = TransactionSerializer(transactions, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        # If no date filters are applied, get all transactions
-        transactions = Transaction.objects.filter(user=request.user).order_by('-date')
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Keyset pagination on (date, id): ?limit=<n>&cursor=<opaque cursor from the Link header>
+        limit = page_size(request.query_params)
+        cursor = request.query_params.get('cursor')
+        cursor = decode_cursor(cursor) if cursor else None
+
+        scheduled_end = end_date
+        if cursor and (scheduled_end is None or cursor[0] < scheduled_end):
+            scheduled_end = cursor[0]
+        rates = RateTable()
+        if 'budget_id' in filters:
+            scheduled = []  # Scheduled occurrences have no budget
+        else:
+            # Per series: one more than the page, plus the cursor's own day it may already have shown
+            occurrences = scheduled_occurrences(request.user, start_date, scheduled_end, rates, limit + 2, **filters)
+            scheduled = (occurrence_row(occurrence, display_currency, rates) for occurrence in occurrences)
+        rows = transaction_rows(transactions)
+        if display_currency:
+            rows = with_display_amount(rows, display_currency)
+        page, next_cursor = paginate(rows, scheduled, limit, cursor)
+
+        if start_date and not page and not cursor:
+            return Response(
+                {"detail": "No transactions found within the given date range."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # One joined query for the page; rows are built without per-row serializers
+        with timed('serialize'):
+            data = represent(page, display_currency)
+        response = Response(data, status=status.HTTP_200_OK)
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
 
     def post(self, request):
         # Add user to the data
         data = request.data.copy()
         data['user'] = request.user.id
 
-        serializer = TransactionSerializer(data=data)
+        serializer = TransactionSerializer(data=data, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -164,12 +201,12 @@ class TransactionView(APIView):
                 budget_id = budget_data.get('id')
                 if budget_id:
                     try:
-                        budget = Budget.objects.get(id=budget_id)
+                        budget = Budget.objects.for_user(request.user).get(id=budget_id)
                         request.data['budget'] = budget.id  
                     except Budget.DoesNotExist:
                         return Response({"detail": "Budget not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = TransactionSerializer(transaction, data=request.data, partial=False)
+        serializer = TransactionSerializer(transaction, data=request.data, partial=False, context={'request': request})
 
         if serializer.is_valid():
             serializer.save()
@@ -183,4 +220,87 @@ class TransactionView(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
         
         transaction.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class TransactionSearchView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get(self, request):
+        # ?q=<text>&limit=<n>&cursor=<opaque cursor from the Link header>; best matches first
+        rows = search_transactions(request.user, request.query_params.get('q', ''))
+        display_currency = display_currency_param(request)
+        if display_currency:
+            rows = with_display_amount(rows, display_currency)
+        cursor = request.query_params.get('cursor')
+        cursor = decode_search_cursor(cursor) if cursor else None
+        page, next_cursor = search_page(rows, page_size(request.query_params), cursor)
+
+        with timed('serialize'):
+            data = represent(page, display_currency)
+        response = Response(data, status=status.HTTP_200_OK)
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
+
+
+class TransactionImportView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        # Multipart upload: file=<statement.csv|statement.ofx>, optional format=csv|ofx
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"detail": "Upload a CSV or OFX file in the 'file' field."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = (request.data.get('format') or os.path.splitext(upload.name)[1].lstrip('.')).lower()
+        if file_format not in READERS:
+            return Response({"detail": "Unsupported file format. Use CSV or OFX."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Rows are parsed while the file is read and inserted in batches, so the upload is never held in memory
+        try:
+            summary = TransactionImporter(request.user).run(READERS[file_format](upload))
+        except ImportFileError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not summary['imported'] and summary['error_count']:
+            return Response(summary, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_201_CREATED)
+
+
+class TransactionBatchView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        # {"operations": [{"op": "create", "data": {...}}, {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}]}
+        try:
+            operations = request.data.get('operations') if isinstance(request.data, dict) else request.data
+            applied, results = TransactionBatch(request.user).run(operations)
+        except BatchError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # All or nothing: one invalid operation and the response lists what to fix, having written nothing
+        if not applied:
+            return Response({"detail": "No operation was applied: fix the operations with status 400.",
+                             "results": results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class TransactionExportView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVExportRenderer, XLSXExportRenderer]
+
+    def get(self, request):
+        # ?format=csv|xlsx&start_date=&end_date=&category=<id>&currency=<code>
+        filters = parse_export_filters(request.user, request.query_params)
+        header, rows = transaction_export(request.user, **filters)
+        # Rows are streamed from a server-side iterator, so memory stays flat for any history length
+        return export_response(request.accepted_renderer.format, 'transactions', header, rows, 'Transactions')
@@ -0,0 +1,39 @@
+import asyncio
+from jobs_app.services import job
+from .services import WolframUnavailable, result_answer, wolfram_client
+
+
+def run(method, *args):
+    """Run a client coroutine on a fresh event loop in the worker thread, closing the loop's HTTP client after."""
+    async def call():
+        try:
+            return await method(*args)
+        finally:
+            await wolfram_client.aclose()
+    return asyncio.run(call())
+
+
+# Upstream failures raise so the worker retries them with backoff; results match the synchronous views
+
+@job('wolfram.query')
+def query(query):
+    result = run(wolfram_client.query, query)
+    if not result or "queryresult" not in result:
+        raise WolframUnavailable("Failed to fetch data from Wolfram Alpha")
+    return {"answer": result_answer(result)}
+
+
+@job('wolfram.currency_conversion')
+def currency_conversion(amount, from_currency, to_currency):
+    conversion_result = run(wolfram_client.get_currency_conversion, amount, from_currency, to_currency)
+    if conversion_result.startswith("Error"):
+        raise WolframUnavailable(conversion_result)
+    return {"conversion_result": conversion_result}
+
+
+@job('wolfram.budget_analysis')
+def budget_analysis(budget_amount):
+    analysis_result = run(wolfram_client.get_budget_analysis, budget_amount)
+    if analysis_result.startswith("Error"):
+        raise WolframUnavailable(analysis_result)
+    return {"budget_analysis": analysis_result}
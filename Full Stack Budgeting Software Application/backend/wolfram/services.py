@@ -1,35 +1,89 @@
-import requests
-import os
-from dotenv import load_dotenv
+import asyncio
+import hashlib
+import logging
+import weakref
+import httpx
 from django.conf import settings
+from django.core.cache import cache
+from euniceproj.instrumentation import timed
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 WOLFRAM_API_URL = "http://api.wolframalpha.com/v2/query"
+WOLFRAM_TIMEOUT = httpx.Timeout(10.0, connect=5.0)  # seconds
+WOLFRAM_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+
+class WolframUnavailable(Exception):
+    pass
+
+
+def cache_key(input_query):
+    return 'wolfram:' + hashlib.sha256(input_query.encode()).hexdigest()
+
 
 class WolframAlphaAPI:
-    def __init__(self):
-        self.app_id = os.getenv("WOLFRAM_APP_ID")  
+    """Async Wolfram|Alpha client meant to be shared by every request of the process.
+
+    - Each event loop gets one pooled ``httpx.AsyncClient``, so keep-alive connections are reused.
+    - Identical queries already in flight on the loop wait for the same upstream request.
+    - Successful results are kept in the Django cache for ``WOLFRAM_CACHE_TTL`` seconds.
+    """
+
+    def __init__(self, app_id=None, base_url=WOLFRAM_API_URL):
+        self.app_id = app_id
+        self.base_url = base_url
+        self._clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+        self._in_flight = weakref.WeakKeyDictionary()  # event loop -> {query: task}
+
+    def client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = httpx.AsyncClient(timeout=WOLFRAM_TIMEOUT, limits=WOLFRAM_LIMITS)
+        return client
 
-    def query(self, input_query):
+    async def aclose(self):
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def query(self, input_query):
+        key = cache_key(input_query)
+        result = await cache.aget(key)
+        if result is not None:
+            return result
+
+        loop = asyncio.get_running_loop()
+        in_flight = self._in_flight.setdefault(loop, {})
+        task = in_flight.get(input_query)
+        if task is None:
+            task = in_flight[input_query] = loop.create_task(self._fetch(input_query, key))
+            task.add_done_callback(lambda _: in_flight.pop(input_query, None))
+        # A caller that goes away must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, input_query, key):
         params = {
             "input": input_query,
             "format": "plaintext",
             "output": "JSON",
-            "appid": self.app_id
+            "appid": self.app_id or settings.WOLFRAM_APP_ID,
         }
         try:
-            response = requests.get(WOLFRAM_API_URL, params=params)
-            # print("Wolfram Alpha Response:", response.json())
-            response.raise_for_status()  
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error with Wolfram Alpha API: {e}")
+            with timed('http'):
+                response = await self.client().get(self.base_url, params=params)
+            response.raise_for_status()
+            result = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Error with Wolfram Alpha API: %s", e)
             return None
+        await cache.aset(key, result, timeout=settings.WOLFRAM_CACHE_TTL)
+        return result
 
-    def get_currency_conversion(self, amount, from_currency, to_currency):
+    async def get_currency_conversion(self, amount, from_currency, to_currency):
         query = f"{amount} {from_currency} to {to_currency}"
-        result = self.query(query)
+        result = await self.query(query)
         if result:
             try:
                 return result["queryresult"]["pods"][1]["subpods"][0]["plaintext"]
@@ -37,12 +91,24 @@ class WolframAlphaAPI:
                 return "Conversion not available"
         return "Error retrieving conversion."
 
-    def get_budget_analysis(self, budget_amount):
+    async def get_budget_analysis(self, budget_amount):
         query = f"analyze {budget_amount} budget"
-        result = self.query(query)
+        result = await self.query(query)
         if result:
             try:
                 return result["queryresult"]["pods"][0]["subpods"][0]["plaintext"]
             except (KeyError, IndexError):
                 return "No analysis available"
         return "Error retrieving budget analysis."
+
+
+def result_answer(result):
+    """Plain-text answer of the "Result" pod of a query result."""
+    try:
+        result_pod = next(pod for pod in result["queryresult"]["pods"] if pod["title"] == "Result")
+        return result_pod["subpods"][0]["plaintext"]
+    except (KeyError, IndexError, StopIteration):
+        return "No valid result found."
+
+
+wolfram_client = WolframAlphaAPI()
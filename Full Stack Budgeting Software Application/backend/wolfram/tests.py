@@ -1,9 +1,19 @@
 import os
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, AsyncClient
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
 from unittest.mock import patch
+from .services import wolfram_client
+from jobs_app.models import Job
+from jobs_app.services import run_pending
 import json
 
 SUPERUSER_USERNAME = os.getenv('SUPERUSER_USERNAME', 'admin')
@@ -93,3 +103,168 @@ class WolframAlphaAPITest(TestCase):
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {"error": "Missing budget amount"})
+
+
+class StubWolframServer:
+    """Local stand-in for the Wolfram|Alpha API.
+
+    Answers ``input`` from ``answers`` (HTTP 500 for "fail"), records every request and the
+    client port it came from, and can hold responses for ``delay`` seconds.
+    """
+
+    def __init__(self, answers=None):
+        self.answers = answers or {}
+        self.delay = 0
+        self.requests = []
+        self.ports = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is observable
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query).get('input', [''])[0]
+                stub.requests.append(query)
+                stub.ports.add(self.client_address[1])
+                time.sleep(stub.delay)
+                if query == 'fail':
+                    status, payload = 500, {}
+                else:
+                    pods = [{"title": "Input", "subpods": [{"plaintext": query}]},
+                            {"title": "Result", "subpods": [{"plaintext": stub.answers.get(query, "42")}]}]
+                    status, payload = 200, {"queryresult": {"success": True, "pods": pods}}
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v2/query'
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self):
+        self.delay = 0
+        self.requests.clear()
+        self.ports.clear()
+
+
+class WolframClientTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubWolframServer({"2+2": "4", "100 USD to EUR": "92.50 euros"})
+        cls.stub.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.stub.reset()
+        base_url = patch.object(wolfram_client, 'base_url', self.stub.url)
+        base_url.start()
+        self.addCleanup(base_url.stop)
+
+        self.user = get_user_model().objects.create_user(username="wolfram_user", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def run_queries(self, *queries):
+        async def run():
+            try:
+                return await asyncio.gather(*(wolfram_client.query(query) for query in queries))
+            finally:
+                await wolfram_client.aclose()
+        return async_to_sync(run)()
+
+    def test_query_view_answers_from_stub(self):
+        response = self.client.get("/wolfram/query/", {"query": "2+2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"answer": "4"})
+
+        response = self.client.get("/wolfram/convert-currency/",
+                                   {"amount": "100", "from_currency": "USD", "to_currency": "EUR"})
+        self.assertEqual(response.json(), {"conversion_result": "92.50 euros"})
+
+    def test_views_require_authentication(self):
+        response = APIClient().get("/wolfram/query/", {"query": "2+2"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.stub.requests, [])
+
+    def test_repeated_query_is_served_from_cache(self):
+        for _ in range(3):
+            response = self.client.get("/wolfram/query/", {"query": "2+2"})
+            self.assertEqual(response.json(), {"answer": "4"})
+        self.assertEqual(self.stub.requests, ["2+2"])
+
+    def test_failed_query_is_not_cached(self):
+        self.assertEqual(self.run_queries("fail"), [None])
+        self.assertEqual(self.run_queries("fail"), [None])
+        self.assertEqual(self.stub.requests, ["fail", "fail"])
+
+    def test_identical_in_flight_queries_share_one_request(self):
+        self.stub.delay = 0.2
+        results = self.run_queries(*["2+2"] * 5, "3+3")
+        self.assertEqual(len({json.dumps(result) for result in results[:5]}), 1)
+        self.assertEqual(sorted(self.stub.requests), ["2+2", "3+3"])
+
+    def test_connections_are_pooled(self):
+        self.run_queries("1+1")
+        async def sequential():
+            try:
+                for query in ("1+2", "1+3", "1+4"):
+                    await wolfram_client.query(query)
+            finally:
+                await wolfram_client.aclose()
+        async_to_sync(sequential)()
+        self.assertEqual(len(self.stub.requests), 4)
+        # One connection for the first loop, one reused for the three sequential queries
+        self.assertEqual(len(self.stub.ports), 2)
+
+    async def test_asgi_requests_coalesce(self):
+        self.stub.delay = 0.2
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        responses = await asyncio.gather(*(
+            client.get("/wolfram/query/", {"query": "2+2"}) for _ in range(4)
+        ))
+        await wolfram_client.aclose()
+        self.assertEqual([response.json() for response in responses], [{"answer": "4"}] * 4)
+        self.assertEqual(self.stub.requests, ["2+2"])
+        self.assertIn('Server-Timing', responses[0])
+
+    def test_prefer_respond_async_queues_the_query(self):
+        response = self.client.get("/wolfram/query/", {"query": "2+2"}, HTTP_PREFER="respond-async")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Preference-Applied'], 'respond-async')
+        reference = response.json()['job']
+        self.assertEqual(response['Location'], reference['url'])
+        self.assertEqual(self.stub.requests, [])
+
+        run_pending()
+        response = self.client.get(reference['url'])
+        self.assertEqual((response.data['status'], response.data['result']), (Job.SUCCEEDED, {"answer": "4"}))
+
+    def test_queued_query_is_retried_when_upstream_fails(self):
+        response = self.client.get("/wolfram/query/", {"query": "fail"}, HTTP_PREFER="respond-async")
+
+        with self.assertLogs('jobs_app.services', 'WARNING'):
+            run_pending()
+        queued = Job.objects.get(pk=response.json()['job']['id'])
+        self.assertEqual((queued.status, queued.attempts), (Job.QUEUED, 1))
+        self.assertIn("WolframUnavailable", queued.error)
@@ -1,51 +1,73 @@
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
-from rest_framework.views import APIView
-from .services import WolframAlphaAPI
-class WolframAlphaQueryView(APIView):
-    def get(self, request):
+from euniceproj.views import AsyncAPIView
+from jobs_app.serializers import job_reference
+from jobs_app.services import enqueue
+from .services import result_answer, wolfram_client
+
+
+def prefers_async(request):
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+
+async def accepted(request, kind, payload):
+    """Queue the lookup for the job runner; the client polls the job's URL for the result."""
+    job = await sync_to_async(enqueue)(kind, payload, user=request.user)
+    reference = job_reference(job)
+    response = JsonResponse({"job": reference}, status=202)
+    response['Location'] = reference['url']
+    response['Preference-Applied'] = 'respond-async'
+    return response
+
+
+class WolframAlphaQueryView(AsyncAPIView):
+    async def get(self, request):
         query = request.GET.get("query")
         if not query:
             return JsonResponse({"error": "Missing query parameter"}, status=400)
+        # "Prefer: respond-async" queues the lookup (202 + job URL) instead of waiting for it
+        if prefers_async(request):
+            return await accepted(request, 'wolfram.query', {'query': query})
 
-        wolfram = WolframAlphaAPI()
-        result = wolfram.query(query)
+        result = await wolfram_client.query(query)
 
         if not result or "queryresult" not in result:
             return JsonResponse({"error": "Failed to fetch data from Wolfram Alpha"}, status=500)
 
-        try:
-            result_pod = next(pod for pod in result["queryresult"]["pods"] if pod["title"] == "Result")
-            answer = result_pod["subpods"][0]["plaintext"]
-        except (KeyError, IndexError, StopIteration):
-            answer = "No valid result found."
+        return JsonResponse({"answer": result_answer(result)})
 
-        return JsonResponse({"answer": answer})
-class CurrencyConversionView(APIView):
-    def get(self, request):
+
+class CurrencyConversionView(AsyncAPIView):
+    async def get(self, request):
         amount = request.GET.get("amount")
         from_currency = request.GET.get("from_currency")
         to_currency = request.GET.get("to_currency")
 
         if not all([amount, from_currency, to_currency]):
             return JsonResponse({"error": "Missing required parameters"}, status=400)
+        if prefers_async(request):
+            return await accepted(request, 'wolfram.currency_conversion', {
+                'amount': amount, 'from_currency': from_currency, 'to_currency': to_currency,
+            })
 
-        wolfram = WolframAlphaAPI()
-        conversion_result = wolfram.get_currency_conversion(amount, from_currency, to_currency)
+        conversion_result = await wolfram_client.get_currency_conversion(amount, from_currency, to_currency)
 
         if conversion_result.startswith("Error"):
             return JsonResponse({"error": conversion_result}, status=500)
 
         return JsonResponse({"conversion_result": conversion_result})
 
-class BudgetAnalysisView(APIView):
-    def get(self, request):
+
+class BudgetAnalysisView(AsyncAPIView):
+    async def get(self, request):
         budget_amount = request.GET.get("amount")
 
         if not budget_amount:
             return JsonResponse({"error": "Missing budget amount"}, status=400)
+        if prefers_async(request):
+            return await accepted(request, 'wolfram.budget_analysis', {'budget_amount': budget_amount})
 
-        wolfram = WolframAlphaAPI()
-        analysis_result = wolfram.get_budget_analysis(budget_amount)
+        analysis_result = await wolfram_client.get_budget_analysis(budget_amount)
 
         if analysis_result.startswith("Error"):
             return JsonResponse({"error": analysis_result}, status=500)
@@ -62,7 +62,8 @@ const InputTransaction = () => {
     }
 
     try {
-      const response = await fetch("http://localhost:8000/categories/", {
+      // One request for the categories with the user's subcategories nested in each
+      const response = await fetch("http://localhost:8000/dashboard/bootstrap/", {
         method: "GET",
         credentials: "include",
         headers: {
@@ -78,10 +79,10 @@ const InputTransaction = () => {
       }
 
       const data = await response.json();
-      if (Array.isArray(data)) {
-        setCategories(data);
+      if (Array.isArray(data.categories)) {
+        setCategories(data.categories);
       } else {
-        console.error("Categories response is not an array.");
+        console.error("Bootstrap response has no categories array.");
         showAlert('error', "Error loading categories");
       }
     } catch (error) {
@@ -94,36 +95,8 @@ const InputTransaction = () => {
     const categoryId = event.target.value;
     setSelectedCategory(categoryId);
     setSelectedSubcategory("");
-    if(categoryId){
-      fetchSubcategories(categoryId);
-    } else {
-      setSubcategories([])
-    }
-  };
-
-  const fetchSubcategories = async (categoryId) => {
-    try {
-      const response = await fetch(`http://localhost:8000/subcategories/?category_id=${categoryId}`, {
-        method: "GET",
-        credentials: "include",
-        headers: {
-          Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json",
-        },
-      });
-
-      if (response.status === 401) {
-        showAlert('error', "Session expired. Please log in again.");
-        window.location.href = "/";
-        return;
-      }
-
-      const data = await response.json();
-      setSubcategories(data);
-    } catch (error) {
-      console.error("Error fetching subcategories:", error);
-      showAlert('error', "Error loading subcategories");
-    }
+    const category = categories.find((cat) => cat.id === categoryId);
+    setSubcategories(category ? category.subcategories : []);
   };
 
   const evaluateExpression = async (expression) => {
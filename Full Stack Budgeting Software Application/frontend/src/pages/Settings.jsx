@@ -33,47 +33,20 @@ const Settings = () => {
     const today = new Date().toISOString().split("T")[0];
     setDate(today);
 
-    fetchCategories();
-    fetchRecurringTransactions();
+    fetchBootstrap();
   }, []);
 
   useEffect(() => {
     if (selectedCategory) {
-      fetchSubcategories(selectedCategory);
+      const category = categories.find((cat) => cat.id === parseInt(selectedCategory));
+      setSubcategories(category ? category.subcategories : []);
     }
-  }, [selectedCategory]);
+  }, [selectedCategory, categories]);
 
-  const fetchCategories = async () => {
+  const fetchBootstrap = async () => {
     try {
-      const response = await fetch("http://localhost:8000/categories/", {
-        headers: {
-          Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json",
-        },
-      });
-
-      if (!response.ok) {
-        throw new Error("Failed to fetch categories");
-      }
-
-      const data = await response.json();
-      console.log('Fetched categories:', data);
-
-      if (Array.isArray(data)) {
-        setCategories(data);
-      } else {
-        console.error("Categories response is not an array:", data);
-        showAlert('error', 'Failed to load categories');
-      }
-    } catch (error) {
-      console.error("Error fetching categories:", error);
-      showAlert('error', 'Failed to fetch categories');
-    }
-  };
-
-  const fetchSubcategories = async (categoryId) => {
-    try {
-      const response = await fetch(`http://localhost:8000/subcategories/?category_id=${categoryId}`, {
+      // Categories with the user's subcategories and the recurring series, in one request
+      const response = await fetch("http://localhost:8000/dashboard/bootstrap/", {
         method: "GET",
         credentials: "include",
         headers: {
@@ -82,48 +55,28 @@ const Settings = () => {
         },
       });
 
-      if (!response.ok) {
-        throw new Error("Failed to fetch subcategories");
-      } 
-
       if (response.status === 401) {
         alert("Session expired. Please log in again.");
         window.location.href = "/";
         return;
       }
 
-      const data = await response.json();
-      setSubcategories(data);
-    } catch (error) {
-      console.error("Error fetching subcategories:", error);
-    }
-  };
-
-  const fetchRecurringTransactions = async () => {
-    try {
-      const response = await fetch('http://localhost:8000/transactions/recurring-transactions/', {
-        method: "GET",
-        credentials: "include",
-        headers: {
-          Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json",
-        },  
-      });
-
       if (!response.ok) {
-        throw new Error("Failed to fetch recurring transactions");
-      }
-
-      if (response.status === 401) {
-        alert("Session expired. Please log in again.");
-        window.location.href = "/";
-        return;
+        throw new Error("Failed to fetch categories");
       }
 
       const data = await response.json();
-      setRecurringTransactions(data);
+
+      if (Array.isArray(data.categories)) {
+        setCategories(data.categories);
+      } else {
+        console.error("Bootstrap response has no categories array:", data);
+        showAlert('error', 'Failed to load categories');
+      }
+      setRecurringTransactions(data.recurring_transactions || []);
     } catch (error) {
-      console.error("Error fetching recurring transactions:", error);
+      console.error("Error fetching categories:", error);
+      showAlert('error', 'Failed to fetch categories');
     }
   };
 
@@ -176,7 +129,7 @@ const Settings = () => {
       }
 
       showAlert('success', 'Recurring transaction created successfully');
-      fetchRecurringTransactions();
+      fetchBootstrap();
       resetForm();
     } catch (error) {
       console.error('Error creating recurring transaction:', error);
@@ -205,7 +158,7 @@ const Settings = () => {
         return;
       }
       showAlert('success', 'Recurring transaction deleted successfully');
-      fetchRecurringTransactions();
+      fetchBootstrap();
     } catch (error) {
       console.error('Error deleting recurring transaction:', error);
       showAlert('error', 'Failed to delete recurring transaction');